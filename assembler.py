@@ -0,0 +1,157 @@
+# Assembler and disassembler for MC14500B programs.
+#
+# A program line holds an optional label, an instruction and a comment:
+#
+#     loop:   LD 7        ; load input 7
+#             STOC 7      ; store the complement in latch 7
+#             JMP loop
+#
+# The mnemonics are the OPCODE names, with NOPO accepted for NOP0. The
+# operand is the i/o address, or for JMP the jump address, as a number or a
+# label. RTN, NOP0, NOPF and SKZ can leave it out. The write enable of the
+# output latch is set for STO and STOC; a W after the operand sets it for
+# other instructions, NW clears it for a store. The program words are built
+# with a WordLayout.
+#
+# Assembled images can be cached on disk, in the directory passed as
+# cache_dir or named by the MC14500B_CACHE environment variable. The cache
+# files are named by a hash of the source and the layout, so an unchanged
+# source isn't assembled again, and a changed one never hits a stale image.
+
+import hashlib
+import os
+from array import array
+
+from layout import WordLayout
+from mc14500b import OPCODE
+from rom import word_typecode
+
+_VERSION = 1    # part of the cache key, increment when the output changes
+_MNEMONICS = {opcode.name: opcode for opcode in OPCODE}
+_MNEMONICS['NOPO'] = OPCODE.NOP0
+_STORES = {OPCODE.STO, OPCODE.STOC}
+_NO_OPERAND = {OPCODE.NOP0, OPCODE.NOPF, OPCODE.RTN, OPCODE.SKZ}
+
+
+class AssemblerError(ValueError):
+    def __init__(self, line_number: int, message: str):
+        super().__init__(f"line {line_number}: {message}")
+        self.line_number = line_number
+
+
+def _parse(source: str):
+    ''' Split the source in labels and instructions: returns the label
+        addresses and a list of (line number, opcode, operand, write)
+    '''
+    labels = {}
+    instructions = []
+    for line_number, line in enumerate(source.splitlines(), start=1):
+        line = line.split(';', 1)[0].strip()
+        while ':' in line:
+            label, line = line.split(':', 1)
+            label = label.strip()
+            if not label.isidentifier():
+                raise AssemblerError(line_number, f"invalid label {label!r}")
+            if label in labels:
+                raise AssemblerError(line_number, f"label {label!r} defined twice")
+            labels[label] = len(instructions)
+            line = line.strip()
+        if not line:
+            continue
+        mnemonic, *operands = line.split()
+        opcode = _MNEMONICS.get(mnemonic.upper())
+        if opcode is None:
+            raise AssemblerError(line_number, f"unknown instruction {mnemonic!r}")
+        write = opcode in _STORES
+        if operands and operands[-1].upper() in ('W', 'NW'):
+            write = operands.pop().upper() == 'W'
+        if len(operands) > 1:
+            raise AssemblerError(line_number, f"too many operands for {mnemonic}")
+        if not operands and opcode not in _NO_OPERAND:
+            raise AssemblerError(line_number, f"{mnemonic} needs an operand")
+        instructions.append((line_number, opcode, operands[0] if operands else '0', write))
+    return labels, instructions
+
+
+def _operand_value(operand: str, labels: dict, line_number: int) -> int:
+    if operand in labels:
+        return labels[operand]
+    try:
+        return int(operand, 0)
+    except ValueError:
+        raise AssemblerError(line_number, f"unknown label {operand!r}") from None
+
+
+def _assemble(source: str, layout: WordLayout) -> list[int]:
+    labels, instructions = _parse(source)
+    contents = []
+    for line_number, opcode, operand, write in instructions:
+        value = _operand_value(operand, labels, line_number)
+        if opcode == OPCODE.JMP:
+            if not 0 <= value <= layout.jump_mask:
+                raise AssemblerError(line_number, f"jump address {value} out of range")
+            if write:
+                raise AssemblerError(line_number, "JMP can't write the output latch")
+            contents.append(layout.encode_jump(opcode, value))
+        else:
+            if not 0 <= value <= layout.address_mask:
+                raise AssemblerError(line_number, f"i/o address {value} out of range")
+            contents.append(layout.encode(opcode, write, value))
+    return contents
+
+
+def _cache_path(cache_dir, source: str, layout: WordLayout) -> str:
+    key = hashlib.sha256(f'{_VERSION}\n{layout!r}\n{source}'.encode()).hexdigest()
+    return os.path.join(cache_dir, f'{key}.bin')
+
+
+def assemble(source: str, layout: WordLayout | None = None, cache_dir=None) -> list[int]:
+    ''' Assemble a program into ROM contents '''
+    layout = layout or WordLayout()
+    cache_dir = cache_dir or os.environ.get('MC14500B_CACHE')
+    if not cache_dir:
+        return _assemble(source, layout)
+    path = _cache_path(cache_dir, source, layout)
+    typecode = word_typecode(layout.opcode_shift + 4)
+    try:
+        with open(path, 'rb') as file:
+            image = array(typecode)
+            image.frombytes(file.read())
+            return image.tolist()
+    except (OSError, ValueError):
+        pass
+    contents = _assemble(source, layout)
+    os.makedirs(cache_dir, exist_ok=True)
+    # write to a temporary file first, so a reader never sees a partial image
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as file:
+        file.write(array(typecode, contents).tobytes())
+    os.replace(temporary, path)
+    return contents
+
+
+def assemble_file(path, layout: WordLayout | None = None, cache_dir=None) -> list[int]:
+    with open(path) as file:
+        return assemble(file.read(), layout, cache_dir)
+
+
+def disassemble_word(word: int, layout: WordLayout | None = None) -> str:
+    ''' The assembler source of a program word '''
+    layout = layout or WordLayout()
+    opcode = OPCODE(layout.opcode(word))
+    if opcode == OPCODE.JMP:
+        return f'JMP {layout.jump_address(word)}'
+    _, write, address = layout.decode(word)
+    text = opcode.name
+    if address or opcode not in _NO_OPERAND:
+        text += f' {address}'
+    if write != (opcode in _STORES):
+        text += ' W' if write else ' NW'
+    return text
+
+
+def disassemble(contents: list[int], layout: WordLayout | None = None) -> str:
+    ''' The assembler source of ROM contents, with the word addresses as comments '''
+    width = len(str(len(contents) - 1))
+    return ''.join(f'    {disassemble_word(word, layout):<12}; {address:>{width}}\n'
+                   for address, word in enumerate(contents))
@@ -0,0 +1,195 @@
+# Banks of MC14599B latches and MC14512B selectors, as single devices.
+# Larger MC14500B systems cascade several 8-bit chips behind an address
+# decoder to get 64 or 128 i/o points: the high address bits select a chip,
+# the low 3 bits a latch or input of that chip. A bank models the chips and
+# the decoder as one device with a wide address, so a board doesn't clock
+# and connect every chip separately.
+#
+# LatchBank(chips) behaves like `chips` MC14599B latches whose chip enables
+# are driven by the decoder, gated by the chip enable of the bank, and which
+# share the write, data and low address inputs. The falling edge captures
+# the inputs, the rising edge writes the data to the addressed latch when
+# the bank is enabled, the write input is active and the address selects a
+# chip. The latch outputs are held in a single int, bit i for i/o point i.
+#
+# SelectorBank(chips) behaves like `chips` MC14512B selectors whose disable
+# inputs are driven by the decoder, with their outputs tied together. Its
+# inputs are connected as one wide port (an int with bit i for input i), or
+# as an 8-bit port per chip. Like the MC14512B, it has no clock. An address
+# beyond the last chip selects none, and the output is high impedance (None).
+
+from net import connection
+from tracing import LatchRecord, Traceable
+
+
+class LatchBank(Traceable):
+    __slots__ = ('_chips', '_points', '_latches', '_address', '_input_data', '_chip_enable',
+                 '_write', '_get_chip_enable', '_get_address', '_get_write', '_get_data',
+                 '_observers', '_untraced_class')
+
+    def __init__(self, chips: int):
+        self._chips = chips
+        self._points = chips * 8
+        self._latches: int = 0  # latch outputs, bit i is i/o point i
+        self._address: int = 0
+        self._input_data: bool = False
+        self._chip_enable: bool = False
+        self._write: bool = False
+        self._get_chip_enable = None
+        self._get_address = None
+        self._get_write = None
+        self._get_data = None
+        self._observers = None  # trace observers, see tracing.py
+
+    @property
+    def chips(self) -> int:
+        return self._chips
+
+    @property
+    def data(self) -> bool | None:
+        ''' The addressed latch; None means the data bus is in write mode, or
+            no chip is addressed
+        '''
+        if self._write or self._address >= self._points:
+            return None
+        return bool((self._latches >> self._address) & 1)
+
+    @property
+    def q(self) -> int:
+        ''' All latch outputs as an integer, bit i is i/o point i '''
+        return self._latches
+
+    @q.setter
+    def q(self, value: int):
+        self._latches = value & ((1 << self._points) - 1)
+
+    def output_bytes(self) -> bytes:
+        ''' The latch outputs of the chips, one byte per chip '''
+        return self._latches.to_bytes(self._chips, 'little')
+
+    def chip_q(self, chip: int) -> int:
+        ''' The outputs of one chip, like MC14599B.q '''
+        return (self._latches >> (chip * 8)) & 0xFF
+
+    def point(self, point: int) -> bool:
+        return bool((self._latches >> point) & 1)
+
+    def clock_fall(self):
+        ''' Capture the inputs of all chips '''
+        if self._get_chip_enable:
+            self._chip_enable = bool(self._get_chip_enable())
+        if self._get_address:
+            self._address = self._get_address()
+        if self._get_write:
+            self._write = bool(self._get_write())
+        if self._get_data:
+            self._input_data = bool(self._get_data())
+
+    def clock_rise(self):
+        ''' Write the addressed latch, if a chip is enabled and in write mode '''
+        if self._chip_enable and self._write and self._address < self._points:
+            if self._input_data:
+                self._latches |= 1 << self._address
+            else:
+                self._latches &= ~(1 << self._address)
+
+    def execute(self):
+        self.clock_fall()
+        self.clock_rise()
+
+    def snapshot(self) -> tuple:
+        return (self._latches, self._address, self._input_data, self._chip_enable, self._write)
+
+    def restore(self, snapshot: tuple):
+        self._latches, self._address, self._input_data, self._chip_enable, self._write = snapshot
+
+    def connect_chip_enable(self, chip_enable):
+        ''' Connect the enable of the address decoder '''
+        self._get_chip_enable = connection(chip_enable)
+
+    def connect_write_input(self, write_input):
+        self._get_write = connection(write_input)
+
+    def connect_address_input(self, address_input):
+        ''' Connect the wide address: chip number * 8 + latch number '''
+        self._get_address = connection(address_input)
+
+    def connect_data_input(self, data_input):
+        self._get_data = connection(data_input)
+
+
+class _TracedLatchBank(LatchBank):
+    ''' LatchBank with observers, see tracing.py '''
+    __slots__ = ()
+
+    def clock_rise(self):
+        super().clock_rise()
+        if self._chip_enable and self._write and self._address < self._points:
+            record = LatchRecord(self, self._address, bool(self._input_data))
+            for observer in self._observers:
+                observer(record)
+
+
+LatchBank._traced_class = _TracedLatchBank
+
+
+class SelectorBank:
+    __slots__ = ('_chips', '_points', '_get_address', '_get_port', '_get_ports')
+
+    def __init__(self, chips: int):
+        self._chips = chips
+        self._points = chips * 8
+        self._get_address = None
+        self._get_port = None   # source of all inputs
+        self._get_ports = [None] * chips  # sources of the inputs per chip
+
+    @property
+    def chips(self) -> int:
+        return self._chips
+
+    @property
+    def data(self) -> bool | None:
+        if not self._get_address:
+            raise RuntimeError("SelectorBank address input not connected")
+        address = self._get_address()
+        if address >= self._points:
+            return None
+        if self._get_port:
+            return bool((self._get_port() >> address) & 1)
+        get_port = self._get_ports[address >> 3]
+        if not get_port:
+            raise RuntimeError(f"SelectorBank chip {address >> 3} not connected")
+        return bool((get_port() >> (address & 7)) & 1)
+
+    def select(self, addresses) -> list[bool | None]:
+        ''' The outputs for a sequence of addresses, reading the inputs once '''
+        inputs = self.inputs()
+        points = self._points
+        return [bool((inputs >> address) & 1) if address < points else None
+                for address in addresses]
+
+    def inputs(self) -> int:
+        ''' All inputs as an integer, bit i is input i '''
+        if self._get_port:
+            return self._get_port() & ((1 << self._points) - 1)
+        inputs = 0
+        for chip, get_port in enumerate(self._get_ports):
+            if not get_port:
+                raise RuntimeError(f"SelectorBank chip {chip} not connected")
+            inputs |= (get_port() & 0xFF) << (chip * 8)
+        return inputs
+
+    def connect_address_input(self, address_input):
+        ''' Connect the wide address: chip number * 8 + input number '''
+        self._get_address = connection(address_input)
+
+    def connect_data_inputs(self, data_inputs):
+        ''' Connect all inputs to a source returning an int, bit i for input i '''
+        self._get_port = connection(data_inputs)
+
+    def connect_chip_inputs(self, chip: int, data_inputs):
+        ''' Connect the 8 inputs of a chip to a source returning a byte '''
+        if not 0 <= chip < self._chips:
+            raise ValueError(f"Chip must be between 0 and {self._chips - 1}")
+        self._get_port = None
+        self._get_ports[chip] = connection(data_inputs)
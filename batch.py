@@ -0,0 +1,116 @@
+# BatchBoard simulates many copies of the board of
+# test_execute_14500_from_rom in lockstep, each with its own input byte.
+# All copies run the same ROM program, so they share the program counter and
+# the instruction. The MC14500B registers and the MC14599B latches are held
+# as bitplanes: one Python int per register bit, with bit k of the int
+# holding the value for board k. An instruction then executes on all boards
+# with a handful of bitwise operations, whatever the number of boards.
+#
+# The board semantics are those of the compiler (see compiler.py): the ICU
+# is clocked before the output latch, the latch is always enabled and writes
+# the ICU data output when the write bit of the program word is set.
+
+from layout import WordLayout
+from logic_unit import IEN, OEN, SKZ, STATE_BITS, STOC, USES_DATA, plane_functions
+from mc14500b import RESET_STATE, flags_of
+
+
+def pack_planes(values, width: int) -> list[int]:
+    ''' Transpose a sequence of `width`-bit values into `width` bitplanes '''
+    values = list(values)
+    if not values:
+        return [0] * width
+    # Transpose the binary strings, most significant bit and last lane first
+    rows = [format(value & ((1 << width) - 1), f'0{width}b') for value in reversed(values)]
+    return [int(''.join(column), 2) for column in reversed(list(zip(*rows)))]
+
+
+def unpack_planes(planes: list[int], lanes: int) -> list[int]:
+    ''' Transpose bitplanes back into one value per lane '''
+    if not lanes:
+        return []
+    if not planes:
+        return [0] * lanes
+    rows = [format(plane, f'0{lanes}b') for plane in reversed(planes)]
+    return [int(''.join(column), 2) for column in reversed(list(zip(*rows)))]
+
+
+class BatchBoard:
+    def __init__(self, contents: list[int], inputs, layout: WordLayout | None = None):
+        if not contents:
+            raise ValueError("Can't run an empty program")
+        self._layout = layout or WordLayout()
+        self._program = [self._layout.decode(word) for word in contents]
+        inputs = list(inputs)
+        self._lanes = len(inputs)
+        self._ones = (1 << self._lanes) - 1
+        self._inputs = pack_planes(inputs, 8)
+        self.reset()
+
+    def reset(self):
+        ''' Reset all boards: program counter, MC14500B and latches '''
+        self._pc = 0
+        self._flags = 0
+        self._planes = [self._ones if RESET_STATE & bit else 0 for bit in STATE_BITS]
+        self._latches = [0] * 8
+
+    @property
+    def lanes(self) -> int:
+        return self._lanes
+
+    @property
+    def pc(self) -> int:
+        return self._pc
+
+    @property
+    def flags(self) -> int:
+        ''' The MC14500B flag outputs, equal for all boards '''
+        return self._flags
+
+    @property
+    def latches(self) -> list[int]:
+        ''' The MC14599B outputs (MC14599B.q) of each board '''
+        return unpack_planes(self._latches, self._lanes)
+
+    @property
+    def states(self) -> list[int]:
+        ''' The MC14500B state (MC14500B.state) of each board '''
+        return unpack_planes(self._planes, self._lanes)
+
+    def run(self, clocks: int = 1):
+        ''' Run all boards for a number of clock cycles '''
+        ones = self._ones
+        inputs = self._inputs
+        latches = self._latches
+        program = self._program
+        length = len(program)
+        pc = self._pc
+        rr, ien, oen, out, skz = self._planes
+        functions = plane_functions(ones)
+        for _ in range(clocks):
+            opcode, write, address = program[pc]
+            pc += 1
+            if pc == length:
+                pc = 0
+            # boards that execute the instruction, the others skip it
+            run = ones & ~(skz & ~rr) if skz else ones
+            if opcode == STOC:
+                new_out = ones & ~rr
+            else:
+                if opcode in USES_DATA:
+                    data = ien & inputs[address & 7]
+                    if opcode == IEN:
+                        ien = (ien & ~run) | (data & run)
+                    elif opcode == OEN:
+                        oen = (oen & ~run) | (data & run)
+                    else:
+                        rr = (rr & ~run) | (functions[opcode](rr, data) & run)
+                new_out = rr
+            out = (out & ~run) | (new_out & run)
+            skz = run if opcode == SKZ else 0
+            if write:
+                latches[address & 7] = out & oen
+        self._pc = pc
+        self._planes = [rr, ien, oen, out, skz]
+        if clocks:
+            self._flags = flags_of(opcode)
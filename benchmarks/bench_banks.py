@@ -0,0 +1,77 @@
+# Benchmark of i/o banks: 128 output points as 16 MC14599B chips with an
+# address decoder, against one LatchBank, on a board with a counter driving
+# the address and data; and 128 inputs as 16 MC14512B chips against one
+# SelectorBank, reading every input once.
+# Run from the repository root: python -m benchmarks.bench_banks
+
+import time
+import timeit
+
+from banks import LatchBank, SelectorBank
+from board import Board
+from counter import Counter
+from mc14512b import MC14512B
+from mc14599b import MC14599B
+
+CHIPS = 16
+CYCLES = 20_000
+
+
+def latch_board(bank: bool):
+    counter = Counter(bits=8)
+    address = lambda: counter.count & 0x7F
+    data = lambda: counter.count >> 7
+    board = Board()
+    board.add_device(counter)
+    if bank:
+        latches = LatchBank(CHIPS)
+        latches.connect_chip_enable(lambda: True)
+        latches.connect_address_input(address)
+        latches.connect_write_input(lambda: True)
+        latches.connect_data_input(data)
+        board.add_device(latches)
+        return board, lambda: latches.q
+    chips = []
+    for chip in range(CHIPS):
+        latch = MC14599B()
+        latch.connect_chip_enable(lambda chip=chip: address() >> 3 == chip)
+        latch.connect_address_input(lambda: address() & 7)
+        latch.connect_write_input(lambda: True)
+        latch.connect_data_input(data)
+        board.add_device(latch)
+        chips.append(latch)
+    return board, lambda: sum(latch.q << (8 * chip) for chip, latch in enumerate(chips))
+
+
+def main():
+    outputs = {}
+    for bank in (False, True):
+        board, q = latch_board(bank)
+        start = time.perf_counter()
+        board.run(CYCLES)
+        rate = CYCLES / (time.perf_counter() - start)
+        outputs[bank] = q()
+        print(f"{'LatchBank' if bank else f'{CHIPS} x MC14599B'}:  {rate:10,.0f} cycles/s")
+    assert outputs[False] == outputs[True]
+
+    address = 0
+    ports = list(range(CHIPS))
+    chips = []
+    for chip in range(CHIPS):
+        selector = MC14512B()
+        selector.connect_address_input(lambda: address & 7)
+        selector.connect_data_inputs(lambda chip=chip: ports[chip])
+        chips.append(selector)
+    bank = SelectorBank(CHIPS)
+    bank.connect_address_input(lambda: address)
+    for chip in range(CHIPS):
+        bank.connect_chip_inputs(chip, lambda chip=chip: ports[chip])
+    chip_time = timeit.timeit(lambda: [chips[a >> 3].select([a])[0] for a in range(CHIPS * 8)],
+                              number=200)
+    bank_time = timeit.timeit(lambda: bank.select(range(CHIPS * 8)), number=200)
+    print(f"read 128 inputs: {chip_time / 200 * 1e6:8.1f} us with chips,"
+          f" {bank_time / 200 * 1e6:8.1f} us with SelectorBank.select")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+# Benchmark of BatchBoard: all 256 inputs of the inverter program in one
+# batch, against one Board.run(16) per input.
+# Run from the repository root: python -m benchmarks.bench_batch
+
+import time
+
+from batch import BatchBoard
+from benchmarks.boards import INVERTER_PROGRAM, inverter_board
+
+REPEAT = 20
+
+
+def main():
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        expected = []
+        for input_data in range(256):
+            board, devices = inverter_board(input_data)
+            board.run(16)
+            expected.append(devices['latch'].q)
+    board_time = (time.perf_counter() - start) / REPEAT
+
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        batch = BatchBoard(INVERTER_PROGRAM, range(256))
+        batch.run(16)
+        latches = batch.latches
+    batch_time = (time.perf_counter() - start) / REPEAT
+
+    batch = BatchBoard(INVERTER_PROGRAM, range(256))
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        batch.reset()
+        batch.run(16)
+    run_time = (time.perf_counter() - start) / REPEAT
+
+    assert latches == expected
+    print(f"256 x Board.run(16):  {board_time * 1e3:10.3f} ms")
+    print(f"BatchBoard.run(16):   {batch_time * 1e3:10.3f} ms (including packing)")
+    print(f"BatchBoard.run(16):   {run_time * 1e3:10.3f} ms (simulation only)")
+    print(f"speedup:              {board_time / batch_time:10.1f}x, {board_time / run_time:.0f}x")
+
+
+if __name__ == '__main__':
+    main()
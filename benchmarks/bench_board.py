@@ -0,0 +1,51 @@
+# Benchmark of Board.run on the board of test_execute_14500_from_rom.
+# Compares the precompiled dispatch lists of Board with the per-edge
+# hasattr/callable duck typing that Board used before.
+# Run from the repository root: python -m benchmarks.bench_board
+
+import time
+
+from board import Board
+from benchmarks.boards import inverter_board
+
+CYCLES = 200_000
+
+
+class DuckTypedBoard(Board):
+    ''' Board that probes every device for its clock methods on every edge '''
+
+    def run(self, clocks: int = 1):
+        for _ in range(clocks):
+            self.clock_fall()
+            self.clock_rise()
+
+    def clock_fall(self):
+        for device in self._devices:
+            if hasattr(device, 'clock_fall') and callable(device.clock_fall):
+                device.clock_fall()
+
+    def clock_rise(self):
+        for device in self._devices:
+            if hasattr(device, 'clock_rise') and callable(device.clock_rise):
+                device.clock_rise()
+
+
+def cycles_per_second(board, cycles: int = CYCLES) -> float:
+    start = time.perf_counter()
+    board.run(cycles)
+    return cycles / (time.perf_counter() - start)
+
+
+def main():
+    before, _ = inverter_board(board_class=DuckTypedBoard)
+    after, devices = inverter_board()
+    before_rate = cycles_per_second(before)
+    after_rate = cycles_per_second(after)
+    assert devices['latch'].q == 0b00001111
+    print(f"duck typed board:  {before_rate:12,.0f} cycles/s")
+    print(f"dispatch lists:    {after_rate:12,.0f} cycles/s")
+    print(f"speedup:           {after_rate / before_rate:12.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+# Benchmark of the compiled inverter program against Board.run.
+# Run from the repository root: python -m benchmarks.bench_compiler
+
+import time
+
+from benchmarks.boards import INVERTER_PROGRAM, inverter_board
+from compiler import compile_program
+from mc14500b import RESET_STATE
+
+PASSES = 20_000
+
+
+def main():
+    board, devices = inverter_board()
+    start = time.perf_counter()
+    board.run(PASSES * len(INVERTER_PROGRAM))
+    board_rate = PASSES / (time.perf_counter() - start)
+
+    program = compile_program(INVERTER_PROGRAM)
+    scan = program.scan
+    latches, state = 0, RESET_STATE
+    passes = PASSES * 20
+    start = time.perf_counter()
+    for _ in range(passes):
+        latches, state = scan(0b11110000, latches, state)
+    compiled_rate = passes / (time.perf_counter() - start)
+
+    assert latches == devices['latch'].q and state == devices['icu'].state
+    print(f"Board.run:         {board_rate:12,.0f} passes/s")
+    print(f"compiled program:  {compiled_rate:12,.0f} passes/s")
+    print(f"speedup:           {compiled_rate / board_rate:12.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+# Benchmark of event driven mode, on the inverter board with 16 extra status
+# latches whose inputs are idle.
+# Run from the repository root: python -m benchmarks.bench_events
+
+import time
+
+from benchmarks.boards import peripheral_board
+
+CYCLES = 20_000
+
+
+def cycles_per_second(board, cycles: int = CYCLES) -> float:
+    start = time.perf_counter()
+    board.run(cycles)
+    return cycles / (time.perf_counter() - start)
+
+
+def main():
+    full, full_devices = peripheral_board(event_driven=False)
+    events, event_devices = peripheral_board(event_driven=True)
+    full_rate = cycles_per_second(full)
+    events_rate = cycles_per_second(events)
+    assert full_devices['latch'].q == event_devices['latch'].q == 0b00001111
+    print(f"full sweep:    {full_rate:12,.0f} cycles/s")
+    print(f"event driven:  {events_rate:12,.0f} cycles/s")
+    print(f"speedup:       {events_rate / full_rate:12.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,32 @@
+# Benchmark of fast forwarding: a soak test of the inverter board with idle
+# inputs, run cycle by cycle and fast forwarded, for an increasing number of
+# cycles. Fast forwarding simulates until the state repeats, so its time
+# doesn't grow with the number of cycles.
+# Run from the repository root: python -m benchmarks.bench_fast_forward
+
+import time
+
+from benchmarks.boards import inverter_board
+
+
+def main():
+    for clocks in (10**4, 10**5, 10**6, 10**9):
+        if clocks <= 10**6:
+            board, devices = inverter_board()
+            start = time.perf_counter()
+            board.run(clocks)
+            run_time = f"{time.perf_counter() - start:10.4f} s"
+            q = devices['latch'].q
+        else:
+            run_time = f"{'-':>12}"
+        board, devices = inverter_board()
+        start = time.perf_counter()
+        result = board.fast_forward(clocks, stride=16)
+        fast_time = time.perf_counter() - start
+        assert clocks > 10**6 or devices['latch'].q == q
+        print(f"{clocks:13,} cycles: run {run_time}, fast_forward {fast_time:8.4f} s "
+              f"({result.simulated} simulated, period {result.period})")
+
+
+if __name__ == '__main__':
+    main()
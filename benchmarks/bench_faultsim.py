@@ -0,0 +1,82 @@
+# Benchmark of fault simulation: a stuck-at campaign on a 16 word control
+# program with 32 random test vectors, with one Board per fault, and with
+# simulate_faults running all faulty boards as bitplanes in one pass. The
+# serial campaign covers the ROM, input and latch faults, which can be
+# injected without changing the device models.
+# Run from the repository root: python -m benchmarks.bench_faultsim
+
+import random
+import time
+
+from benchmarks.boards import inverter_board
+from faultsim import all_faults, simulate_faults
+from layout import WordLayout
+from mc14500b import OPCODE
+
+VECTORS = 32
+
+
+def control_program() -> list[int]:
+    ''' Two rungs of AND/OR logic with a SKZ, writing latches 0..3 '''
+    layout = WordLayout()
+    program = [(OPCODE.LD, 0, 0), (OPCODE.AND, 0, 1), (OPCODE.OR, 0, 2), (OPCODE.STO, 1, 0),
+               (OPCODE.STOC, 1, 1), (OPCODE.LDC, 0, 3), (OPCODE.ANDC, 0, 4), (OPCODE.XNOR, 0, 5),
+               (OPCODE.STO, 1, 2), (OPCODE.SKZ, 0, 0), (OPCODE.STO, 1, 3), (OPCODE.LD, 0, 6),
+               (OPCODE.ORC, 0, 7), (OPCODE.STO, 1, 4), (OPCODE.OEN, 0, 7), (OPCODE.STOC, 1, 5)]
+    return [layout.encode(opcode, write, address) for opcode, write, address in program]
+
+
+def serial_campaign(contents, vectors, faults) -> dict:
+    def run(fault):
+        inputs = [0]
+        rom_contents = list(contents)
+        stuck0 = stuck1 = latch0 = latch1 = 0
+        if fault is not None:
+            bit = 1 << (fault.bit if fault.site == 'rom' else fault.location)
+            if fault.site == 'rom':
+                rom_contents[fault.location] = (rom_contents[fault.location] & ~bit) | (bit * fault.value)
+            elif fault.site == 'input':
+                stuck0, stuck1 = (0, bit) if fault.value else (bit, 0)
+            else:
+                latch0, latch1 = (0, bit) if fault.value else (bit, 0)
+        board, devices = inverter_board(contents=rom_contents)
+        devices['selector'].connect_data_inputs(lambda: (inputs[0] & ~stuck0) | stuck1)
+        for vector in vectors:
+            inputs[0] = vector
+            board.run(len(contents))
+            yield (devices['latch'].q & ~latch0) | latch1
+
+    expected = list(run(None))
+    detected = {}
+    for fault in faults:
+        for index, (q, good) in enumerate(zip(run(fault), expected)):
+            if q != good:
+                detected[fault] = index
+                break
+    return detected
+
+
+def main():
+    contents = control_program()
+    rng = random.Random(3)
+    vectors = [rng.randrange(256) for _ in range(VECTORS)]
+    faults = [fault for fault in all_faults(contents) if fault.site in ('rom', 'input', 'latch')]
+
+    start = time.perf_counter()
+    serial = serial_campaign(contents, vectors, faults)
+    serial_time = time.perf_counter() - start
+    start = time.perf_counter()
+    report = simulate_faults(contents, vectors, faults=faults)
+    parallel_time = time.perf_counter() - start
+    assert report.detected == serial
+
+    print(report)
+    print(f"coverage per vector: {', '.join(f'{c:.0%}' for c in report.coverage_per_vector()[:8])}, ...")
+    print(f"one Board per fault:  {serial_time:8.3f} s")
+    print(f"simulate_faults:      {parallel_time:8.3f} s ({serial_time / parallel_time:.0f}x)")
+    full = simulate_faults(contents, vectors, observe_flags=True)
+    print(f"all sites and flags:  {full}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+# Memory benchmark: bytes per instance of the inverter board, and of its
+# devices, measured with tracemalloc.
+# Run from the repository root: python -m benchmarks.bench_memory
+
+import tracemalloc
+
+from benchmarks.boards import inverter_board
+from counter import Counter
+from mc14500b import MC14500B
+from mc14599b import MC14599B
+from rom import Rom
+
+INSTANCES = 2_000
+
+
+def bytes_per_instance(factory, instances: int = INSTANCES) -> float:
+    factory()   # warm up caches and interned constants
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    objects = [factory() for _ in range(instances)]
+    end, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return (end - start) / instances
+
+
+def main():
+    contents = list(range(16))
+    factories = {
+        'inverter board': inverter_board,
+        'MC14500B': MC14500B,
+        'MC14599B': MC14599B,
+        'Counter': lambda: Counter(bits=4),
+        'Rom (16 words)': lambda: Rom(data_bits=8, address_bits=4, contents=contents),
+        'Rom (4096 words)': lambda: Rom(data_bits=8, address_bits=12),
+    }
+    for name, factory in factories.items():
+        print(f"{name:18}: {bytes_per_instance(factory, 200 if '4096' in name else INSTANCES):10,.0f} bytes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+# Benchmark of cached nets: the inverter board with lambdas reading the ROM
+# data for every input, against the board with the ROM data as a Bus.
+# Reports the number of Python function calls per cycle and cycles/s.
+# Run from the repository root: python -m benchmarks.bench_net
+
+import sys
+import time
+
+from benchmarks.boards import inverter_board
+
+CYCLES = 200_000
+COUNTED_CYCLES = 1_600
+
+
+def calls_per_cycle(board, cycles: int = COUNTED_CYCLES) -> float:
+    calls = 0
+
+    def profile(frame, event, arg):
+        nonlocal calls
+        if event == 'call':
+            calls += 1
+
+    sys.setprofile(profile)
+    board.run(cycles)
+    sys.setprofile(None)
+    return calls / cycles
+
+
+def cycles_per_second(board, cycles: int = CYCLES) -> float:
+    start = time.perf_counter()
+    board.run(cycles)
+    return cycles / (time.perf_counter() - start)
+
+
+def main():
+    for name, nets in (('lambdas', False), ('nets', True)):
+        board, devices = inverter_board(nets=nets)
+        calls = calls_per_cycle(board)
+        rate = cycles_per_second(board)
+        assert devices['latch'].q == 0b00001111
+        print(f"{name:8}: {calls:6.1f} calls/cycle {rate:12,.0f} cycles/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+# Benchmark of the optimizer: scans per second of a program with redundant
+# instructions, before and after optimization, on the board with a
+# ProgramCounter and compiled.
+# Run from the repository root: python -m benchmarks.bench_optimizer
+
+import time
+
+from assembler import assemble
+from benchmarks.boards import scan_board
+from compiler import compile_program
+from optimizer import optimize
+
+SCANS = 2_000
+
+# A generated style control program: every rung reloads RR and ends with a
+# filler NOP, and input 7 is tied high.
+SOURCE = '''
+    IEN 7
+    OEN 7
+    LD 0
+    AND 1
+    STO 0
+    NOPO
+    LD 2
+    LD 3
+    OR 4
+    STOC 1
+    NOPO
+    ORC 7
+    SKZ
+    LD 5
+    LD 6
+    STO 2
+'''
+
+
+def rates(contents) -> tuple[float, float]:
+    board, _ = scan_board(contents)
+    board_rate = board.scan(SCANS).scans_per_second
+    program = compile_program(contents)
+    start = time.perf_counter()
+    program.run(0b10110101, scans=SCANS * 20)
+    return board_rate, SCANS * 20 / (time.perf_counter() - start)
+
+
+def main():
+    contents = assemble(SOURCE)
+    optimized, report = optimize(contents, constant_inputs={7: True})
+    board_rate, compiled_rate = rates(contents)
+    optimized_board_rate, optimized_compiled_rate = rates(optimized)
+    print(report)
+    print(f"board:     {board_rate:10,.0f} -> {optimized_board_rate:10,.0f} scans/s"
+          f" ({optimized_board_rate / board_rate:.2f}x)")
+    print(f"compiled:  {compiled_rate:10,.0f} -> {optimized_compiled_rate:10,.0f} scans/s"
+          f" ({optimized_compiled_rate / compiled_rate:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+# Benchmark of ROM images: the time and the memory allocated to create a ROM
+# from an image file of increasing size, read into a list for Rom(contents)
+# and memory mapped with Rom.from_file, and the read speed of both.
+# Run from the repository root: python -m benchmarks.bench_rom
+
+import os
+import tempfile
+import time
+import timeit
+import tracemalloc
+from array import array
+
+from rom import Rom
+
+ADDRESS_BITS = (16, 20, 24)
+LIST_ADDRESS_BITS = 20  # the largest image read into a list
+
+
+def from_list(path: str, address_bits: int) -> Rom:
+    with open(path, 'rb') as file:
+        contents = array('H', file.read()).tolist()
+    return Rom(data_bits=16, address_bits=address_bits, contents=contents)
+
+
+def measure(create) -> tuple[float, int, Rom]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    rom = create()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, rom
+
+
+def read_time(rom: Rom) -> float:
+    address = 12345
+    rom.connect_address_input(lambda: address)
+    return timeit.timeit(lambda: rom.data, number=200_000) / 200_000
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        for address_bits in ADDRESS_BITS:
+            path = os.path.join(directory, f'{address_bits}.bin')
+            with open(path, 'wb') as file:
+                file.write(os.urandom(2 << address_bits))
+            mapped_time, mapped_peak, rom = measure(lambda: Rom.from_file(path, data_bits=16))
+            print(f"{1 << address_bits:>10,} words  from_file: {mapped_time * 1e3:8.2f} ms,"
+                  f" {mapped_peak:>13,} bytes, read {read_time(rom) * 1e9:5.0f} ns")
+            del rom
+            if address_bits <= LIST_ADDRESS_BITS:
+                list_time, list_peak, rom = measure(lambda: from_list(path, address_bits))
+                print(f"{'':>10}        contents:  {list_time * 1e3:8.2f} ms,"
+                      f" {list_peak:>13,} bytes, read {read_time(rom) * 1e9:5.0f} ns")
+                del rom
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
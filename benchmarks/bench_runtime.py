@@ -0,0 +1,40 @@
+# Benchmark of the real-time runtime: runs the inverter board with a
+# ProgramCounter as a soft PLC for a while at a number of scan periods, with
+# queue adapters for the i/o, and reports the latency, jitter, overruns and
+# dropped periods, to find the shortest period a machine can hold.
+# Run from the repository root: python -m benchmarks.bench_runtime
+
+import asyncio
+
+from benchmarks.boards import scan_board
+from runtime import QueueInput, QueueOutput, ScanRuntime
+
+PERIODS = (0.010, 0.002, 0.0005, 0.0001)
+DURATION = 1.0
+
+
+async def run(period: float):
+    board, devices = scan_board()
+    inputs, outputs = asyncio.Queue(), asyncio.Queue()
+    runtime = ScanRuntime(board, period, outputs=lambda: devices['latch'].q,
+                          input_adapter=QueueInput(inputs), output_adapter=QueueOutput(outputs))
+    devices['selector'].connect_data_inputs(runtime.input_image)
+    inputs.put_nowait(0b11110000)
+    statistics = await runtime.run(duration=DURATION)
+    assert devices['latch'].q == 0b00001111
+    return statistics
+
+
+def main():
+    print(f"{'period ms':>9} {'scans':>7} {'batches':>7} {'overruns':>8} {'dropped':>7}"
+          f" {'latency p99 ms':>14} {'jitter p50 ms':>13} {'jitter p99 ms':>13}")
+    for period in PERIODS:
+        statistics = asyncio.run(run(period))
+        print(f"{period * 1e3:9g} {statistics.scans:7} {statistics.batches:7}"
+              f" {statistics.overruns:8} {statistics.dropped:7}"
+              f" {statistics.latency['p99'] * 1e3:14.3f} {statistics.jitter['p50'] * 1e3:13.3f}"
+              f" {statistics.jitter['p99'] * 1e3:13.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+# Benchmark of PLC scans: scans per second of the inverter program on the
+# board with a ProgramCounter (Board.scan), against the board with a plain
+# Counter run for the same number of cycles, and the compiled program.
+# Run from the repository root: python -m benchmarks.bench_scan
+
+import time
+
+from benchmarks.boards import INVERTER_PROGRAM, inverter_board, scan_board
+from compiler import compile_program
+
+SCANS = 5_000
+
+
+def main():
+    board, devices = scan_board()
+    result = board.scan(SCANS)
+    assert devices['latch'].q == 0b00001111
+
+    board, _ = inverter_board()
+    start = time.perf_counter()
+    board.run(SCANS * len(INVERTER_PROGRAM))
+    counter_rate = SCANS / (time.perf_counter() - start)
+
+    program = compile_program(INVERTER_PROGRAM)
+    start = time.perf_counter()
+    program.run(0b11110000, scans=SCANS * 10)
+    compiled_rate = SCANS * 10 / (time.perf_counter() - start)
+
+    print(f"scan cycle:                {result.cycles_per_scan:10.0f} clock cycles")
+    print(f"Board.scan:                {result.scans_per_second:10,.0f} scans/s")
+    print(f"Board.run with a Counter:  {counter_rate:10,.0f} scans/s")
+    print(f"compiled program:          {compiled_rate:10,.0f} scans/s")
+
+
+if __name__ == '__main__':
+    main()
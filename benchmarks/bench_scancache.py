@@ -0,0 +1,38 @@
+# Benchmark of the scan cache: scans per second of the inverter board and of
+# the wide PLC board with a ProgramCounter, without and with the scan cache,
+# with inputs that change every `SCANS_PER_CHANGE` scans.
+# Run from the repository root: python -m benchmarks.bench_scancache
+
+import random
+
+from benchmarks.boards import scan_board, wide_plc_board
+
+SCANS_PER_CHANGE = 100
+
+
+def run(build, scans: int, cached: bool, changes: int = 4) -> tuple[float, object]:
+    board, devices = build()
+    inputs = [0]
+    devices['selector'].connect_data_inputs(lambda: inputs[0])
+    cache = board.enable_scan_cache(inputs=lambda: inputs[0]) if cached else None
+    rng = random.Random(1)
+    values = [rng.getrandbits(128) for _ in range(changes)]
+    seconds = 0.0
+    for index in range(0, scans, SCANS_PER_CHANGE):
+        inputs[0] = values[index // SCANS_PER_CHANGE % changes]
+        seconds += board.scan(min(SCANS_PER_CHANGE, scans - index)).seconds
+    return scans / seconds, devices['latch'].q, cache
+
+
+def main():
+    for name, build, scans in (('inverter', scan_board, 20_000), ('wide_plc', wide_plc_board, 400)):
+        rate, q, _ = run(build, scans, False)
+        cached_rate, cached_q, cache = run(build, scans, True)
+        assert q == cached_q
+        statistics = cache.statistics()
+        print(f"{name:9} {rate:10,.0f} scans/s, cached {cached_rate:10,.0f} scans/s "
+              f"({cached_rate / rate:.1f}x), hit rate {statistics.hit_rate:.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+# Benchmark of the MC14512B input selector: reads of an input port connected
+# bit by bit (eight lambdas, as connect_data_inputs used to do) and in port
+# mode, and the inverter board, whose selector is in port mode.
+# Run from the repository root: python -m benchmarks.bench_selector
+
+import timeit
+
+from benchmarks.boards import inverter_board
+from mc14512b import MC14512B
+
+READS = 500_000
+
+
+def selector(port_mode: bool) -> MC14512B:
+    port = 0b10110101
+    address = 5
+    source = lambda: port
+    device = MC14512B()
+    device.connect_address_input(lambda: address)
+    if port_mode:
+        device.connect_data_inputs(source)
+    else:
+        for i in range(8):
+            device.connect_data_input(i, lambda i=i: bool((source() >> i) & 1))
+    return device
+
+
+def main():
+    times = {}
+    for port_mode in (False, True):
+        device = selector(port_mode)
+        times[port_mode] = timeit.timeit(lambda: device.data, number=READS) / READS
+        select_time = timeit.timeit(lambda: device.select(range(8)), number=READS // 8) / (READS // 8)
+        name = 'port mode' if port_mode else 'per input'
+        print(f"{name}:  data {times[port_mode] * 1e9:5.0f} ns,"
+              f" select(8 addresses) {select_time * 1e9:5.0f} ns")
+    print(f"speedup of a read: {times[False] / times[True]:.2f}x")
+    board, _ = inverter_board()
+    cycles = 100_000
+    board_time = timeit.timeit(lambda: board.run(cycles), number=1)
+    print(f"inverter board: {cycles / board_time:10,.0f} cycles/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+# Benchmark of the sweep runner: 4096 runs of the inverter board spec, one
+# per input byte and ROM variant, in this process and with an increasing
+# number of worker processes.
+# Run from the repository root: python -m benchmarks.bench_sweep
+
+import os
+import time
+
+from sweep import SweepRun, run_sweep
+from tests.boards import INVERTER_PROGRAM
+from tests.test_boardspec import inverter_spec
+
+CLOCKS = 160
+
+
+def sweep_runs() -> list[SweepRun]:
+    spec = inverter_spec()
+    # the second variant leaves the most significant bit untouched
+    specs = [spec, spec.configure('rom', contents=INVERTER_PROGRAM[2:])]
+    return [SweepRun(variant, CLOCKS, {'input_data': input_data})
+            for variant in specs for input_data in range(256)] * 8
+
+
+def timed(runs, workers: int) -> tuple[float, list]:
+    start = time.perf_counter()
+    results = [None] * len(runs)
+    for index, q in run_sweep(runs, 'latch.q', workers=workers):
+        results[index] = q
+    return time.perf_counter() - start, results
+
+
+def main():
+    runs = sweep_runs()
+    serial_time, expected = timed(runs, 0)
+    print(f"{len(runs)} runs of {CLOCKS} cycles, {os.cpu_count()} CPUs")
+    print(f"in process:  {serial_time:8.3f} s")
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        elapsed, results = timed(runs, workers)
+        assert results == expected
+        print(f"{workers:2} workers:  {elapsed:8.3f} s, {serial_time / elapsed:5.2f}x")
+        workers *= 2
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+# Benchmark of symbolic execution: checking that optimized programs are
+# equivalent to the original, symbolically and by enumerating all start
+# states, latches and inputs of a scan with the compiled program. The
+# enumeration is only possible for the 8 inputs of the default layout; the
+# wide PLC program with 128 inputs is only checked symbolically, after
+# padding each rung with a dead load for the optimizer to remove, and after
+# changing one instruction, which gives a counterexample.
+# Run from the repository root: python -m benchmarks.bench_symbolic
+
+import random
+import time
+
+from benchmarks.boards import WIDE_LAYOUT, random_program, wide_plc_program
+from compiler import compile_program
+from mc14500b import OPCODE
+from optimizer import optimize
+from symbolic import equivalent, sequentially_equivalent, symbolic_scan
+
+
+def padded(contents: list[int]) -> list[int]:
+    ''' The program with a dead LD before each rung '''
+    result = []
+    for word in contents:
+        opcode, _, address = WIDE_LAYOUT.decode(word)
+        if opcode in (int(OPCODE.LD), int(OPCODE.LDC)):
+            result.append(WIDE_LAYOUT.encode(OPCODE.LD, False, (address + 1) % 127))
+        result.append(word)
+    return result
+
+
+def exhaustive(contents: list[int], other: list[int]) -> bool:
+    scan, other_scan = compile_program(contents).scan, compile_program(other).scan
+    for state in range(32):
+        for latches in range(256):
+            for inputs in range(256):
+                if scan(inputs, latches, state)[0] != other_scan(inputs, latches, state)[0]:
+                    return False
+    return True
+
+
+def main():
+    rng = random.Random(25)
+    contents = random_program(rng, 64)
+    other = list(contents)
+    start = time.perf_counter()
+    result = exhaustive(contents, other)
+    exhaustive_time = time.perf_counter() - start
+    start = time.perf_counter()
+    assert equivalent(contents, other).equivalent == result
+    symbolic_time = time.perf_counter() - start
+    print(f"64 words, 8 inputs:     exhaustive {exhaustive_time:8.3f} s, "
+          f"symbolic {symbolic_time * 1000:8.2f} ms")
+
+    for rungs in (256, 1024):
+        contents = padded(wide_plc_program(rungs))
+        optimized, report = optimize(contents, WIDE_LAYOUT)
+        start = time.perf_counter()
+        scan = symbolic_scan(contents, WIDE_LAYOUT)
+        scan_time = time.perf_counter() - start
+        start = time.perf_counter()
+        assert sequentially_equivalent(contents, optimized, WIDE_LAYOUT)
+        check_time = time.perf_counter() - start
+        changed = list(optimized)
+        changed[-2] ^= 1    # the input of the last instruction before the store
+        start = time.perf_counter()
+        assert not sequentially_equivalent(contents, changed, WIDE_LAYOUT)
+        counterexample_time = time.perf_counter() - start
+        print(f"{len(contents):5} words, 128 inputs: symbolic scan {scan_time * 1000:7.2f} ms "
+              f"({len(scan.bdd)} nodes), equivalent to optimized ({report.optimized} words) "
+              f"{check_time * 1000:7.2f} ms, counterexample {counterexample_time * 1000:7.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
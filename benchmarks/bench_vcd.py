@@ -0,0 +1,52 @@
+# Benchmark of the VCD writer: the inverter board run with and without
+# recording, written to the null device, and the peak memory of recording
+# runs of increasing length.
+# Recording buffers the probe values of every clock edge and formats them
+# per chunk. On the inverter board, where the signals change on nearly every
+# edge, it takes about 37% of the run time of a recorded run (it took 55 to
+# 60% when each edge was formatted as it was sampled). What is left is
+# driving the board edge by edge, calling the probes and formatting the
+# changes, each a similar share.
+# Run from the repository root: python -m benchmarks.bench_vcd
+
+import os
+import time
+import tracemalloc
+
+from benchmarks.boards import inverter_board
+from vcd import VcdWriter
+
+CYCLES = 100_000
+
+
+def record(cycles: int) -> float:
+    board, devices = inverter_board()
+    with open(os.devnull, 'w') as file:
+        writer = VcdWriter(file)
+        writer.add_icu(devices['icu'])
+        writer.add_latch(devices['latch'])
+        start = time.perf_counter()
+        writer.run(board, cycles)
+        writer.close()
+        return time.perf_counter() - start
+
+
+def main():
+    board, _ = inverter_board()
+    start = time.perf_counter()
+    board.run(CYCLES)
+    plain = time.perf_counter() - start
+    recorded = record(CYCLES)
+    print(f"Board.run:         {CYCLES / plain:12,.0f} cycles/s")
+    print(f"with VCD output:   {CYCLES / recorded:12,.0f} cycles/s")
+    print(f"recording cost:    {(recorded - plain) / recorded:12.0%} of the run time")
+    for cycles in (10_000, 100_000, 1_000_000):
+        tracemalloc.start()
+        record(cycles)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"peak memory, {cycles:9,} cycles: {peak:10,} bytes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+# Reference boards and programs for the benchmarks. The boards and programs
+# of the tests, like the inverter board, come from tests/boards.py.
+# Each builder returns the Board together with a dict of its devices, so a
+# benchmark can inspect the outputs after running.
+
+import random
+
+from banks import LatchBank, SelectorBank
+from board import Board
+from layout import WordLayout
+from counter import Counter
+from mc14500b import MC14500B, OPCODE
+from mc14599b import MC14599B
+from net import Bus
+from program_counter import ProgramCounter
+from rom import Rom
+from tests.boards import INVERTER_PROGRAM, inverter_board, random_program, scan_board
+
+
+def counter_rom_board():
+    ''' The board of board1.py: a counter addressing a ROM '''
+    memory = Rom(data_bits=4, address_bits=4, contents=[15, 14, 13, 12])
+    counter = Counter(bits=4)
+    memory.connect_address_input(lambda: counter.count)
+    board = Board()
+    board.add_device(counter)
+    board.add_device(memory)
+    return board, {'counter': counter, 'rom': memory}
+
+
+# The layout of the wide PLC board: 128 i/o points
+WIDE_LAYOUT = WordLayout(opcode_shift=8, write_bit=7, address_bits=7)
+
+
+def wide_plc_program(rungs: int = 256, seed: int = 1) -> list[int]:
+    ''' A synthetic ladder program: each rung combines a few of the 128
+        inputs and stores the result in one of the 128 outputs.
+    '''
+    rng = random.Random(seed)
+    layout = WIDE_LAYOUT
+    program = [layout.encode(OPCODE.IEN, False, 127), layout.encode(OPCODE.OEN, False, 127)]
+    for _ in range(rungs):
+        program.append(layout.encode(rng.choice((OPCODE.LD, OPCODE.LDC)), False, rng.randrange(127)))
+        for _ in range(rng.randrange(1, 4)):
+            opcode = rng.choice((OPCODE.AND, OPCODE.ANDC, OPCODE.OR, OPCODE.ORC))
+            program.append(layout.encode(opcode, False, rng.randrange(127)))
+        program.append(layout.encode(rng.choice((OPCODE.STO, OPCODE.STOC)), True, rng.randrange(128)))
+    return program
+
+
+def wide_plc_board(contents: list[int] | None = None, inputs: int = (1 << 127) | 0x5A5A):
+    ''' A PLC board with 128 inputs and outputs, as a SelectorBank and a
+        LatchBank of 16 chips, running a program of up to 4096 words.
+        Input 127 is tied high, for the IEN and OEN at the start.
+    '''
+    contents = wide_plc_program() if contents is None else contents
+    layout = WIDE_LAYOUT
+    program_counter = ProgramCounter(bits=12, length=len(contents))
+    rom = Rom(data_bits=12, address_bits=12, contents=contents)
+    icu = MC14500B()
+    outputs = LatchBank(16)
+    selector = SelectorBank(16)
+
+    rom_bus = Bus(lambda: rom.data, 12)
+    rom.connect_address_input(lambda: program_counter.count)
+    program_counter.connect_jump_input(lambda: icu.jmp_flag)
+    program_counter.connect_return_input(lambda: icu.rtn_flag)
+    program_counter.connect_jump_address(rom_bus.field(0, layout.opcode_shift))
+    icu.connect_instruction_input(rom_bus.field(layout.opcode_shift, 4))
+    icu.connect_data_input(lambda: selector.data)
+    io_address = rom_bus.field(0, layout.address_bits)
+    outputs.connect_data_input(lambda: icu.data)
+    outputs.connect_address_input(io_address)
+    outputs.connect_chip_enable(lambda: True)
+    outputs.connect_write_input(rom_bus.field(layout.write_bit))
+    selector.connect_address_input(io_address)
+    selector.connect_data_inputs(lambda: inputs)
+
+    board = Board()
+    board.add_net(rom_bus)
+    board.add_device(icu)
+    board.add_device(rom)
+    board.add_device(program_counter)
+    board.add_device(outputs)
+    board.add_device(selector)
+    devices = {
+        'counter': program_counter,
+        'rom': rom,
+        'icu': icu,
+        'latch': outputs,
+        'selector': selector,
+    }
+    return board, devices
+
+
+def peripheral_board(event_driven: bool = False, idle_latches: int = 16, input_data: int = 0b11110000):
+    ''' The inverter board with a number of extra MC14599B status latches,
+        whose inputs come from a status register that doesn't change during
+        the run. The latches are added with their sensitivity lists, which
+        are used when the board is event driven.
+    '''
+    board, devices = inverter_board(input_data, board_class=lambda: Board(event_driven=event_driven))
+    status = {'enable': 0, 'address': 0, 'data': False}
+    status_address = lambda: status['address']
+    status_data = lambda: status['data']
+    always = lambda: True
+    latches = []
+    for i in range(idle_latches):
+        latch = MC14599B()
+        inputs = [lambda i=i: bool((status['enable'] >> i) & 1), status_address, always, status_data]
+        for connect, source in zip((latch.connect_chip_enable, latch.connect_address_input,
+                                    latch.connect_write_input, latch.connect_data_input), inputs):
+            connect(source)
+        board.add_device(latch, reads=inputs)
+        latches.append(latch)
+    devices['status'] = status
+    devices['status_latches'] = latches
+    return board, devices
+
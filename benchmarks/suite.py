@@ -0,0 +1,142 @@
+# Benchmark suite: runs the reference boards and reports, per board, the
+# clock cycles per second, the time per instruction and the memory of a
+# board, as a table or as JSON. With a baseline (the JSON output of an
+# earlier run), it compares the results, flags the regressions beyond the
+# threshold, and exits with status 1 if there are any.
+#
+# Reference boards:
+# - counter_rom: the counter and ROM of board1.py
+# - inverter: the board of test_execute_14500_from_rom
+# - wide_plc: a synthetic ladder program of about 1000 instructions, with
+#   128 inputs and outputs (benchmarks.boards.wide_plc_board)
+# Each board executes one instruction per clock cycle (none for
+# counter_rom). The rate is the best of a number of repeats.
+#
+# Run from the repository root:
+#     python -m benchmarks.suite --json results.json
+#     python -m benchmarks.suite --baseline results.json --threshold 0.1
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+from benchmarks.boards import counter_rom_board, inverter_board, wide_plc_board
+
+BOARDS = {
+    # name: (builder, cycles per repeat, executes instructions)
+    'counter_rom': (counter_rom_board, 200_000, False),
+    'inverter': (inverter_board, 100_000, True),
+    'wide_plc': (wide_plc_board, 50_000, True),
+}
+
+
+def board_bytes(builder, instances: int = 20) -> int:
+    ''' Bytes allocated per board, including its devices '''
+    builder()   # warm up caches and interned constants
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    boards = [builder() for _ in range(instances)]
+    end, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del boards
+    return (end - start) // instances
+
+
+def measure(name: str, repeat: int = 3, scale: float = 1.0) -> dict:
+    builder, cycles, instructions = BOARDS[name]
+    cycles = max(1, int(cycles * scale))
+    board, _ = builder()
+    board.run(100)  # warm up
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        board.run(cycles)
+        best = min(best, time.perf_counter() - start)
+    return {
+        'cycles': cycles,
+        'cycles_per_second': cycles / best,
+        'ns_per_instruction': best / cycles * 1e9 if instructions else None,
+        'bytes_per_board': board_bytes(builder),
+    }
+
+
+def run_suite(names=None, repeat: int = 3, scale: float = 1.0) -> dict:
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'results': {name: measure(name, repeat, scale) for name in names or BOARDS},
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float = 0.1) -> list[str]:
+    ''' The regressions of results against the baseline: a rate that is more
+        than `threshold` lower, or memory that is more than `threshold` higher.
+    '''
+    regressions = []
+    for name, result in results['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        rate, base_rate = result['cycles_per_second'], base['cycles_per_second']
+        if rate < base_rate * (1 - threshold):
+            regressions.append(f"{name}: {rate:,.0f} cycles/s, baseline {base_rate:,.0f}"
+                               f" ({rate / base_rate - 1:+.1%})")
+        size, base_size = result['bytes_per_board'], base['bytes_per_board']
+        if size > base_size * (1 + threshold):
+            regressions.append(f"{name}: {size:,} bytes per board, baseline {base_size:,}"
+                               f" ({size / base_size - 1:+.1%})")
+    return regressions
+
+
+def print_table(results: dict, baseline: dict | None = None):
+    print(f"{'board':12} {'cycles/s':>12} {'ns/instr':>10} {'bytes':>10} {'vs baseline':>12}")
+    for name, result in results['results'].items():
+        ns = result['ns_per_instruction']
+        change = ''
+        if baseline and name in baseline['results']:
+            change = f"{result['cycles_per_second'] / baseline['results'][name]['cycles_per_second'] - 1:+.1%}"
+        print(f"{name:12} {result['cycles_per_second']:12,.0f} {'-' if ns is None else f'{ns:,.0f}':>10}"
+              f" {result['bytes_per_board']:10,} {change:>12}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Run the reference boards and report their cycles per second, time per "
+                    "instruction and memory; with a baseline, flag the regressions.")
+    parser.add_argument('--board', action='append', choices=BOARDS,
+                        help='board to run, all boards by default')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--scale', type=float, default=1.0, help='scale the number of cycles')
+    parser.add_argument('--json', metavar='FILE', help="write the results as JSON, '-' for stdout")
+    parser.add_argument('--baseline', metavar='FILE', help='compare with the results in FILE')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='fraction of slowdown or memory growth that is a regression')
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.board, args.repeat, args.scale)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+    if args.json == '-':
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        print_table(results, baseline)
+        if args.json:
+            with open(args.json, 'w') as file:
+                json.dump(results, file, indent=2)
+    if baseline:
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,31 +1,512 @@
 # Board class manages the clocking of devices.
 # It assumes "duck typed" devices, having clock_fall and/or clock_rise methods.
 # Devices can be added to the board and will be clocked in each cycle.
+# The duck typing is resolved once, when a device is added: the bound
+# clock_fall, clock_rise and reset methods are stored in flat dispatch lists,
+# so clocking the board doesn't probe the devices for their methods.
+# The lists are bound again when a device is traced or untraced, as that
+# changes its clock methods (see tracing.py).
+# Nets (see net.py) added to the board are invalidated at the start of each
+# clock edge, so they are evaluated at most once per edge.
+#
+# Event driven mode: a device can be added with the list of signals it reads
+# (its sensitivity list). In event driven mode, the board evaluates each of
+# these signals once at the start of the falling edge, and skips both edges
+# of the devices of which none of the signals changed since the last cycle.
+# This is only valid
+# - for devices whose edges are idempotent for unchanged inputs, like the
+#   MC14599B latch; a counter or the MC14500B must be added without a
+#   sensitivity list, and are then clocked on every cycle.
+# - for signals that are stable during the falling edge, like for nets (see
+#   net.py): a latch reading the data output of the MC14500B must be added
+#   without a sensitivity list.
+# Event driven mode then gives the same results as clocking all devices, and
+# is faster for boards where many devices have idle inputs.
+#
+# Tracing: observers subscribed to the board are called with (cycle, record)
+# for the trace records of all its traceable devices, see tracing.py.
+#
+# Snapshots: Board.snapshot() returns the state of all devices implementing
+# snapshot(), as plain tuples and ints, so it can be pickled, and restored on
+# the same board or on another board with the same devices. Devices without
+# a snapshot method, like the MC14512B, have no state of their own.
+#
+# Scans: a board with a program counter device (a device with a `scans`
+# count, like ProgramCounter) can run a number of complete scans of its
+# program with Board.scan(). A program that never goes back to its start
+# would never complete a scan, so a scan fails after SCAN_CYCLES_PER_WORD
+# cycles per word of the program, unless max_cycles is given.
+#
+# Fast forward: a board with constant inputs is a finite state machine, so it
+# ends up repeating a sequence of states, e.g. once the latches are written
+# with the same values every scan. Board.fast_forward() runs in strides of
+# cycles, keeping the state of the board at the start of each stride. When a
+# state repeats, the board runs the same cycles since its first occurrence
+# again and again, so the whole periods left are skipped by just advancing
+# the cycle count. The state is the snapshot of each device, or its
+# state_key() when the snapshot holds counts that don't determine the future,
+# like the scan count of the ProgramCounter; such a device gets the skipped
+# periods through its advance(earlier snapshot, repeats) method. Inputs that
+# may change must be passed as `inputs`, a callable that is part of the state.
+#
+# Scan cache: Board.enable_scan_cache() makes Board.scan() look up the end
+# state of a scan from its start state and inputs, see scancache.py.
+#
+# Profiling: between Board.start_profiling() and Board.stop_profiling(), the
+# dispatch lists hold timed clock methods, see profiling.py.
+
+import time
+from typing import NamedTuple
+
+import tracing
+from net import Phase, connection, wiring
+from profiling import Profiler, ProfileReport
+from scancache import ScanCache
+
+SCAN_CYCLES_PER_WORD = 4    # default limit of Board.scan(), in cycles per program word
+
+
+def _bound_method(device, name: str):
+    ''' Return the bound method `name` of the device, or None if the device
+        doesn't implement it.
+    '''
+    method = getattr(device, name, None)
+    return method if callable(method) else None
+
+
+class _Scheduled:
+    ''' A device with its clock methods and sensitivity list '''
+    __slots__ = ('clock_fall', 'clock_rise', 'mask')
+
+    def __init__(self, clock_fall, clock_rise, mask):
+        self.clock_fall = clock_fall
+        self.clock_rise = clock_rise
+        self.mask = mask    # bits of the signals read, None to clock on every cycle
+
+
+class BoardSnapshot(NamedTuple):
+    cycle: int
+    devices: tuple  # the snapshot of each device, None for devices without state
+
+
+class ScanResult(NamedTuple):
+    scans: int
+    cycles: int     # clock cycles of all scans
+    seconds: float  # wall clock time of all scans
+
+    @property
+    def cycles_per_scan(self) -> float:
+        return self.cycles / self.scans if self.scans else 0.0
+
+    @property
+    def scans_per_second(self) -> float:
+        return self.scans / self.seconds if self.seconds else 0.0
+
+
+class FastForward(NamedTuple):
+    simulated: int  # cycles simulated
+    skipped: int    # cycles skipped
+    period: int | None  # cycles of the repeating period, None if none was found
 
 
 class Board:
-    def __init__(self):
+    def __init__(self, event_driven: bool = False):
+        self._event_driven = event_driven
         self._devices = []
+        self._reads = []        # sensitivity list of each device, or None
+        self._fall = []     # bound clock_fall methods, in device order
+        self._rise = []     # bound clock_rise methods, in device order
+        self._reset = []    # bound reset methods, in device order
+        self._snapshot = []     # bound snapshot methods of all devices, or None
+        self._restore = []      # bound restore methods of all devices, or None
+        self._program_counter = None    # the device counting the scans
+        self._schedule = []     # all clocked devices, for event driven mode
+        self._rising = []       # devices clocked on the last falling edge
+        self._signals = []      # signals of the sensitivity lists
+        self._signal_bits = {}  # signal bit in the device masks, by signal
+        self._signal_values = []    # signal values on the last falling edge
+        self._settled = False   # False to clock all devices on the next falling edge
+        self._generation = tracing.generation   # tracing generation of the bound methods
+        self._phase = Phase()   # phase count, invalidating the nets
+        self._cycle = 0         # number of clock cycles since creation or reset
+        self._observers = []    # trace observers of the board
+        self._profiler = None   # the Profiler while profiling
+        self._scan_cache = None     # the ScanCache, if enabled
+
+    @property
+    def event_driven(self) -> bool:
+        return self._event_driven
+
+    @property
+    def cycle(self) -> int:
+        ''' Number of clock cycles run since the board was created or reset '''
+        return self._cycle
 
     def reset(self):
-        for device in self._devices:
-            if hasattr(device, 'reset') and callable(device.reset):
-                device.reset()
+        if self._generation != tracing.generation:
+            self._bind()
+        for reset in self._reset:
+            reset()
+        self._settled = False
+        self._cycle = 0
 
     def run(self, clocks: int = 1):
+        if self._generation != tracing.generation:
+            self._bind()
+        if self._observers:
+            for _ in range(clocks):
+                self.clock_fall()
+                self.clock_rise()
+            return
+        phase = self._phase
+        if self._event_driven:
+            clock_fall_events = self._clock_fall_events
+            for _ in range(clocks):
+                clock_fall_events()
+                phase.count += 1
+                for clock_rise in self._rising:
+                    clock_rise()
+            phase.count += 1
+            self._rising = []
+            self._cycle += clocks
+            return
+        fall = self._fall
+        rise = self._rise
         for _ in range(clocks):
-            self.clock_fall()
-            self.clock_rise()
+            phase.count += 1
+            for clock_fall in fall:
+                clock_fall()
+            phase.count += 1
+            for clock_rise in rise:
+                clock_rise()
+        phase.count += 1
+        self._cycle += clocks
+
+    def scan(self, scans: int = 1, max_cycles: int | None = None) -> ScanResult:
+        ''' Run until the program counter completed a number of scans.
+            Raises RuntimeError if that takes more than max_cycles cycles,
+            by default SCAN_CYCLES_PER_WORD cycles per word of the program
+            per scan, for a program counter with a `length`.
+        '''
+        if self._program_counter is None:
+            raise RuntimeError("The board has no program counter")
+        if max_cycles is None:
+            length = getattr(self._program_counter, 'length', None)
+            if length is not None:
+                max_cycles = scans * SCAN_CYCLES_PER_WORD * length
+        start_cycle = self._cycle
+        start = time.perf_counter()
+        if self._scan_cache is not None and not (self._observers or self._profiler):
+            self._cached_scans(scans, max_cycles)
+        else:
+            self._scans(scans, max_cycles)
+        return ScanResult(scans, self._cycle - start_cycle, time.perf_counter() - start)
+
+    def _scans(self, scans: int, max_cycles: int | None):
+        program_counter = self._program_counter
+        end = program_counter.scans + scans
+        start_cycle = self._cycle
+        if self._observers or self._event_driven or self._generation != tracing.generation:
+            while program_counter.scans < end:
+                if max_cycles is not None and self._cycle - start_cycle >= max_cycles:
+                    raise RuntimeError(f"No {scans} scans in {max_cycles} cycles")
+                self.run(1)
+        else:
+            phase = self._phase
+            fall = self._fall
+            rise = self._rise
+            limit = -1 if max_cycles is None else max_cycles
+            cycles = 0
+            while program_counter.scans < end:
+                if cycles == limit:
+                    self._cycle += cycles
+                    raise RuntimeError(f"No {scans} scans in {max_cycles} cycles")
+                phase.count += 1
+                for clock_fall in fall:
+                    clock_fall()
+                phase.count += 1
+                for clock_rise in rise:
+                    clock_rise()
+                cycles += 1
+            phase.count += 1
+            self._cycle += cycles
 
-    def add_device(self, device):
+    def _cached_scans(self, scans: int, max_cycles: int | None):
+        ''' Run scans, restoring the end state of the scans in the cache '''
+        cache = self._scan_cache
+        program_counter = self._program_counter
+        state_keys, _ = self._state_keys('use a scan cache')
+        start_cycle = self._cycle
+        for _ in range(scans):
+            key = cache.key(tuple(state_key() if state_key else None for state_key in state_keys))
+            entry = cache.get(key)
+            left = None if max_cycles is None else max_cycles - (self._cycle - start_cycle)
+            if entry is not None and (left is None or entry[0] <= left):
+                cycles, devices = entry
+                done = program_counter.scans
+                self._restore_devices(devices)
+                program_counter.scans = done + 1
+                self._cycle += cycles
+                continue
+            cycle = self._cycle
+            try:
+                self._scans(1, left)
+            except RuntimeError:
+                raise RuntimeError(f"No {scans} scans in {max_cycles} cycles") from None
+            cache.put(key, self._cycle - cycle, self.snapshot().devices)
+
+    @property
+    def scan_cache(self) -> ScanCache | None:
+        return self._scan_cache
+
+    def enable_scan_cache(self, size: int = 1024, inputs=None) -> ScanCache:
+        ''' Cache up to `size` scans, see scancache.py. `inputs` returns the
+            inputs that may change.
+        '''
+        if self._program_counter is None:
+            raise RuntimeError("The board has no program counter")
+        self._state_keys('use a scan cache')
+        self._scan_cache = ScanCache(size, inputs, lambda: wiring(self._devices))
+        return self._scan_cache
+
+    def disable_scan_cache(self):
+        self._scan_cache = None
+
+    def _state_keys(self, purpose: str) -> tuple[list, list]:
+        ''' The bound state_key or snapshot methods of the devices, and the
+            bound advance methods with their device index. Raises ValueError
+            for a clocked device without a snapshot.
+        '''
+        state_keys = []
+        advances = []
+        for device, snapshot in zip(self._devices, self._snapshot):
+            state_key = _bound_method(device, 'state_key') or snapshot
+            if state_key is None and (_bound_method(device, 'clock_fall')
+                                      or _bound_method(device, 'clock_rise')):
+                raise ValueError(f"{type(device).__name__} has no snapshot, "
+                                 f"the board can't {purpose}")
+            state_keys.append(state_key)
+            advance = _bound_method(device, 'advance')
+            if advance:
+                advances.append((len(state_keys) - 1, advance))
+        return state_keys, advances
+
+    def fast_forward(self, clocks: int, stride: int = 256, inputs=None,
+                     max_states: int = 4096) -> FastForward:
+        ''' Run `clocks` cycles, skipping the repeats of a periodic state.
+            The state is compared every `stride` cycles, so a stride of a
+            multiple of the scan length finds a repeat after two scans.
+            `inputs` returns the inputs that may change, they are compared
+            with the state. At most max_states states are kept.
+        '''
+        if self._observers or self._profiler:
+            # the records of the skipped cycles can't be produced
+            self.run(clocks)
+            return FastForward(clocks, 0, None)
+        state_keys, advances = self._state_keys('fast forward')
+        start = self._cycle
+        end = start + clocks
+        seen = {}   # cycle and device snapshots of each state, by state
+        while self._cycle < end:
+            state = (tuple(state_key() if state_key else None for state_key in state_keys),
+                     inputs() if inputs else None)
+            earlier = seen.get(state)
+            if earlier is not None:
+                earlier_cycle, snapshots = earlier
+                period = self._cycle - earlier_cycle
+                repeats = (end - self._cycle) // period
+                for index, advance in advances:
+                    advance(snapshots[index], repeats)
+                self._cycle += repeats * period
+                self._phase.count += 1
+                self.run(end - self._cycle)
+                return FastForward(clocks - repeats * period, repeats * period, period)
+            if len(seen) < max_states:
+                seen[state] = (self._cycle, self.snapshot().devices if advances else None)
+            self.run(min(stride, end - self._cycle))
+        return FastForward(clocks, 0, None)
+
+    def add_device(self, device, reads=None):
+        ''' Add a device to the board. `reads` is the optional sensitivity
+            list for event driven mode: the callables or nets providing
+            every input of the device.
+        '''
+        if hasattr(device, 'scans'):
+            self._program_counter = device
         self._devices.append(device)
+        self._reads.append(None if reads is None else list(reads))
+        if self._observers and hasattr(device, 'subscribe'):
+            device.subscribe(self._trace)
+        if self._profiler:
+            self._profiler.attach(device, len(self._devices) - 1)
+        if self._scan_cache is not None:
+            self._scan_cache.clear()
+        self._bind()
+
+    def _bind(self):
+        ''' Store the bound methods of the devices in the dispatch lists '''
+        self._fall = []
+        self._rise = []
+        self._reset = []
+        self._snapshot = []
+        self._restore = []
+        self._schedule = []
+        profiler = self._profiler
+        for index, (device, reads) in enumerate(zip(self._devices, self._reads)):
+            clock_fall = _bound_method(device, 'clock_fall')
+            clock_rise = _bound_method(device, 'clock_rise')
+            if profiler:
+                if clock_fall:
+                    clock_fall = profiler.timed(device, index, 'clock_fall', clock_fall)
+                if clock_rise:
+                    clock_rise = profiler.timed(device, index, 'clock_rise', clock_rise)
+            reset = _bound_method(device, 'reset')
+            self._snapshot.append(_bound_method(device, 'snapshot'))
+            self._restore.append(_bound_method(device, 'restore'))
+            if clock_fall:
+                self._fall.append(clock_fall)
+            if clock_rise:
+                self._rise.append(clock_rise)
+            if reset:
+                self._reset.append(reset)
+            if clock_fall or clock_rise:
+                mask = None
+                if reads is not None:
+                    mask = 0
+                    for read in reads:
+                        mask |= self._signal_bit(read)
+                self._schedule.append(_Scheduled(clock_fall, clock_rise, mask))
+        self._rising = []
+        self._generation = tracing.generation
+
+    def _signal_bit(self, read) -> int:
+        ''' The bit of a signal in the device masks, adding it if it's new '''
+        if read not in self._signal_bits:
+            self._signal_bits[read] = 1 << len(self._signals)
+            self._signals.append(connection(read))
+            self._signal_values.append(None)
+            self._settled = False
+        return self._signal_bits[read]
+
+    def snapshot(self) -> BoardSnapshot:
+        ''' The state of all devices and the cycle count '''
+        return BoardSnapshot(self._cycle, tuple(snapshot() if snapshot else None
+                                                for snapshot in self._snapshot))
+
+    def restore(self, snapshot: BoardSnapshot):
+        ''' Restore the state of all devices from a snapshot of this board, or
+            of a board with the same devices.
+        '''
+        if len(snapshot.devices) != len(self._devices):
+            raise ValueError(f"Snapshot of {len(snapshot.devices)} devices, "
+                             f"the board has {len(self._devices)}")
+        self._restore_devices(snapshot.devices)
+        self._cycle = snapshot.cycle
+
+    def _restore_devices(self, devices: tuple):
+        for restore, device_snapshot in zip(self._restore, devices):
+            if restore:
+                restore(device_snapshot)
+        self._phase.count += 1      # the nets may hold values of before the restore
+        self._settled = False
+        self._rising = []
+
+    @property
+    def profiling(self) -> bool:
+        return self._profiler is not None
+
+    def start_profiling(self):
+        ''' Start counting the calls and time of the device edges and inputs,
+            and the instructions and latch writes, see profiling.py
+        '''
+        if self._profiler:
+            raise RuntimeError("The board is already profiling")
+        self._profiler = Profiler(self._cycle)
+        for index, device in enumerate(self._devices):
+            self._profiler.attach(device, index)
+        self._bind()
+
+    def profile_report(self) -> ProfileReport:
+        ''' The report of the profiling so far '''
+        if not self._profiler:
+            raise RuntimeError("The board is not profiling")
+        return self._profiler.report(self._cycle)
+
+    def stop_profiling(self) -> ProfileReport:
+        ''' Stop profiling, and return the report '''
+        report = self.profile_report()
+        self._profiler.detach()
+        self._profiler = None
+        self._bind()
+        return report
+
+    def add_net(self, net):
+        net.attach(self._phase)
+
+    def subscribe(self, observer):
+        ''' Call observer(cycle, record) for the trace records of the devices '''
+        if not self._observers:
+            for device in self._devices:
+                if hasattr(device, 'subscribe'):
+                    device.subscribe(self._trace)
+        self._observers.append(observer)
+
+    def unsubscribe(self, observer):
+        self._observers.remove(observer)
+        if not self._observers:
+            for device in self._devices:
+                if hasattr(device, 'unsubscribe'):
+                    device.unsubscribe(self._trace)
+
+    def _trace(self, record):
+        for observer in self._observers:
+            observer(self._cycle, record)
 
     def clock_fall(self):
-        for device in self._devices:
-            if hasattr(device, 'clock_fall') and callable(device.clock_fall):
-                device.clock_fall()
+        if self._generation != tracing.generation:
+            self._bind()
+        if self._event_driven:
+            self._clock_fall_events()
+            return
+        self._phase.count += 1
+        for clock_fall in self._fall:
+            clock_fall()
 
     def clock_rise(self):
-        for device in self._devices:
-            if hasattr(device, 'clock_rise') and callable(device.clock_rise):
-                device.clock_rise()
+        if self._generation != tracing.generation:
+            self._bind()
+        self._phase.count += 1
+        if self._event_driven:
+            rising, self._rising = self._rising, []
+        else:
+            rising = self._rise
+        for clock_rise in rising:
+            clock_rise()
+        self._phase.count += 1
+        self._cycle += 1
+
+    def _clock_fall_events(self):
+        ''' Falling edge in event driven mode: clock the devices whose inputs
+            changed, and collect them for the rising edge.
+        '''
+        self._phase.count += 1
+        values = self._signal_values
+        changed = 0
+        bit = 1
+        for index, read in enumerate(self._signals):
+            value = read()
+            if value != values[index]:
+                values[index] = value
+                changed |= bit
+            bit <<= 1
+        settled = self._settled
+        self._settled = True
+        self._rising = rising = []
+        for scheduled in self._schedule:
+            mask = scheduled.mask
+            if settled and mask is not None and not mask & changed:
+                continue
+            if scheduled.clock_fall:
+                scheduled.clock_fall()
+            if scheduled.clock_rise:
+                rising.append(scheduled.clock_rise)
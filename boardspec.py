@@ -0,0 +1,117 @@
+# BoardSpec is a declarative description of a board: the devices with their
+# constructor arguments, and the wiring of their inputs as Python expression
+# strings. Unlike a board wired with lambdas, a spec holds only strings,
+# numbers and lists, so it can be pickled and sent to another process, where
+# BoardSpec.build() creates the devices and the board.
+#
+# Device kinds are the names in DEVICE_CLASSES, or 'module:Class' for other
+# device classes. A wiring expression is evaluated each time the input is
+# read, with the devices and the build parameters as names:
+#
+#     spec = BoardSpec()
+#     spec.add_device('counter', 'Counter', bits=4)
+#     spec.add_device('rom', 'Rom', data_bits=8, address_bits=4, contents=program)
+#     spec.connect('rom', 'address_input', 'counter.count')
+#     spec.connect('selector', 'data_inputs', 'input_data')
+#     board, devices = spec.build(input_data=0b11110000)
+#
+# connect(device, 'address_input', ...) calls device.connect_address_input().
+# For inputs that take an input number, like MC14512B.connect_data_input,
+# the number is passed as `index`.
+
+import importlib
+
+from banks import LatchBank, SelectorBank
+from board import Board
+from counter import Counter
+from mc14500b import MC14500B
+from mc14512b import MC14512B
+from mc14599b import MC14599B
+from program_counter import ProgramCounter
+from ram import Ram
+from rom import Rom
+
+DEVICE_CLASSES = {
+    'Counter': Counter,
+    'Rom': Rom,
+    'MC14500B': MC14500B,
+    'MC14512B': MC14512B,
+    'MC14599B': MC14599B,
+    'ProgramCounter': ProgramCounter,
+    'Ram': Ram,
+    'LatchBank': LatchBank,
+    'SelectorBank': SelectorBank,
+}
+
+
+def device_class(kind: str):
+    ''' The device class of a kind: a name in DEVICE_CLASSES or 'module:Class' '''
+    if kind in DEVICE_CLASSES:
+        return DEVICE_CLASSES[kind]
+    module, _, name = kind.partition(':')
+    if not name:
+        raise ValueError(f"Unknown device kind {kind!r}")
+    return getattr(importlib.import_module(module), name)
+
+
+class BoardSpec:
+    def __init__(self, event_driven: bool = False):
+        self.event_driven = event_driven
+        self.devices = {}   # kind and constructor arguments by device name, in board order
+        self.reads = {}     # sensitivity list expressions by device name
+        self.connections = []   # (device name, pin, expression, index)
+
+    def add_device(self, name: str, kind: str, reads: list[str] | None = None, **arguments):
+        ''' Add a device, created as kind(**arguments). `reads` is the optional
+            sensitivity list for event driven boards, as expressions.
+        '''
+        if name in self.devices:
+            raise ValueError(f"Device {name!r} already exists")
+        self.devices[name] = (kind, arguments)
+        if reads is not None:
+            self.reads[name] = list(reads)
+
+    def configure(self, name: str, **arguments) -> 'BoardSpec':
+        ''' A copy of the spec, with other constructor arguments for a device,
+            e.g. spec.configure('rom', contents=other_program)
+        '''
+        if name not in self.devices:
+            raise ValueError(f"Unknown device {name!r}")
+        spec = BoardSpec(self.event_driven)
+        spec.devices = dict(self.devices)
+        kind, old_arguments = self.devices[name]
+        spec.devices[name] = (kind, {**old_arguments, **arguments})
+        spec.reads = dict(self.reads)
+        spec.connections = list(self.connections)
+        return spec
+
+    def connect(self, device: str, pin: str, expression: str, index: int | None = None):
+        ''' Connect a pin of a device, e.g. 'address_input', to an expression '''
+        if device not in self.devices:
+            raise ValueError(f"Unknown device {device!r}")
+        self.connections.append((device, pin, expression, index))
+
+    def build(self, **parameters) -> tuple[Board, dict]:
+        ''' Create the devices and the board; the parameters can be used by
+            name in the wiring expressions. Returns the board and a dict of
+            the devices by name.
+        '''
+        devices = {name: device_class(kind)(**arguments)
+                   for name, (kind, arguments) in self.devices.items()}
+        namespace = {**parameters, **devices}
+
+        def source(expression: str):
+            return eval(f'lambda: {expression}', namespace)
+
+        for device, pin, expression, index in self.connections:
+            connect = getattr(devices[device], f'connect_{pin}')
+            if index is None:
+                connect(source(expression))
+            else:
+                connect(index, source(expression))
+        board = Board(event_driven=self.event_driven)
+        for name, device in devices.items():
+            reads = self.reads.get(name)
+            board.add_device(device, reads=None if reads is None else
+                             [source(expression) for expression in reads])
+        return board, devices
@@ -0,0 +1,115 @@
+# The compiler turns a ROM image into a Python function that executes one
+# complete pass of the program (one wrap of the program counter) on plain
+# integers, without any devices, lambdas or board.
+#
+# The board that is compiled is the board of test_execute_14500_from_rom:
+# - a Counter as program counter, addressing the ROM from address 0
+# - the ROM words are split according to a WordLayout
+# - the MC14500B executes the opcode field, reading its data input from an
+#   MC14512B that selects bit `address & 7` of an input byte
+# - an MC14599B output latch, always enabled, writes the MC14500B data
+#   output to latch `address & 7` when the write bit of the word is set.
+#   The MC14500B is clocked before the latch, so the latch captures the
+#   result of the instruction of the same cycle.
+# The JMP and RTN flags are ignored, as the Counter does.
+#
+# The compiled function is called as
+#     latches, state = program.scan(inputs, latches, state)
+# where inputs is the input byte, latches the latch outputs (MC14599B.q) and
+# state the packed MC14500B state (MC14500B.state).
+# After a pass, the flag outputs are those of the last instruction, with the
+# WRITE flag cleared by the rising edge: this is program.flags.
+
+from layout import WordLayout
+from logic_unit import USES_DATA
+from mc14500b import OPCODE, RESET_STATE, flags_of
+
+# Statements executing an instruction; `d` is the (enabled) input data
+_STATEMENTS = {
+    OPCODE.LD: ['rr = d'],
+    OPCODE.LDC: ['rr = d ^ 1'],
+    OPCODE.AND: ['rr &= d'],
+    OPCODE.ANDC: ['rr &= d ^ 1'],
+    OPCODE.OR: ['rr |= d'],
+    OPCODE.ORC: ['rr |= d ^ 1'],
+    OPCODE.XNOR: ['rr ^= d ^ 1'],
+    OPCODE.IEN: ['ien = d'],
+    OPCODE.OEN: ['oen = d'],
+}
+
+
+def _instruction_statements(opcode: OPCODE, address: int) -> list[str]:
+    statements = []
+    if int(opcode) in USES_DATA:
+        statements.append(f'd = ien & (inputs >> {address & 7}) & 1')
+        statements.extend(_STATEMENTS[opcode])
+    if opcode == OPCODE.STOC:
+        statements.append('out = rr ^ 1')
+    else:
+        statements.append('out = rr')
+    return statements
+
+
+def _generate(contents: list[int], layout: WordLayout) -> str:
+    lines = [
+        'def scan(inputs, latches, state):',
+        '    rr = state & 1',
+        '    ien = (state >> 1) & 1',
+        '    oen = (state >> 2) & 1',
+        '    out = (state >> 3) & 1',
+        '    skz = (state >> 4) & 1',
+    ]
+    # The skip flag can only be set if the previous instruction was a SKZ,
+    # or, for the first instruction, by the state passed in.
+    skz_possible = True
+    for word_address, word in enumerate(contents):
+        opcode_number, write, address = layout.decode(word)
+        opcode = OPCODE(opcode_number)
+        lines.append(f'    # {word_address}: {opcode.name} {address}{" W" if write else ""}')
+        statements = _instruction_statements(opcode, address)
+        if skz_possible:
+            lines.append('    if skz and not rr:')
+            lines.append('        skz = 0')
+            lines.append('    else:')
+            lines.extend('        ' + statement for statement in statements)
+            lines.append(f'        skz = {int(opcode == OPCODE.SKZ)}')
+        else:
+            lines.extend('    ' + statement for statement in statements)
+            if opcode == OPCODE.SKZ:
+                lines.append('    skz = 1')
+        if write:
+            latch = address & 7
+            lines.append(f'    latches = (latches & {0xFF & ~(1 << latch)}) | ((out & oen) << {latch})')
+        skz_possible = opcode == OPCODE.SKZ
+    lines.append('    return latches, rr | (ien << 1) | (oen << 2) | (out << 3) | (skz << 4)')
+    return '\n'.join(lines) + '\n'
+
+
+class CompiledProgram:
+    def __init__(self, contents: list[int], layout: WordLayout | None = None):
+        if not contents:
+            raise ValueError("Can't compile an empty program")
+        self.layout = layout or WordLayout()
+        self.contents = list(contents)
+        self.source = _generate(self.contents, self.layout)
+        namespace = {}
+        exec(compile(self.source, '<mc14500b program>', 'exec'), namespace)
+        self.scan = namespace['scan']
+        # The flags only depend on the opcode of the last instruction
+        last_opcode = self.layout.opcode(self.contents[-1])
+        self.flags = flags_of(last_opcode)
+
+    def run(self, inputs: int, latches: int = 0, state: int = RESET_STATE,
+            scans: int = 1) -> tuple[int, int]:
+        ''' Run a number of passes of the program with constant inputs,
+            returning the latch outputs and the MC14500B state.
+        '''
+        scan = self.scan
+        for _ in range(scans):
+            latches, state = scan(inputs, latches, state)
+        return latches, state
+
+
+def compile_program(contents: list[int], layout: WordLayout | None = None) -> CompiledProgram:
+    ''' Compile a ROM image into a CompiledProgram '''
+    return CompiledProgram(contents, layout)
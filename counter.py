@@ -3,6 +3,8 @@
  
 
 class Counter:
+    __slots__ = ('_count', '_max_count')
+
     def __init__(self, bits: int):
         self._count: int = 0
         self._max_count = (1 << bits) - 1
@@ -20,3 +22,9 @@ class Counter:
         ''' Increment the counter, modulo its maximum value
         '''
         self._count = (self._count + 1) & self._max_count
+
+    def snapshot(self) -> int:
+        return self._count
+
+    def restore(self, snapshot: int):
+        self._count = snapshot
@@ -0,0 +1,295 @@
+# Fault simulation: stuck-at fault campaigns for the board of the compiler
+# (see compiler.py), simulating many faulty boards in one pass.
+#
+# A fault is a single stuck-at-0 or stuck-at-1 of
+# - a bit of a ROM word ('rom', word address, bit)
+# - an input of the selector ('input', input number)
+# - an output of the latch ('latch', latch number)
+# - an MC14500B register: RR, IEN or OEN ('state', STATE_* bit)
+# - an MC14500B flag output ('flag', FLAG_* bit), observed with observe_flags
+# A fault is detected when the latch outputs of the faulty board differ
+# from those of the fault-free board at the end of a test vector, or, with
+# observe_flags, when a flag output differs in any cycle.
+#
+# The boards are held as bitplanes, like in batch.py: one Python int per
+# register bit or latch, bit k for board k. Board 0 is the fault-free board,
+# the others have one fault each. Each instruction executes on all boards
+# with a few bitwise operations, whatever the number of boards. ROM faults
+# change the instruction of their board at one address, so an address with
+# ROM faults executes each distinct instruction on the boards that fetch it.
+# The other faults are masks forcing bits of the planes.
+#
+# The board has an input and a latch for each i/o address of the layout,
+# 1 << layout.address_bits: 8 for the default layout, like the MC14512B and
+# MC14599B, and 128 for a board with banks of them (see banks.py).
+#
+# The test vectors are input images, each applied for scans_per_vector scans,
+# continuing from the state the previous vector left. After each vector, the
+# boards of the detected faults are dropped from the planes, so later
+# vectors only simulate the faults that are still undetected, and the
+# campaign stops when all faults are detected.
+
+from typing import NamedTuple
+
+from layout import WordLayout
+from logic_unit import (IEN, JMP, NOP0, NOPF, OEN, RTN, SKZ, STO, STOC, USES_DATA,
+                        plane_functions)
+from mc14500b import (FLAG_F, FLAG_JMP, FLAG_O, FLAG_RTN, FLAG_WR, RESET_STATE, STATE_IEN,
+                      STATE_OEN, STATE_RR)
+
+_OPCODE_FLAGS = {JMP: FLAG_JMP, RTN: FLAG_RTN, NOP0: FLAG_O, NOPF: FLAG_F}
+_FLAGS = (FLAG_JMP, FLAG_RTN, FLAG_O, FLAG_F, FLAG_WR)
+_REGISTERS = {STATE_RR: 'RR', STATE_IEN: 'IEN', STATE_OEN: 'OEN'}
+_FLAG_NAMES = {FLAG_JMP: 'JMP', FLAG_RTN: 'RTN', FLAG_O: 'O', FLAG_F: 'F', FLAG_WR: 'WRITE'}
+
+
+class Fault(NamedTuple):
+    site: str       # 'rom', 'input', 'latch', 'state' or 'flag'
+    location: int   # word address, input or latch number, STATE_* or FLAG_* bit
+    bit: int        # bit of the ROM word, 0 for the other sites
+    value: int      # stuck-at value
+
+    def __str__(self):
+        if self.site == 'rom':
+            where = f"ROM[{self.location}] bit {self.bit}"
+        elif self.site == 'input':
+            where = f"input {self.location}"
+        elif self.site == 'latch':
+            where = f"latch Q{self.location}"
+        elif self.site == 'state':
+            where = f"register {_REGISTERS[self.location]}"
+        else:
+            where = f"flag {_FLAG_NAMES[self.location]}"
+        return f"{where} stuck-at-{self.value}"
+
+
+def all_faults(contents: list[int], layout: WordLayout | None = None,
+               flags: bool = False) -> list[Fault]:
+    ''' All single stuck-at faults of the board running `contents`. ROM
+        faults that don't change their word are left out, as they can't
+        be detected. The flag faults are added with `flags`.
+    '''
+    layout = layout or WordLayout()
+    points = 1 << layout.address_bits
+    faults = []
+    for address, word in enumerate(contents):
+        for bit in range(layout.opcode_shift + 4):
+            faults.append(Fault('rom', address, bit, 1 - ((word >> bit) & 1)))
+    for site, locations in (('input', range(points)), ('latch', range(points)),
+                            ('state', _REGISTERS), ('flag', _FLAGS if flags else ())):
+        for location in locations:
+            faults.extend(Fault(site, location, 0, value) for value in (0, 1))
+    return faults
+
+
+class FaultReport(NamedTuple):
+    faults: list[Fault]
+    detected: dict      # index of the vector detecting the fault, by fault
+    vectors: int        # number of test vectors
+
+    @property
+    def coverage(self) -> float:
+        return len(self.detected) / len(self.faults) if self.faults else 1.0
+
+    @property
+    def undetected(self) -> list[Fault]:
+        return [fault for fault in self.faults if fault not in self.detected]
+
+    def detected_per_vector(self) -> list[int]:
+        ''' The number of faults first detected by each vector '''
+        counts = [0] * self.vectors
+        for vector in self.detected.values():
+            counts[vector] += 1
+        return counts
+
+    def coverage_per_vector(self) -> list[float]:
+        ''' The fault coverage after each vector '''
+        coverage = []
+        detected = 0
+        for count in self.detected_per_vector():
+            detected += count
+            coverage.append(detected / len(self.faults) if self.faults else 1.0)
+        return coverage
+
+    def __str__(self):
+        return (f"{len(self.detected)} of {len(self.faults)} faults detected by "
+                f"{self.vectors} vectors ({self.coverage:.1%})")
+
+
+def _compact(plane: int, lanes: list[int]) -> int:
+    ''' The bits `lanes` of a plane, as bits 0, 1, 2, ... '''
+    bits = bin(plane)[:1:-1]    # least significant bit first
+    width = len(bits)
+    return int(''.join(bits[lane] if lane < width else '0' for lane in reversed(lanes)), 2)
+
+
+class _Campaign:
+    ''' The planes of the fault-free board and the boards of `faults` '''
+
+    def __init__(self, program: list[tuple[int, bool, int]], contents: list[int],
+                 layout: WordLayout, faults: list[Fault]):
+        self._program = program
+        self._contents = contents
+        self._layout = layout
+        self._points = 1 << layout.address_bits
+        self.faults = faults
+        self.lanes = len(faults) + 1
+        self.ones = (1 << self.lanes) - 1
+        self.rr = 0
+        self.ien = self.ones if RESET_STATE & STATE_IEN else 0
+        self.oen = self.ones if RESET_STATE & STATE_OEN else 0
+        self.out = 0
+        self.skz = 0
+        self.latches = [0] * self._points
+        self._masks()
+        self._force_state()
+
+    def _masks(self):
+        ''' The instructions at each address, and the forcing masks, of the faults '''
+        stuck = {}  # (site, location, value): lanes
+        rom = {}    # address: {word: lanes}
+        for lane, fault in enumerate(self.faults, start=1):
+            if fault.site == 'rom':
+                word = self._contents[fault.location]
+                word = (word & ~(1 << fault.bit)) | (fault.value << fault.bit)
+                words = rom.setdefault(fault.location, {})
+                words[word] = words.get(word, 0) | (1 << lane)
+            else:
+                key = (fault.site, fault.location, fault.value)
+                stuck[key] = stuck.get(key, 0) | (1 << lane)
+        self._variants = []
+        for address, (opcode, write, io_address) in enumerate(self._program):
+            variants = {}
+            faulty = 0
+            for word, lanes in rom.get(address, {}).items():
+                key = self._behavior(*self._layout.decode(word))
+                variants[key] = variants.get(key, 0) | lanes
+                faulty |= lanes
+            key = self._behavior(opcode, write, io_address)
+            variants[key] = variants.get(key, 0) | (self.ones & ~faulty)
+            self._variants.append([(*key, lanes) for key, lanes in variants.items() if lanes])
+        mask = lambda site, location, value: stuck.get((site, location, value), 0)
+        points = range(self._points)
+        self._inputs0 = [mask('input', i, 0) for i in points]
+        self._inputs1 = [mask('input', i, 1) for i in points]
+        self._latches0 = [mask('latch', i, 0) for i in points]
+        self._latches1 = [mask('latch', i, 1) for i in points]
+        self._state0 = {bit: mask('state', bit, 0) for bit in _REGISTERS}
+        self._state1 = {bit: mask('state', bit, 1) for bit in _REGISTERS}
+        self._flags0 = {flag: mask('flag', flag, 0) for flag in _FLAGS}
+        self._flags1 = {flag: mask('flag', flag, 1) for flag in _FLAGS}
+
+    @staticmethod
+    def _behavior(opcode: int, write: bool, address: int) -> tuple[int, bool, int]:
+        ''' The instruction, with the address cleared if it has no effect '''
+        return opcode, write, address if write or opcode in USES_DATA else 0
+
+    def _force_state(self):
+        state0, state1 = self._state0, self._state1
+        self.rr = (self.rr & ~state0[STATE_RR]) | state1[STATE_RR]
+        self.ien = (self.ien & ~state0[STATE_IEN]) | state1[STATE_IEN]
+        self.oen = (self.oen & ~state0[STATE_OEN]) | state1[STATE_OEN]
+
+    def run_vector(self, vector: int, cycles: int, observe_flags: bool) -> int:
+        ''' Run a test vector, returning the lanes of the detected faults '''
+        ones = self.ones
+        inputs = [((ones if (vector >> i) & 1 else 0) & ~self._inputs0[i]) | self._inputs1[i]
+                  for i in range(self._points)]
+        latches = self.latches
+        state0, state1 = self._state0, self._state1
+        rr0, rr1 = state0[STATE_RR], state1[STATE_RR]
+        ien0, ien1 = state0[STATE_IEN], state1[STATE_IEN]
+        oen0, oen1 = state0[STATE_OEN], state1[STATE_OEN]
+        rr, ien, oen, out, skz = self.rr, self.ien, self.oen, self.out, self.skz
+        functions = plane_functions(ones)
+        detected = 0
+        length = len(self._variants)
+        for cycle in range(cycles):
+            new_skz = 0
+            flags = {}
+            for opcode, write, address, lanes in self._variants[cycle % length]:
+                if observe_flags:
+                    flag = _OPCODE_FLAGS.get(opcode)
+                    if flag:
+                        flags[flag] = flags.get(flag, 0) | lanes
+                    elif opcode == STO or opcode == STOC:
+                        flags[FLAG_WR] = flags.get(FLAG_WR, 0) | (lanes & oen)
+                # lanes that execute the instruction, the others skip it
+                run = lanes & ~(skz & ~rr)
+                if opcode == STOC:
+                    new_out = ~rr
+                else:
+                    if opcode in USES_DATA:
+                        data = ien & inputs[address]
+                        if opcode == IEN:
+                            ien = (ien & ~run) | (data & run)
+                        elif opcode == OEN:
+                            oen = (oen & ~run) | (data & run)
+                        else:
+                            rr = (rr & ~run) | (functions[opcode](rr, data) & run)
+                    new_out = rr
+                out = (out & ~run) | (new_out & run)
+                if opcode == SKZ:
+                    new_skz |= run
+                if write:
+                    latches[address] = (latches[address] & ~lanes) | (out & oen & lanes)
+            skz = new_skz
+            rr = (rr & ~rr0) | rr1
+            ien = (ien & ~ien0) | ien1
+            oen = (oen & ~oen0) | oen1
+            if observe_flags:
+                for flag in _FLAGS:
+                    plane = (flags.get(flag, 0) & ~self._flags0[flag]) | self._flags1[flag]
+                    detected |= plane ^ (ones if plane & 1 else 0)
+        self.rr, self.ien, self.oen, self.out, self.skz = rr, ien, oen, out, skz
+        for i in range(self._points):
+            plane = (latches[i] & ~self._latches0[i]) | self._latches1[i]
+            detected |= plane ^ (ones if plane & 1 else 0)
+        return detected & ones & ~1
+
+    def drop(self, detected: int):
+        ''' Remove the boards of the detected faults '''
+        lanes = [lane for lane in range(self.lanes) if not (detected >> lane) & 1]
+        self.faults = [self.faults[lane - 1] for lane in lanes[1:]]
+        self.lanes = len(lanes)
+        self.ones = (1 << self.lanes) - 1
+        self.rr, self.ien, self.oen, self.out, self.skz = (
+            _compact(plane, lanes) for plane in (self.rr, self.ien, self.oen, self.out, self.skz))
+        self.latches = [_compact(plane, lanes) for plane in self.latches]
+        self._masks()
+
+
+def simulate_faults(contents: list[int], vectors, faults: list[Fault] | None = None,
+                    layout: WordLayout | None = None, scans_per_vector: int = 1,
+                    observe_flags: bool = False, lanes_per_pass: int | None = None) -> FaultReport:
+    ''' Run the test vectors on the fault-free board and the boards with
+        one fault each, from reset, and report the vector detecting each
+        fault. The faults default to all_faults(contents, layout,
+        observe_flags). With lanes_per_pass, the faults are simulated in
+        passes of at most that many boards.
+    '''
+    if not contents:
+        raise ValueError("Can't simulate an empty program")
+    layout = layout or WordLayout()
+    vectors = list(vectors)
+    if faults is None:
+        faults = all_faults(contents, layout, observe_flags)
+    faults = list(faults)
+    program = [layout.decode(word) for word in contents]
+    cycles = scans_per_vector * len(contents)
+    per_pass = (lanes_per_pass - 1) if lanes_per_pass else len(faults) or 1
+    if per_pass < 1:
+        raise ValueError("A pass needs at least 2 lanes")
+    detected = {}
+    for start in range(0, len(faults), per_pass):
+        campaign = _Campaign(program, contents, layout, faults[start:start + per_pass])
+        for index, vector in enumerate(vectors):
+            lanes = campaign.run_vector(vector, cycles, observe_flags)
+            if lanes:
+                for lane in range(1, campaign.lanes):
+                    if (lanes >> lane) & 1:
+                        detected.setdefault(campaign.faults[lane - 1], index)
+                campaign.drop(lanes)
+                if not campaign.faults:
+                    break
+    return FaultReport(faults, detected, len(vectors))
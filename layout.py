@@ -0,0 +1,52 @@
+# WordLayout describes how a program word (ROM data) is wired to the
+# devices of a board.
+# The default is the convention of the test boards: the opcode in bits 4..7,
+# the write enable of the output latch in bit 3 and the i/o address in
+# bits 0..2.
+# The jump address of a JMP instruction is in the bits below the opcode, the
+# write enable and i/o address bits (see program_counter.py).
+
+
+class WordLayout:
+    def __init__(self, opcode_shift: int = 4, write_bit: int = 3, address_bits: int = 3):
+        self.opcode_shift = opcode_shift
+        self.write_bit = write_bit
+        self.address_bits = address_bits
+        self.address_mask = (1 << address_bits) - 1
+        self.jump_mask = (1 << opcode_shift) - 1
+
+    def __repr__(self):
+        return (f"WordLayout(opcode_shift={self.opcode_shift}, write_bit={self.write_bit},"
+                f" address_bits={self.address_bits})")
+
+    def __eq__(self, other):
+        return isinstance(other, WordLayout) and repr(self) == repr(other)
+
+    def __hash__(self):
+        return hash(repr(self))
+
+    def opcode(self, word: int) -> int:
+        return (word >> self.opcode_shift) & 15
+
+    def write(self, word: int) -> bool:
+        return bool((word >> self.write_bit) & 1)
+
+    def address(self, word: int) -> int:
+        return word & self.address_mask
+
+    def jump_address(self, word: int) -> int:
+        return word & self.jump_mask
+
+    def decode(self, word: int) -> tuple[int, bool, int]:
+        ''' Split a program word in opcode, write enable and address '''
+        return self.opcode(word), self.write(word), self.address(word)
+
+    def encode(self, opcode, write_enable: bool, address: int) -> int:
+        ''' Build a program word from opcode, write enable and address '''
+        return (((int(opcode) & 15) << self.opcode_shift)
+                | ((int(write_enable) & 1) << self.write_bit)
+                | (address & self.address_mask))
+
+    def encode_jump(self, opcode, jump_address: int) -> int:
+        ''' Build a program word from opcode and jump address '''
+        return ((int(opcode) & 15) << self.opcode_shift) | (jump_address & self.jump_mask)
@@ -0,0 +1,62 @@
+# The logic unit of the MC14500B, for the modules that execute programs on
+# other values than the packed state of mc14500b.py: the bitplanes of many
+# boards in batch.py and faultsim.py, the known bits of optimizer.py and the
+# BDDs of symbolic.py.
+#
+# The opcodes are plain ints, as the inner loops of those modules compare
+# them. logic_functions() builds the functions computing the new RR of the
+# logic instructions, LD to XNOR, from the operations of the values they
+# work on; the other instructions are the same for any values, and each
+# module executes them on its own: IEN and OEN load the input data into
+# their register, STOC outputs the complement of RR, SKZ sets the skip flag.
+
+import operator
+
+from mc14500b import OPCODE, STATE_IEN, STATE_OEN, STATE_OUT, STATE_RR, STATE_SKZ
+
+NOP0 = int(OPCODE.NOP0)
+LD = int(OPCODE.LD)
+LDC = int(OPCODE.LDC)
+AND = int(OPCODE.AND)
+ANDC = int(OPCODE.ANDC)
+OR = int(OPCODE.OR)
+ORC = int(OPCODE.ORC)
+XNOR = int(OPCODE.XNOR)
+STO = int(OPCODE.STO)
+STOC = int(OPCODE.STOC)
+IEN = int(OPCODE.IEN)
+OEN = int(OPCODE.OEN)
+JMP = int(OPCODE.JMP)
+RTN = int(OPCODE.RTN)
+SKZ = int(OPCODE.SKZ)
+NOPF = int(OPCODE.NOPF)
+
+# The instructions that read the input data
+USES_DATA = frozenset({LD, LDC, AND, ANDC, OR, ORC, XNOR, IEN, OEN})
+
+# The MC14500B state bits, in the order of the registers of those modules
+STATE_BITS = (STATE_RR, STATE_IEN, STATE_OEN, STATE_OUT, STATE_SKZ)
+
+
+def logic_functions(not_, and_, or_, xnor) -> dict:
+    ''' The functions (rr, data) -> new RR of the logic instructions, by
+        opcode, for values with the given operations. `data` is the input
+        data, already gated by IEN.
+    '''
+    return {
+        LD: lambda rr, data: data,
+        LDC: lambda rr, data: not_(data),
+        AND: and_,
+        ANDC: lambda rr, data: and_(rr, not_(data)),
+        OR: or_,
+        ORC: lambda rr, data: or_(rr, not_(data)),
+        XNOR: xnor,
+    }
+
+
+def plane_functions(ones: int) -> dict:
+    ''' logic_functions() for bitplanes of the lanes in `ones`; with ones
+        equal to 1, for single bits
+    '''
+    return logic_functions(lambda value: ones & ~value, operator.and_, operator.or_,
+                           lambda a, b: ones & ~(a ^ b))
@@ -1,10 +1,13 @@
 from enum import Enum
 
+from net import connection
+from tracing import IcuRecord, Traceable
+
 # Class MC14500B mimics the behavior of the MC14500B device.
 # Inputs are connected by supplying lambda's that provide the signals.
 # Outputs are accessed via properties.
-
-TRACE_LEVEL = 0     # 0 to switch of tracing
+# Each executed instruction can be traced by subscribing an observer, see
+# tracing.py.
 
 class OPCODE(Enum):
     NOP0 = 0    # No Operation (activates o_flag)
@@ -28,82 +31,150 @@ class OPCODE(Enum):
         return self.value
 
 
-class MC14500B: 
+# The state of the ICU is packed in a small integer, so that an instruction
+# can be executed with a single table lookup (see _EXECUTE below).
+STATE_RR = 1     # result register
+STATE_IEN = 2    # input enable register
+STATE_OEN = 4    # output enable register
+STATE_OUT = 8    # output data (RR, or its complement for STOC)
+STATE_SKZ = 16   # skip flag, set by SKZ
+
+# The flag outputs are packed in a flag word.
+FLAG_JMP = 1
+FLAG_RTN = 2
+FLAG_O = 4
+FLAG_F = 8
+FLAG_WR = 16
+
+RESET_STATE = STATE_IEN | STATE_OEN
+
+
+def _reference_step(opcode: OPCODE, data: bool, state: int) -> tuple[int, int]:
+    ''' Execute one instruction on a packed state, returning the new state
+        and the flag word. This is the readable definition of the ICU
+        behavior, used to build the execution table.
+    '''
+    rr = bool(state & STATE_RR)
+    input_enable = bool(state & STATE_IEN)
+    output_enable = bool(state & STATE_OEN)
+    output_data = bool(state & STATE_OUT)
+    skz = bool(state & STATE_SKZ)
+    input_data = input_enable and data
+
+    flags = 0
+    if opcode == OPCODE.JMP:
+        flags |= FLAG_JMP
+    if opcode == OPCODE.RTN:
+        flags |= FLAG_RTN
+    if opcode == OPCODE.NOP0:
+        flags |= FLAG_O
+    if opcode == OPCODE.NOPF:
+        flags |= FLAG_F
+    if output_enable and opcode in {OPCODE.STO, OPCODE.STOC}:
+        flags |= FLAG_WR
+    if skz and not rr:
+        return state & ~STATE_SKZ, flags
+    skz = opcode == OPCODE.SKZ
+
+    match opcode:
+        case OPCODE.LD:
+            rr = input_data
+        case OPCODE.LDC:
+            rr = not input_data
+        case OPCODE.AND:
+            rr = rr and input_data
+        case OPCODE.ANDC:
+            rr = rr and (not input_data)
+        case OPCODE.OR:
+            rr = rr or input_data
+        case OPCODE.ORC:
+            rr = rr or (not input_data)
+        case OPCODE.XNOR:
+            rr = rr == input_data
+        case OPCODE.IEN:
+            input_enable = input_data
+        case OPCODE.OEN:
+            output_enable = input_data
+        case _:
+            pass
+    if opcode == OPCODE.STOC:
+        output_data = not rr
+    else:
+        output_data = rr
+    state = ((STATE_RR if rr else 0) | (STATE_IEN if input_enable else 0)
+             | (STATE_OEN if output_enable else 0) | (STATE_OUT if output_data else 0)
+             | (STATE_SKZ if skz else 0))
+    return state, flags
+
+
+def _execute_index(opcode: int, data: bool, state: int) -> int:
+    return (opcode << 6) | (int(data) << 5) | state
+
+
+# Execution table, indexed by (opcode, input data, state), giving the new
+# state and the flag word.
+_EXECUTE = [None] * (16 << 6)
+for _opcode in OPCODE:
+    for _data in (False, True):
+        for _state in range(32):
+            _EXECUTE[_execute_index(int(_opcode), _data, _state)] = \
+                _reference_step(_opcode, _data, _state)
+
+
+def flags_of(opcode: int) -> int:
+    ''' The flag outputs after executing `opcode`, once the rising edge
+        cleared WRITE. JMP, RTN, O and F only depend on the opcode.
+    '''
+    return _EXECUTE[_execute_index(int(opcode), False, RESET_STATE)][1] & ~FLAG_WR
+
+
+# Instruction bus values (ints or OPCODE members) to opcode numbers
+_OPCODE_NUMBER = {opcode: int(opcode) for opcode in OPCODE}
+_OPCODE_NUMBER.update({int(opcode): int(opcode) for opcode in OPCODE})
+
+
+class MC14500B(Traceable):
+    __slots__ = ('_state', '_flags', '_rr_out', '_opcode', '_input_data',
+                 '_get_instruction', '_get_data', '_observers', '_untraced_class')
+
     def __init__(self):
-        self._rr: bool = False # result register rr
+        self._state: int = RESET_STATE  # RR, IEN, OEN, output data and skip flag
+        self._flags: int = 0  # JMP, RTN, O, F and WRITE flag outputs
         self._rr_out: bool = False # output of the result register
-        self._opcode: OPCODE = OPCODE.NOP0
-        self._input_enable: bool = True
-        self._output_enable: bool = True
+        self._opcode: int = int(OPCODE.NOP0)
         self._input_data: bool = False
-        self._output_data: bool = False
-        self.jmp_flag: bool = False
-        self.rtn_flag: bool = False
-        self.skz_flag: bool = False
-        self.o_flag: bool = False
-        self.f_flag: bool = False
-        self.wr_flag: bool = False  # TODO make property
         self._get_instruction = None  # input connection for instruction bus
         self._get_data = None  # input connection for data bus
+        self._observers = None  # trace observers
 
     def reset(self):
+        observers = self._observers
         self.__init__()
+        self._observers = observers
 
     def clock_fall(self):
         ''' On falling clock edge, the MC14500B captures the input data
             and prepares to execute the next instruction.
         '''
         if self._get_instruction:
-            self._opcode = OPCODE(self._get_instruction())
+            instruction = self._get_instruction()
+            try:
+                self._opcode = _OPCODE_NUMBER[instruction]
+            except KeyError:
+                raise ValueError(f"{instruction!r} is not a valid OPCODE") from None
         if self._get_data:
-             self._input_data = self._input_enable and bool(self._get_data())
-
-        self.jmp_flag = self._opcode == OPCODE.JMP
-        self.rtn_flag = self._opcode == OPCODE.RTN
-        self.o_flag = self._opcode == OPCODE.NOP0
-        self.f_flag = self._opcode == OPCODE.NOPF
-        self.wr_flag = self._output_enable and self._opcode in {OPCODE.STO, OPCODE.STOC}
-        if self.skz_flag and not self._rr:
-            self.skz_flag = False
-            return
-        self.skz_flag = self._opcode == OPCODE.SKZ
-
-        match self._opcode:
-            case OPCODE.LD:
-                self._rr = self._input_data
-            case OPCODE.LDC:
-                self._rr = not self._input_data
-            case OPCODE.AND:
-                self._rr = self._rr and self._input_data
-            case OPCODE.ANDC:
-                self._rr = self._rr and (not self._input_data)
-            case OPCODE.OR:
-                self._rr = self._rr or self._input_data
-            case OPCODE.ORC:
-                self._rr = self._rr or (not self._input_data)
-            case OPCODE.XNOR:
-                self._rr = self._rr == self._input_data
-            case OPCODE.IEN:
-                self._input_enable = self._input_data
-            case OPCODE.OEN:
-                self._output_enable = self._input_data
-            case _:
-                pass
-        if self._opcode == OPCODE.STOC:
-            self._output_data = not self._rr
-        else:
-            self._output_data = self._rr
-        if TRACE_LEVEL > 0:
-            print(f"MC14500B: {self._opcode.name}, Input: {self._input_data}, Output: {self._output_data}")
+            self._input_data = (self._state & STATE_IEN) and bool(self._get_data())
 
+        self._state, self._flags = _EXECUTE[
+            (self._opcode << 6) | (self._input_data << 5) | self._state]
 
     def clock_rise(self):
         ''' On rising clock edge, the MC14500B executes the instruction
             that was captured on the falling edge.
             .... updates the RR output
         '''
-        self._rr_out = self._rr
-        self.wr_flag = False
+        self._rr_out = bool(self._state & STATE_RR)
+        self._flags &= ~FLAG_WR
 
     def execute(self):
         ''' Convenience function, mostly for testing
@@ -111,6 +182,14 @@ class MC14500B:
         self.clock_fall()
         self.clock_rise()
 
+    def snapshot(self) -> tuple:
+        ''' The internal state: packed state, flags, RR output, opcode and input data '''
+        return (self._state, self._flags, self._rr_out, self._opcode, self._input_data)
+
+    def restore(self, snapshot: tuple):
+        ''' Restore the internal state from a snapshot '''
+        self._state, self._flags, self._rr_out, self._opcode, self._input_data = snapshot
+
     @property
     def data(self) -> bool | None:
         ''' Different from the hardware, where input and output data are 
@@ -120,12 +199,74 @@ class MC14500B:
             by the data being optional: if the WRITE signal would be inactive
             in hardware, the data method returns None.
         '''
-        if self._output_enable:
-            return self._output_data
+        if self._state & STATE_OEN:
+            return bool(self._state & STATE_OUT)
         return None
 
+    @property
+    def state(self) -> int:
+        ''' The packed state: RR, IEN, OEN, output data and skip flag '''
+        return self._state
+
+    @property
+    def flags(self) -> int:
+        ''' The packed flag outputs: JMP, RTN, O, F and WRITE '''
+        return self._flags
+
+    @property
+    def opcode(self) -> OPCODE:
+        ''' The instruction captured on the last falling edge '''
+        return OPCODE(self._opcode)
+
+    def packed(self) -> int:
+        ''' The opcode, state and flags in one int, for probes sampling them
+            together: the opcode in bits 0..3, the state in bits 4..8 and
+            the flags in bits 9..13
+        '''
+        return self._opcode | (self._state << 4) | (self._flags << 9)
+
+    @property
+    def jmp_flag(self) -> bool:
+        return bool(self._flags & FLAG_JMP)
+
+    @property
+    def rtn_flag(self) -> bool:
+        return bool(self._flags & FLAG_RTN)
+
+    @property
+    def o_flag(self) -> bool:
+        return bool(self._flags & FLAG_O)
+
+    @property
+    def f_flag(self) -> bool:
+        return bool(self._flags & FLAG_F)
+
+    @property
+    def wr_flag(self) -> bool:
+        return bool(self._flags & FLAG_WR)
+
+    @property
+    def skz_flag(self) -> bool:
+        return bool(self._state & STATE_SKZ)
+
     def connect_instruction_input(self, get_instruction):
-        self._get_instruction = get_instruction
+        self._get_instruction = connection(get_instruction)
 
     def connect_data_input(self, get_data):
-        self._get_data = get_data
+        self._get_data = connection(get_data)
+
+
+class _TracedMC14500B(MC14500B):
+    ''' MC14500B with observers, see tracing.py '''
+    __slots__ = ()
+
+    def clock_fall(self):
+        skipped = self._state & STATE_SKZ and not self._state & STATE_RR
+        super().clock_fall()
+        record = IcuRecord(self, OPCODE(self._opcode), bool(self._state & STATE_RR),
+                           bool(self._input_data), self.data, self._flags, bool(skipped))
+        for observer in self._observers:
+            observer(record)
+
+
+MC14500B._traced_class = _TracedMC14500B
@@ -11,35 +11,66 @@ Limitations:
 - Disable input not implemented
 - Inhibit input not implemented
 - Inputs A, B, C are labeled "address", with A=a0, B=a1, C=a2
+
+The inputs are connected one by one (connect_data_input), or all at once to
+an 8-bit port (connect_data_inputs). In port mode, a read calls the port
+source once and selects the addressed bit, without a callable per input.
 '''
 
+from net import connection
+
+
 class MC14512B:
+    __slots__ = ('_get_input', '_get_address', '_get_port')
+
     def __init__(self):
         self._get_input = [None] * 8  # a callable (lambda) for each input
         self._get_address = None      # lambda connection to get the address
+        self._get_port = None         # callable for all inputs in port mode
 
     @property
     def data(self) -> bool:
-        if not self._get_address:
+        if self._get_address is None:
             raise RuntimeError("MC14512B address input not connected")
-        address = self._get_address() & 7
-        if not self._get_input[address] or not callable(self._get_input[address]):
-            raise RuntimeError(f"MC14512B input {address} not connected")
-        return bool(self._get_input[address]())
+        if self._get_port:
+            return bool((self._get_port() >> (self._get_address() & 7)) & 1)
+        get_input = self._get_input[self._get_address() & 7]
+        if not get_input:
+            raise RuntimeError(f"MC14512B input {self._get_address() & 7} not connected")
+        return bool(get_input())
+
+    def select(self, addresses) -> list[bool]:
+        ''' The outputs for a sequence of addresses, reading the inputs once '''
+        if self._get_port:
+            port = self._get_port()
+            return [bool((port >> (address & 7)) & 1) for address in addresses]
+        values = {}
+        for address in addresses:
+            if address & 7 not in values:
+                get_input = self._get_input[address & 7]
+                if not get_input:
+                    raise RuntimeError(f"MC14512B input {address & 7} not connected")
+                values[address & 7] = bool(get_input())
+        return [values[address & 7] for address in addresses]
 
     def connect_address_input(self, address_input):
         ''' Connect the address input to a callable that returns an integer value '''
-        self._get_address = address_input
+        self._get_address = connection(address_input)
 
     def connect_data_input(self, input_adr: int, data_input):
         ''' Connect the data input to a callable that returns a boolean value '''
         if input_adr < 0 or input_adr > 7:
             raise ValueError("Input address must be between 0 and 7")
-        self._get_input[input_adr] = data_input
+        if self._get_port:
+            # leave port mode, keeping the other inputs connected to the port
+            port = self._get_port
+            self._get_port = None
+            self._get_input = [lambda i=i: bool((port() >> i) & 1) for i in range(8)]
+        self._get_input[input_adr] = connection(data_input)
 
     def connect_data_inputs(self, data_inputs):
         ''' Connect all data inputs to a 8-bit wide source, a lambda that returns an int.
         '''
-        for i in range(8):
-            self.connect_data_input(i, lambda i=i: bool((data_inputs() >> i) & 1))
-    
+        self._get_port = connection(data_inputs)
+        self._get_input = [None] * 8
+
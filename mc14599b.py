@@ -15,11 +15,18 @@ To avoid writing on every clock cycle, the CE (chip enable) signal can be
 used - write takes place only if it CE input is active.
 '''
 
+from net import connection
+from tracing import LatchRecord, Traceable
+
 NUM_LATCHES = 8
 
-class MC14599B:
+class MC14599B(Traceable):
+    __slots__ = ('_latches', '_address', '_input_data', '_output_data', '_chip_enable',
+                 '_write', '_get_chip_enable', '_get_address', '_get_write', '_get_data',
+                 '_observers', '_untraced_class')
+
     def __init__(self):
-        self._latches = [False] * NUM_LATCHES
+        self._latches: int = 0  # latch outputs, bit i is latch i
         self._address: int = 0
         self._input_data: bool = False
         self._output_data: bool = False
@@ -29,6 +36,7 @@ class MC14599B:
         self._get_address = None
         self._get_write = None
         self._get_data = None
+        self._observers = None  # trace observers, see tracing.py
 
 
     @property
@@ -44,7 +52,7 @@ class MC14599B:
         ''' None means data bus is in write mode '''
         if self._write:
             return None
-        return self._latches[self._address]
+        return bool((self._latches >> self._address) & 1)
 
     @data.setter
     def data(self, value: bool):
@@ -62,9 +70,9 @@ class MC14599B:
         ''' Handle the falling edge of the clock signal by latching the inputs
         '''
         if self._get_chip_enable:
-            self.chip_enable = bool(self._get_chip_enable())
+            self._chip_enable = bool(self._get_chip_enable())
         if self._get_address:
-            self.address = self._get_address()
+            self._address = self._get_address() & (NUM_LATCHES - 1)
         if self._get_write:
             self._write = bool(self._get_write())
         if self._get_data:
@@ -74,7 +82,10 @@ class MC14599B:
         ''' On the rising edge of the clock signal, update the output
         '''
         if self._chip_enable and self._write:
-            self._latches[self._address] = self._input_data
+            if self._input_data:
+                self._latches |= 1 << self._address
+            else:
+                self._latches &= ~(1 << self._address)
 
     def execute(self):
         ''' Convenience function, mostly for testing
@@ -82,59 +93,79 @@ class MC14599B:
         self.clock_fall()
         self.clock_rise()
 
+    def snapshot(self) -> tuple:
+        ''' The internal state: the latches and the captured inputs '''
+        return (self._latches, self._address, self._input_data, self._output_data,
+                self._chip_enable, self._write)
+
+    def restore(self, snapshot: tuple):
+        ''' Restore the internal state from a snapshot '''
+        (self._latches, self._address, self._input_data, self._output_data,
+         self._chip_enable, self._write) = snapshot
+
     def connect_chip_enable(self, chip_enable):
         ''' Connect the chip enable input to a callable that returns a boolean value '''
-        self._get_chip_enable = chip_enable
+        self._get_chip_enable = connection(chip_enable)
 
     def connect_write_input(self, write_input):
         ''' Connect the write input to a callable that returns a boolean value '''
-        self._get_write = write_input
+        self._get_write = connection(write_input)
 
     def connect_address_input(self, address_input):
         ''' Connect the address input to a callable that returns an integer value '''
-        self._get_address = address_input
+        self._get_address = connection(address_input)
 
     def connect_data_input(self, data_input):
         ''' Connect the data input to a callable that returns a boolean value '''
-        self._get_data = data_input
+        self._get_data = connection(data_input)
 
     @property
     def q0(self) -> bool:
-        return self._latches[0]
+        return bool(self._latches & 1)
 
     @property
     def q1(self) -> bool:
-        return self._latches[1]
+        return bool(self._latches & 2)
 
     @property
     def q2(self) -> bool:
-        return self._latches[2]
+        return bool(self._latches & 4)
 
     @property
     def q3(self) -> bool:
-        return self._latches[3]
+        return bool(self._latches & 8)
 
     @property
     def q4(self) -> bool:
-        return self._latches[4]
+        return bool(self._latches & 16)
 
     @property
     def q5(self) -> bool:
-        return self._latches[5]
+        return bool(self._latches & 32)
 
     @property
     def q6(self) -> bool:
-        return self._latches[6]
+        return bool(self._latches & 64)
 
     @property
     def q7(self) -> bool:
-        return self._latches[7]
+        return bool(self._latches & 128)
     
     @property
     def q(self) -> int:
         ''' Return the latched values as an integer '''
-        value = 0
-        for i in range(NUM_LATCHES):
-            if self._latches[i]:
-                value |= (1 << i)
-        return value
\ No newline at end of file
+        return self._latches
+
+class _TracedMC14599B(MC14599B):
+    ''' MC14599B with observers, see tracing.py '''
+    __slots__ = ()
+
+    def clock_rise(self):
+        super().clock_rise()
+        if self._chip_enable and self._write:
+            record = LatchRecord(self, self._address, bool(self._input_data))
+            for observer in self._observers:
+                observer(record)
+
+
+MC14599B._traced_class = _TracedMC14599B
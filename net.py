@@ -0,0 +1,155 @@
+# Net and Bus are signals that can be connected to device inputs in place of
+# a plain lambda. A net evaluates its source at most once per clock phase,
+# and returns the cached value to every device that reads it in that phase.
+# This saves re-evaluating a signal that several devices are connected to,
+# like the ROM data output driving the instruction bus and the i/o address.
+#
+# Nets must be added to the board (Board.add_net). The board advances its
+# phase count at the start of each clock edge and at the end of a run, which
+# invalidates the cached values of all its nets at once. A net that isn't
+# added to a board isn't cached.
+# A net caches the first value that is read in a phase, so it should only
+# be used for signals that don't change during the phase in which they are
+# read: e.g. the ROM data, whose address (the counter) changes on the rising
+# edge, is stable during the falling edge. The data output of the MC14500B
+# changes during the falling edge, so it should not be read through a net.
+#
+# Devices store the bound read method of a net that is connected to them
+# (see connection() below): calling a bound method is cheaper than calling
+# an object with a __call__ method. connection() counts the connections in
+# `generation`, so caches of scan results can tell cheaply that some wiring
+# may have changed; wiring() then tells whether the wiring of their own board
+# did.
+
+
+generation = 0  # incremented for every connection, a change of the wiring of some board
+
+
+def connection(source):
+    ''' The callable a device stores for an input connected to `source`,
+        which is a plain callable (lambda) or a Net.
+    '''
+    global generation
+    generation += 1
+    if isinstance(source, Net):
+        return source.read
+    return source
+
+
+def input_slots(device) -> list[str]:
+    ''' The names of the slots holding the input connections of a device '''
+    return [name for cls in type(device).__mro__ for name in getattr(cls, '__slots__', ())
+            if name.startswith('_get_')]
+
+
+def wiring(devices) -> tuple:
+    ''' The input connections of the devices, equal as long as none of them
+        is connected again
+    '''
+    connections = []
+    for device in devices:
+        for slot in input_slots(device):
+            source = getattr(device, slot, None)
+            connections.append(tuple(source) if isinstance(source, list) else source)
+    return tuple(connections)
+
+
+class Phase:
+    ''' The phase count of a board, shared by its nets '''
+    __slots__ = ('count',)
+
+    def __init__(self):
+        self.count: int = 0
+
+
+class _NoPhase:
+    ''' Phase of a net that isn't added to a board: every read is a new phase '''
+    @property
+    def count(self):
+        return object()
+
+
+_NO_PHASE = _NoPhase()
+
+
+class Net:
+    __slots__ = ('_source', '_value', '_phase', '_clock')
+
+    def __init__(self, source):
+        self._source = source   # callable providing the value of the signal
+        self._value = None
+        self._phase = None      # phase count in which _value was evaluated
+        self._clock = _NO_PHASE
+
+    def read(self):
+        if self._phase == self._clock.count:
+            return self._value
+        self._value = value = self._source()
+        self._phase = self._clock.count
+        return value
+
+    __call__ = read
+
+    def attach(self, clock: Phase):
+        ''' Let the net be invalidated by the phase count of a board '''
+        self._clock = clock
+        self._phase = None
+
+
+class Bus(Net):
+    ''' A multi-bit net, that can be split in fields '''
+    __slots__ = ('_width', '_fields')
+
+    def __init__(self, source, width: int):
+        super().__init__(source)
+        self._width = width
+        self._fields = []
+
+    @property
+    def width(self) -> int:
+        return self._width
+
+    def read(self):
+        clock = self._clock.count
+        if self._phase == clock:
+            return self._value
+        self._value = value = self._source()
+        self._phase = clock
+        for field in self._fields:
+            field._value = (value >> field._shift) & field._mask
+            field._phase = clock
+        return value
+
+    __call__ = read
+
+    def attach(self, clock: Phase):
+        super().attach(clock)
+        for field in self._fields:
+            field.attach(clock)
+
+    def field(self, shift: int, width: int = 1) -> Net:
+        ''' A net for bits shift..shift+width-1 of the bus.
+            All fields are evaluated together with the bus.
+        '''
+        if shift < 0 or width < 1 or shift + width > self._width:
+            raise ValueError(f"Field {shift}+{width} doesn't fit a {self._width}-bit bus")
+        field = _Field(self, shift, (1 << width) - 1)
+        field.attach(self._clock)
+        self._fields.append(field)
+        return field
+
+
+class _Field(Net):
+    __slots__ = ('_shift', '_mask')
+
+    def __init__(self, bus: Bus, shift: int, mask: int):
+        super().__init__(bus.read)
+        self._shift = shift
+        self._mask = mask
+
+    def read(self):
+        if self._phase == self._clock.count:
+            return self._value
+        return (self._source() >> self._shift) & self._mask
+
+    __call__ = read
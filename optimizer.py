@@ -0,0 +1,252 @@
+# The optimizer removes instructions without observable effect from a ROM
+# program, so a scan executes fewer instructions.
+#
+# The board is the board of the compiler (see compiler.py): the program runs
+# from address 0 to the end and wraps around, starting from the reset state
+# of the MC14500B. What can be observed are the latch writes: the words with
+# the write bit set write the MC14500B output to the latch at their i/o
+# address, so these words are never removed, and the output and output
+# enable they write must be the same. With preserve_flags, the flag outputs
+# are observable as well: the instructions raising a flag are kept, so every
+# scan raises the same flags in the same order, relative to the latch writes.
+# The flags are not at the same cycles, as the scan gets shorter.
+#
+# The analysis works on the MC14500B state bits (RR, IEN, OEN, the output
+# and the skip flag):
+# - a forward pass finds the bits with a known value before each
+#   instruction, for all scans, and whether the output equals RR
+# - a backward pass finds the bits that are live after each instruction:
+#   bits that can be read before they are written again, wrapping around
+#   to the start of the program.
+# An instruction that is always executed can be removed when each state bit
+# it could change is not live after it. A SKZ that is sure to skip the next
+# instruction is removed together with that instruction. Instructions are
+# removed one at a time, analysing the program again after each removal.
+#
+# Inputs that are tied to a constant level can be passed as constant_inputs,
+# by i/o address. Programs with JMP or RTN are not optimized, as removing
+# instructions moves the jump addresses.
+
+from typing import NamedTuple
+
+from assembler import disassemble_word
+from layout import WordLayout
+from logic_unit import (IEN, JMP, LD, LDC, NOP0, NOPF, OEN, RTN, SKZ, STATE_BITS, STO, STOC,
+                        USES_DATA, plane_functions)
+from mc14500b import RESET_STATE, STATE_IEN, STATE_OEN, STATE_OUT, STATE_RR, STATE_SKZ
+
+_FLAG_OPCODES = {NOP0, NOPF, JMP, RTN}
+_JUMPS = {JMP, RTN}
+_LOGIC = plane_functions(1)     # the logic instructions on single bits
+
+
+class _Known(NamedTuple):
+    ''' Known state bits before an instruction: 0, 1 or None for unknown,
+        and whether the output is known to equal RR.
+    '''
+    rr: int | None
+    ien: int | None
+    oen: int | None
+    out: int | None
+    skz: int | None
+    out_is_rr: bool
+
+    def join(self, other: '_Known') -> '_Known':
+        return _Known(*(a if a == b else None for a, b in zip(self[:5], other[:5])),
+                      self.out_is_rr and other.out_is_rr)
+
+    @property
+    def may_skip(self) -> bool:
+        return self.skz != 0 and self.rr != 1
+
+    @property
+    def must_skip(self) -> bool:
+        return self.skz == 1 and self.rr == 0
+
+
+_RESET = _Known(*(int(bool(RESET_STATE & bit)) for bit in STATE_BITS), True)
+
+
+class OptimizationReport(NamedTuple):
+    original: int   # number of instructions before and after optimization
+    optimized: int
+    removed: list[tuple[int, str]]  # original address and source of the removed instructions
+
+    @property
+    def reduction(self) -> float:
+        ''' The fraction of the instructions that was removed '''
+        return 1 - self.optimized / self.original
+
+    def __str__(self):
+        return (f"{self.original} -> {self.optimized} instructions "
+                f"({self.reduction:.1%} fewer)")
+
+
+def _possible(bit: int | None) -> tuple[int, ...]:
+    return (0, 1) if bit is None else (bit,)
+
+
+def _new_rr(opcode: int, rr, d):
+    ''' The value of RR after an executed instruction, and whether it's
+        unchanged, for all values of the unknown bits
+    '''
+    function = _LOGIC.get(opcode)
+    if function is None:
+        return rr, True
+    results = [(old, function(old, data)) for old in _possible(rr) for data in _possible(d)]
+    new = {result for _, result in results}
+    return (new.pop() if len(new) == 1 else None), all(old == result for old, result in results)
+
+
+def _execute(opcode: int, address: int, known: _Known, constant_inputs: dict):
+    ''' The known state after executing an instruction, and the state bits
+        that it may change.
+    '''
+    d = None
+    if opcode in USES_DATA:
+        if known.ien == 0:
+            d = 0
+        elif known.ien == 1 and address in constant_inputs:
+            d = int(bool(constant_inputs[address]))
+    rr, rr_unchanged = _new_rr(opcode, known.rr, d)
+    ien, oen = known.ien, known.oen
+    changed = 0 if rr_unchanged else STATE_RR
+    if opcode == IEN:
+        ien = d
+        if not (known.ien == 0 or (d is not None and d == known.ien)):
+            changed |= STATE_IEN
+    elif opcode == OEN:
+        oen = d
+        if d is None or d != known.oen:
+            changed |= STATE_OEN
+    if opcode == STOC:
+        out = None if rr is None else 1 - rr
+        if out is None or out != known.out:
+            changed |= STATE_OUT
+    else:
+        out = rr
+        if not ((known.out_is_rr and rr_unchanged)
+                or (out is not None and out == known.out)):
+            changed |= STATE_OUT
+    skz = int(opcode == SKZ)
+    if skz != known.skz:
+        changed |= STATE_SKZ
+    return _Known(rr, ien, oen, out, skz, opcode != STOC), changed
+
+
+def _step(opcode: int, address: int, known: _Known, constant_inputs: dict) -> _Known:
+    ''' The known state after an instruction, executed or skipped '''
+    if known.must_skip:
+        return known._replace(skz=0)
+    executed, _ = _execute(opcode, address, known, constant_inputs)
+    if known.may_skip:
+        return executed.join(known._replace(skz=0))
+    return executed
+
+
+def _forward(program, constant_inputs) -> list[_Known]:
+    ''' The known state before each instruction, for all scans from reset '''
+    entry = _RESET
+    while True:
+        before = []
+        known = entry
+        for opcode, _, address in program:
+            before.append(known)
+            known = _step(opcode, address, known, constant_inputs)
+        new_entry = entry.join(known)
+        if new_entry == entry:
+            return before
+        entry = new_entry
+
+
+def _backward(program, before: list[_Known], preserve_flags: bool) -> list[int]:
+    ''' The state bits that are live after each instruction '''
+    reads = []
+    kills = []
+    for (opcode, write, _), known in zip(program, before):
+        read = 0
+        kill = STATE_SKZ
+        if known.may_skip:
+            read |= STATE_SKZ | STATE_RR
+        if not known.must_skip:
+            if opcode in USES_DATA:
+                read |= STATE_IEN
+            if opcode not in (LD, LDC):
+                read |= STATE_RR    # the operation, or the output
+            if not known.may_skip:
+                kill |= STATE_OUT
+                if opcode in (LD, LDC):
+                    kill |= STATE_RR
+                elif opcode == IEN:
+                    kill |= STATE_IEN
+                elif opcode == OEN:
+                    kill |= STATE_OEN
+        if preserve_flags and opcode in (STO, STOC):
+            read |= STATE_OEN   # the WRITE flag
+        reads.append(read)
+        kills.append(kill)
+    length = len(program)
+    live_after = [0] * length
+    live_at_start = 0   # live before the first instruction, so after the last one
+    while True:
+        live = live_at_start
+        for index in range(length - 1, -1, -1):
+            live_after[index] = live
+            if program[index][1]:
+                live |= STATE_OUT | STATE_OEN   # the latch write
+            live = reads[index] | (live & ~kills[index])
+        if live == live_at_start:
+            return live_after
+        live_at_start = live
+
+
+def _has_flag(opcode: int, known: _Known) -> bool:
+    return opcode in _FLAG_OPCODES or (opcode in (STO, STOC) and known.oen != 0)
+
+
+def _removable(program, constant_inputs, preserve_flags: bool) -> list[int]:
+    ''' The indices of the first instruction (or SKZ and skipped instruction)
+        that can be removed, or an empty list
+    '''
+    before = _forward(program, constant_inputs)
+    live_after = _backward(program, before, preserve_flags)
+    for index, ((opcode, write, address), known) in enumerate(zip(program, before)):
+        if write or known.may_skip or (preserve_flags and _has_flag(opcode, known)):
+            continue
+        _, changed = _execute(opcode, address, known, constant_inputs)
+        if not changed & live_after[index]:
+            return [index]
+        if opcode == SKZ and known.rr == 0 and index + 1 < len(program):
+            # the next instruction is skipped; together they only set the output to RR
+            skipped_opcode, skipped_write, _ = program[index + 1]
+            if skipped_write or (preserve_flags and _has_flag(skipped_opcode, before[index + 1])):
+                continue
+            if known.out_is_rr or known.out == 0 or not live_after[index + 1] & STATE_OUT:
+                return [index, index + 1]
+    return []
+
+
+def optimize(contents: list[int], layout: WordLayout | None = None, preserve_flags: bool = False,
+             constant_inputs: dict[int, bool] | None = None) -> tuple[list[int], OptimizationReport]:
+    ''' Remove the instructions without observable effect from a ROM image.
+        Returns the optimized image and a report of the removed instructions.
+    '''
+    if not contents:
+        raise ValueError("Can't optimize an empty program")
+    layout = layout or WordLayout()
+    constant_inputs = constant_inputs or {}
+    program = [layout.decode(word) for word in contents]
+    if any(opcode in _JUMPS for opcode, _, _ in program):
+        raise ValueError("Programs with JMP or RTN can't be optimized")
+    addresses = list(range(len(contents)))
+    removed = []
+    while len(program) > 1:
+        indices = _removable(program, constant_inputs, preserve_flags)
+        if not indices or len(indices) == len(program):
+            break
+        for index in reversed(indices):
+            removed.append((addresses[index], disassemble_word(contents[addresses[index]], layout)))
+            del program[index]
+            del addresses[index]
+    optimized = [contents[address] for address in addresses]
+    return optimized, OptimizationReport(len(contents), len(optimized), sorted(removed))
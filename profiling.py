@@ -0,0 +1,156 @@
+# Profiling of boards: where does the time of a clock cycle go?
+# Board.start_profiling() installs a Profiler on the board, and
+# Board.stop_profiling() removes it and returns a ProfileReport, holding
+# - the wall clock time and the number of calls of each device edge
+#   (clock_fall and clock_rise)
+# - the time and the number of calls of each input connection of the
+#   devices: the lambdas reading the ROM, a selector, a net. An edge time
+#   includes the time of the inputs read during the edge.
+# - the instructions executed by the MC14500B devices, by OPCODE, the
+#   instructions skipped by SKZ, the instructions raising the WRITE flag,
+#   and the writes committed to the latches.
+#
+# Like tracing, profiling costs nothing when it's off: the profiler wraps the
+# bound clock methods in the dispatch lists of the board, and the input
+# connections of the devices, with timing functions, and puts the originals
+# back when it stops. The instruction counts come from the trace records of
+# the devices (see tracing.py). The timing functions and the tracing make a
+# profiled board run several times slower, so the times are only meaningful
+# relative to each other.
+
+import time
+from collections import Counter
+from typing import NamedTuple
+
+from mc14500b import FLAG_WR
+from net import input_slots
+from tracing import IcuRecord, LatchRecord
+
+
+class TimeProfile(NamedTuple):
+    device: str     # device class and number on the board, e.g. 'MC14500B#0'
+    name: str       # the edge (clock_fall, clock_rise) or the input connection
+    calls: int
+    seconds: float
+
+    @property
+    def ns_per_call(self) -> float:
+        return self.seconds / self.calls * 1e9 if self.calls else 0.0
+
+
+class ProfileReport(NamedTuple):
+    cycles: int
+    seconds: float              # wall clock time of the profiled cycles
+    edges: list[TimeProfile]    # device edges, most time first
+    inputs: list[TimeProfile]   # device input connections, most time first
+    opcodes: Counter            # executed instructions by OPCODE, including the skipped ones
+    skipped: int                # instructions skipped by SKZ
+    write_flags: int            # instructions raising the WRITE flag
+    latch_writes: int           # writes committed to the latches
+
+    @property
+    def instructions(self) -> int:
+        return sum(self.opcodes.values())
+
+    @property
+    def skip_rate(self) -> float:
+        return self.skipped / self.instructions if self.instructions else 0.0
+
+    def __str__(self):
+        lines = [f"{self.cycles} cycles in {self.seconds:.3f} s"]
+        for title, profiles in (('edge', self.edges), ('input', self.inputs)):
+            if profiles:
+                lines.append(f"{'device':16} {title:14} {'calls':>10} {'seconds':>9} {'ns/call':>9}")
+                lines.extend(f"{profile.device:16} {profile.name:14} {profile.calls:10} "
+                             f"{profile.seconds:9.4f} {profile.ns_per_call:9.0f}"
+                             for profile in profiles)
+        if self.opcodes:
+            lines.append(', '.join(f"{opcode.name} {count}"
+                                   for opcode, count in self.opcodes.most_common()))
+            lines.append(f"skipped {self.skipped} ({self.skip_rate:.1%}), WRITE flags "
+                         f"{self.write_flags}, latch writes {self.latch_writes}")
+        return '\n'.join(lines)
+
+
+def _device_name(device, index: int) -> str:
+    cls = device.device_class if hasattr(device, 'subscribe') else type(device)
+    return f"{cls.__name__}#{index}"
+
+
+class Profiler:
+    ''' Collects the times and counts of a board, see Board.start_profiling() '''
+
+    def __init__(self, cycle: int):
+        self._start_cycle = cycle
+        self._start = time.perf_counter()
+        self._times = {}    # (device, name): [calls, seconds]
+        self._inputs = {}   # (device, slot): (original connection, timed connection)
+        self._traced = []   # devices subscribed to
+        self._opcodes = Counter()
+        self._skipped = 0
+        self._write_flags = 0
+        self._latch_writes = 0
+
+    def _stat(self, device: str, name: str) -> list:
+        stat = self._times.get((device, name))
+        if stat is None:
+            stat = self._times[device, name] = [0, 0.0]
+        return stat
+
+    def timed(self, device, index: int, name: str, method):
+        ''' The method, counting its calls and time '''
+        stat = self._stat(_device_name(device, index), name)
+        perf_counter = time.perf_counter
+
+        def timed_method():
+            start = perf_counter()
+            result = method()
+            stat[1] += perf_counter() - start
+            stat[0] += 1
+            return result
+        return timed_method
+
+    def attach(self, device, index: int):
+        ''' Time the input connections of a device, and count its instructions
+            and latch writes.
+        '''
+        for slot in input_slots(device):
+            connection = getattr(device, slot, None)
+            if callable(connection):
+                timed = self.timed(device, index, slot[len('_get_'):], connection)
+                setattr(device, slot, timed)
+                self._inputs[device, slot] = (connection, timed)
+        if hasattr(device, 'subscribe'):
+            device.subscribe(self._observe)
+            self._traced.append(device)
+
+    def detach(self):
+        ''' Put back the input connections, unless they were connected again '''
+        for (device, slot), (connection, timed) in self._inputs.items():
+            if getattr(device, slot) is timed:
+                setattr(device, slot, connection)
+        self._inputs = {}
+        for device in self._traced:
+            device.unsubscribe(self._observe)
+        self._traced = []
+
+    def _observe(self, record):
+        if isinstance(record, IcuRecord):
+            self._opcodes[record.opcode] += 1
+            self._skipped += record.skipped
+            if record.flags & FLAG_WR:
+                self._write_flags += 1
+        elif isinstance(record, LatchRecord):
+            self._latch_writes += 1
+
+    def report(self, cycle: int) -> ProfileReport:
+        edges = []
+        inputs = []
+        for (device, name), (calls, seconds) in self._times.items():
+            profiles = edges if name in ('clock_fall', 'clock_rise') else inputs
+            profiles.append(TimeProfile(device, name, calls, seconds))
+        edges.sort(key=lambda profile: -profile.seconds)
+        inputs.sort(key=lambda profile: -profile.seconds)
+        return ProfileReport(cycle - self._start_cycle, time.perf_counter() - self._start,
+                             edges, inputs, Counter(self._opcodes), self._skipped,
+                             self._write_flags, self._latch_writes)
@@ -0,0 +1,113 @@
+# ProgramCounter is the program counter of a PLC style board: a counter that
+# addresses the ROM, wraps around at the end of the program, and follows the
+# JMP and RTN flags of the MC14500B.
+# On the rising edge of the clock:
+# - when the jump input is active, the counter is loaded with the jump
+#   address, and the address of the next instruction is saved on a one level
+#   stack
+# - when the return input is active and an address was saved, the counter is
+#   loaded with the saved address, emptying the stack
+# - otherwise the counter is incremented. At the end of the program, at
+#   `length` or at the maximum count of the counter, it wraps around to 0.
+# Going back to address 0, by wrapping around, a jump or a return, completes
+# a scan of the program, so a program ending with JMP 0 scans as well.
+# The MC14500B raises its flags on the falling edge, so they can be connected
+# directly to the jump and return inputs. Note that this MC14500B model raises
+# the JMP flag for a JMP that is skipped by SKZ as well.
+
+from net import connection
+
+
+class ProgramCounter:
+    __slots__ = ('_count', '_max_count', '_end', '_stack', '_scans',
+                 '_get_jump', '_get_return', '_get_jump_address')
+
+    def __init__(self, bits: int, length: int | None = None):
+        self._max_count = (1 << bits) - 1
+        if length is not None and not 0 < length <= self._max_count + 1:
+            raise ValueError(f"Program length must be between 1 and {self._max_count + 1}")
+        self._end = length if length is not None else self._max_count + 1
+        self._count: int = 0
+        self._stack: int | None = None  # saved return address
+        self._scans: int = 0    # number of completed scans
+        self._get_jump = None
+        self._get_return = None
+        self._get_jump_address = None
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def length(self) -> int:
+        ''' Number of words of the program '''
+        return self._end
+
+    @property
+    def stack(self) -> int | None:
+        ''' The saved return address, None if the stack is empty '''
+        return self._stack
+
+    @property
+    def scans(self) -> int:
+        ''' Number of scans completed since creation or reset '''
+        return self._scans
+
+    @scans.setter
+    def scans(self, value: int):
+        self._scans = value
+
+    def reset(self):
+        self._count = 0
+        self._stack = None
+        self._scans = 0
+
+    def load(self, address: int):
+        ''' Set the counter, e.g. to start the program at another address '''
+        self._count = address & self._max_count
+
+    def clock_rise(self):
+        ''' Jump, return, or go to the next instruction '''
+        if self._get_jump and self._get_jump():
+            if not self._get_jump_address:
+                raise RuntimeError("ProgramCounter jump address not connected")
+            self._stack = self._next()
+            count = self._get_jump_address() & self._max_count
+        elif self._get_return and self._stack is not None and self._get_return():
+            count = self._stack
+            self._stack = None
+        else:
+            count = self._next()
+        if not count:
+            self._scans += 1
+        self._count = count
+
+    def _next(self) -> int:
+        count = self._count + 1
+        return count if count < self._end else 0
+
+    def snapshot(self) -> tuple:
+        return (self._count, self._stack, self._scans)
+
+    def restore(self, snapshot: tuple):
+        self._count, self._stack, self._scans = snapshot
+
+    def state_key(self) -> tuple:
+        ''' The state without the scan count, for Board.fast_forward '''
+        return (self._count, self._stack)
+
+    def advance(self, earlier: tuple, repeats: int):
+        ''' Add the scans of `repeats` repeats of the period since the snapshot `earlier` '''
+        self._scans += (self._scans - earlier[2]) * repeats
+
+    def connect_jump_input(self, jump_input):
+        ''' Connect the jump input, e.g. to the JMP flag of the MC14500B '''
+        self._get_jump = connection(jump_input)
+
+    def connect_jump_address(self, jump_address):
+        ''' Connect the address to jump to, e.g. to bits of the ROM data '''
+        self._get_jump_address = connection(jump_address)
+
+    def connect_return_input(self, return_input):
+        ''' Connect the return input, e.g. to the RTN flag of the MC14500B '''
+        self._get_return = connection(return_input)
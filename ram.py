@@ -0,0 +1,145 @@
+# Ram class emulates a clocked, writable memory device, e.g. for scratchpad
+# bits of a PLC program.
+# It is wired like the Rom: connect an address source and read the output
+# data. Writes are clocked: the falling edge captures the address, the data
+# input and the write enable, and the rising edge writes the data when the
+# write enable was active.
+# Address and data values are truncated to their proper sizes.
+#
+# The contents are stored in a typed array, divided in pages of
+# 2**page_bits words. The RAM keeps bitmaps of the pages written since it
+# was created, and since the last snapshot. A snapshot holds the written
+# pages only, and shares the pages that weren't written since the previous
+# snapshot with it, so taking a snapshot copies only the pages written since
+# then, and restoring one only touches the pages written by the program.
+
+from array import array
+
+from net import connection
+from rom import word_typecode
+
+
+class Ram:
+    __slots__ = ('_mem_array', '_initial', '_max_data', '_max_address', '_page_bits',
+                 '_written', '_dirty', '_pages', '_address', '_input_data', '_write',
+                 '_get_address_input', '_get_data_input', '_get_write_enable')
+
+    def __init__(self, data_bits: int, address_bits: int, contents: list[int] | None = None,
+                 page_bits: int = 8):
+        size = 1 << address_bits
+        typecode = word_typecode(data_bits)
+        self._max_data = (1 << data_bits) - 1
+        self._max_address = size - 1
+        self._mem_array = array(typecode, bytes(size * array(typecode).itemsize))
+        if contents:
+            if len(contents) > size:
+                raise ValueError("Contents exceed RAM size")
+            max_data = self._max_data
+            self._mem_array[:len(contents)] = array(typecode, [word & max_data for word in contents])
+        self._initial = self._mem_array.tobytes()   # the contents at power up
+        self._page_bits = min(page_bits, address_bits)
+        self._written = 0   # bitmap of the pages written since power up
+        self._dirty = 0     # bitmap of the pages written since the last snapshot
+        self._pages = {}    # contents of the written pages at the last snapshot
+        self._address = 0
+        self._input_data = 0
+        self._write = False
+        self._get_address_input = None
+        self._get_data_input = None
+        self._get_write_enable = None
+
+    @property
+    def data(self) -> int:
+        if not self._get_address_input:
+            raise RuntimeError("Memory: address input not connected")
+        return self._mem_array[self._get_address_input() & self._max_address]
+
+    @property
+    def page_size(self) -> int:
+        return 1 << self._page_bits
+
+    @property
+    def written_pages(self) -> list[int]:
+        ''' The pages written since power up '''
+        return [page for page in range(self._written.bit_length()) if self._written >> page & 1]
+
+    def read(self, address: int) -> int:
+        ''' Read a word without using the address input, e.g. for a debugger '''
+        return self._mem_array[address & self._max_address]
+
+    def clock_fall(self):
+        ''' Capture the address, data and write enable inputs '''
+        if self._get_write_enable:
+            self._write = bool(self._get_write_enable())
+        if self._write:
+            if not self._get_address_input or not self._get_data_input:
+                raise RuntimeError("Memory: address or data input not connected")
+            self._address = self._get_address_input() & self._max_address
+            self._input_data = int(self._get_data_input()) & self._max_data
+
+    def clock_rise(self):
+        ''' Write the captured data '''
+        if self._write:
+            self._mem_array[self._address] = self._input_data
+            page = 1 << (self._address >> self._page_bits)
+            self._written |= page
+            self._dirty |= page
+
+    def _page_slice(self, page: int) -> slice:
+        start = page << self._page_bits
+        return slice(start, start + (1 << self._page_bits))
+
+    def snapshot(self) -> tuple:
+        ''' The captured inputs and the contents of the written pages '''
+        for page in range(self._dirty.bit_length()):
+            if self._dirty >> page & 1:
+                self._pages[page] = self._mem_array[self._page_slice(page)].tobytes()
+        self._dirty = 0
+        return (self._address, self._input_data, self._write, tuple(sorted(self._pages.items())))
+
+    def restore(self, snapshot: tuple):
+        ''' Restore the state of a snapshot. Pages written since power up that
+            aren't in the snapshot get their power up contents back.
+        '''
+        self._address, self._input_data, self._write, pages = snapshot
+        pages = dict(pages)
+        typecode = self._mem_array.typecode
+        itemsize = self._mem_array.itemsize
+        for page in self.written_pages:
+            if page not in pages:
+                part = self._page_slice(page)
+                self._mem_array[part] = array(typecode, self._initial[part.start * itemsize:
+                                                                      part.stop * itemsize])
+        written = 0
+        for page, contents in pages.items():
+            self._mem_array[self._page_slice(page)] = array(typecode, contents)
+            written |= 1 << page
+        self._written = written
+        self._dirty = 0
+        self._pages = pages
+
+    def diff(self, snapshot: tuple) -> list[int]:
+        ''' The pages of which the contents differ from a snapshot '''
+        pages = dict(snapshot[3])
+        itemsize = self._mem_array.itemsize
+        changed = []
+        for page in range(max(self._written.bit_length(), max(pages, default=-1) + 1)):
+            if not (self._written >> page & 1 or page in pages):
+                continue
+            part = self._page_slice(page)
+            original = pages.get(page, self._initial[part.start * itemsize:part.stop * itemsize])
+            if self._mem_array[part].tobytes() != original:
+                changed.append(page)
+        return changed
+
+    def connect_address_input(self, address_input):
+        ''' Connect the address input to a callable that returns an integer value '''
+        self._get_address_input = connection(address_input)
+
+    def connect_data_input(self, data_input):
+        ''' Connect the data input to a callable that returns an integer value '''
+        self._get_data_input = connection(data_input)
+
+    def connect_write_enable(self, write_enable):
+        ''' Connect the write enable input to a callable that returns a boolean value '''
+        self._get_write_enable = connection(write_enable)
@@ -1,31 +1,121 @@
 
 # Rom class emulates hardware memory device.
 # Connect an address source, then read the output data.
-# To write to memory, set the address and data properties, then set the write enable and
-# clock the device by calling execute().
-# Address and data values are truncated to their proper sizes
-# The address can be provided either by setting it externally, or by
-# connecting the device to an address source by the connect_address_input() method.
+# The contents can't be written by the board, see ram.py for a writable memory.
+# Contents are truncated to the data size, and addresses to the address size.
+# The address is provided by connecting the device to an address source by the
+# connect_address_input() method.
 # Limitations:
-# - output enable (float data bus) not implemented, data_in and data_out are separated
+# - output enable (float data bus) not implemented
+# The contents are stored in a typed array, one machine word per memory word,
+# or in a list for words too wide for an array (more than 64 bits).
+# Rom.from_buffer and Rom.from_file use a binary image instead, like an EPROM
+# dump, without copying it: the ROM reads the words from a memoryview of the
+# buffer, or of the memory mapped file. When the words have the native byte
+# order and size, and all bits are data bits, this is as fast as the array;
+# otherwise each read decodes the bytes of the word.
+# The board can't write the contents, but load() replaces them, like
+# programming an EPROM, and gives them a new version (see state_key). A
+# snapshot of the ROM (see Board.snapshot) is None as long as the contents
+# are those it was made with; after a load() it holds the version and a copy
+# of the contents, made once per version, and restore() puts them back. The
+# contents it was made with are copied before they are first overwritten, by
+# load() or restore(), to restore None.
+
+import itertools
+import mmap
+import sys
+from array import array
+
+from net import connection
+
+_versions = itertools.count(1)  # versions of loaded contents, unique over all ROMs
+_ARRAY_BITS = array('Q').itemsize * 8   # the widest words of a typed array
+
+
+def word_typecode(bits: int) -> str:
+    ''' The array typecode of the smallest unsigned type holding `bits` bits '''
+    for typecode in ('B', 'H', 'I', 'L', 'Q'):
+        if bits <= array(typecode).itemsize * 8:
+            return typecode
+    raise ValueError(f"Words of {bits} bits are too wide for an array")
 
- 
 
 class Rom:
+    __slots__ = ('_size', '_mem_array', '_address', '_data_out', '_max_data', '_max_address',
+                 '_get_address_input', '_get_data_input', '_buffer', '_version', '_original',
+                 '_saved')
+
     def __init__(self, data_bits: int, address_bits: int, contents: list[int] | None = None):
+        self._setup(data_bits, address_bits)
+        if data_bits > _ARRAY_BITS:
+            self._mem_array = [0] * self._size
+        else:
+            typecode = word_typecode(data_bits)
+            self._mem_array = array(typecode, bytes(self._size * array(typecode).itemsize))
+        if contents:
+            if len(contents) > self._size:
+                raise ValueError("Contents exceed ROM size")
+            self._mem_array[:len(contents)] = self._words(contents)
+
+    def _setup(self, data_bits: int, address_bits: int):
         self._size = 1 << address_bits
-        self._mem_array = [0] * self._size
         self._address = 0
         self._data_out: int = 0
         self._max_data = (1 << data_bits) - 1
         self._max_address = self._size - 1
         self._get_address_input = None  # lambda for getting the address input
         self._get_data_input = None     # lambda for getting the data input
-        if contents:
-            if len(contents) > self._size:
-                raise ValueError("Contents exceed ROM size")
-            for i in range(min(self._size, len(contents))):
-                self._mem_array[i] = contents[i] & self._max_data
+        self._buffer = None     # the buffer or mapped file holding the contents
+        self._version = 0       # 0 for the initial contents, a new version for each load
+        self._original = None   # the initial contents, once overwritten
+        self._saved = None      # the snapshot of the current version
+
+    @classmethod
+    def from_buffer(cls, buffer, data_bits: int, word_bytes: int | None = None,
+                    byteorder: str = 'little', address_bits: int | None = None) -> 'Rom':
+        ''' A ROM reading its contents from a binary image, without copying
+            it. Words are `word_bytes` bytes in `byteorder`, by default the
+            fewest bytes holding `data_bits`. The address bits default to
+            those of the image size, which must then be a power of two
+            words; with fewer address bits, the ROM reads the first words.
+        '''
+        word_bytes = word_bytes or (data_bits + 7) // 8
+        if data_bits > word_bytes * 8:
+            raise ValueError(f"{data_bits} data bits don't fit in {word_bytes} bytes")
+        view = memoryview(buffer).cast('B')
+        words = len(view) // word_bytes
+        if not words:
+            raise ValueError(f"Image of {len(view)} bytes holds no word of {word_bytes} bytes")
+        if address_bits is None:
+            if words & (words - 1):
+                raise ValueError(f"Image of {words} words isn't a power of two words, "
+                                 f"give the address bits")
+            address_bits = words.bit_length() - 1
+        if words < 1 << address_bits:
+            raise ValueError(f"Image of {words} words is too small for {address_bits} address bits")
+        view = view[:(1 << address_bits) * word_bytes]
+        typecode = word_typecode(word_bytes * 8) if word_bytes * 8 <= _ARRAY_BITS else None
+        native = (typecode is not None and array(typecode).itemsize == word_bytes
+                  and (byteorder == sys.byteorder or word_bytes == 1))
+        rom = object.__new__(cls if native and data_bits == word_bytes * 8 else _ImageRom)
+        rom._setup(data_bits, address_bits)
+        rom._buffer = buffer
+        if isinstance(rom, _ImageRom):
+            rom._word_bytes = word_bytes
+            rom._byteorder = byteorder
+            rom._mem_array = view
+        else:
+            rom._mem_array = view.cast(typecode)
+        return rom
+
+    @classmethod
+    def from_file(cls, path, data_bits: int, word_bytes: int | None = None,
+                  byteorder: str = 'little', address_bits: int | None = None) -> 'Rom':
+        ''' A ROM reading its contents from a memory mapped binary file '''
+        with open(path, 'rb') as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls.from_buffer(mapped, data_bits, word_bytes, byteorder, address_bits)
 
     @property
     def address(self) -> int:
@@ -47,8 +137,90 @@ class Rom:
         address = self._get_address_input() & self._max_address
         return self._mem_array[address]
 
+    def load(self, contents: list[int], address: int = 0):
+        ''' Load new contents from `address` on, like programming an EPROM '''
+        if address < 0 or address + len(contents) > self._size:
+            raise ValueError("Contents exceed ROM size")
+        self._loading()
+        self._mem_array[address:address + len(contents)] = self._words(contents)
+
+    def _words(self, contents: list[int]):
+        ''' The contents truncated to the data size, in the type of the memory '''
+        max_data = self._max_data
+        words = [word & max_data for word in contents]
+        memory = self._mem_array
+        if isinstance(memory, list):
+            return words
+        return array(memory.format if isinstance(memory, memoryview) else memory.typecode, words)
+
+    def _loading(self):
+        ''' Keep the initial contents and make a new version, before loading '''
+        self._keep_original()
+        self._version = next(_versions)
+        self._saved = None
+
+    def _keep_original(self):
+        ''' Copy the initial contents, before they are first overwritten '''
+        if not isinstance(self._mem_array, list) and memoryview(self._mem_array).readonly:
+            raise ValueError("Can't load contents into a read-only image")
+        if self._original is None:
+            self._original = self._contents()
+
+    def _contents(self) -> bytes | tuple[int, ...]:
+        ''' A copy of the contents: the bytes, or the words of a list '''
+        if isinstance(self._mem_array, list):
+            return tuple(self._mem_array)
+        return bytes(memoryview(self._mem_array).cast('B'))
+
+    def snapshot(self) -> tuple[int, bytes | tuple[int, ...]] | None:
+        ''' None for the initial contents, or the version and the contents '''
+        if not self._version:
+            return None
+        if self._saved is None:
+            self._saved = (self._version, self._contents())
+        return self._saved
+
+    def restore(self, snapshot: tuple[int, bytes | tuple[int, ...]] | None):
+        version, contents = snapshot if snapshot is not None else (0, self._original)
+        if version != self._version:
+            if contents is None:
+                raise ValueError("The initial contents of the ROM weren't kept")
+            self._keep_original()
+            if isinstance(self._mem_array, list):
+                self._mem_array[:] = contents
+            else:
+                memoryview(self._mem_array).cast('B')[:] = contents
+            self._version = version
+            self._saved = snapshot
+
+    def state_key(self) -> int:
+        ''' The version of the contents, for Board.fast_forward and the scan cache '''
+        return self._version
+
     def connect_address_input(self, address_input):
         ''' Connect the memory's address address_input to an external bus. 
             The address_input should be a lambda that returns the current address.
         '''
-        self._get_address_input = address_input
+        self._get_address_input = connection(address_input)
+
+
+class _ImageRom(Rom):
+    ''' Rom reading words that need decoding from a binary image '''
+    __slots__ = ('_word_bytes', '_byteorder')
+
+    def load(self, contents: list[int], address: int = 0):
+        if address < 0 or address + len(contents) > self._size:
+            raise ValueError("Contents exceed ROM size")
+        self._loading()
+        word_bytes = self._word_bytes
+        start = address * word_bytes
+        self._mem_array[start:start + len(contents) * word_bytes] = b''.join(
+            (word & self._max_data).to_bytes(word_bytes, self._byteorder) for word in contents)
+
+    @property
+    def data(self) -> int:
+        if not self._get_address_input:
+            raise RuntimeError("Memory: address input not connected")
+        start = (self._get_address_input() & self._max_address) * self._word_bytes
+        return int.from_bytes(self._mem_array[start:start + self._word_bytes],
+                              self._byteorder) & self._max_data
@@ -0,0 +1,245 @@
+# Real-time runtime: runs a board as a soft PLC, one program scan per fixed
+# scan period, in an asyncio event loop.
+#
+# Each period, the runtime samples the inputs through an input adapter into
+# its input image, runs a scan of the board, and publishes the outputs
+# through an output adapter. The board reads the input image through
+# ScanRuntime.input_image, e.g. selector.connect_data_inputs(runtime.input_image),
+# and the outputs are read with the `outputs` callable, e.g. lambda: latch.q.
+# A scan is Board.scan() for a board with a program counter, or a fixed
+# number of clock cycles.
+#
+# Between scans the runtime sleeps until the start of the next period, so it
+# doesn't busy wait. When a scan (or the I/O) takes longer than the period,
+# the runtime is behind: it then runs the scans that are due back to back, as
+# one batch with one input sample and one output publication, up to
+# max_batch scans. Periods beyond that are dropped, so the runtime doesn't
+# try to catch up forever.
+#
+# Adapters are objects with an async read() -> int (input image) or an async
+# write(int) (output image), and optional async start() and stop() methods,
+# called when the runtime starts and stops. QueueInput and QueueOutput
+# connect to asyncio queues, StreamInput and StreamOutput to asyncio streams,
+# like pipes, sockets or files standing in for field I/O.
+#
+# The statistics hold the counts, and the latency (input sample to output
+# publication) and jitter (actual minus scheduled start) percentiles of the
+# last `samples` batches.
+
+import asyncio
+import time
+from collections import deque
+from typing import NamedTuple
+
+
+class QueueInput:
+    ''' Input adapter taking the latest image put on an asyncio queue '''
+    def __init__(self, queue: asyncio.Queue, initial: int = 0):
+        self._queue = queue
+        self._image = initial
+
+    async def read(self) -> int:
+        while not self._queue.empty():
+            self._image = self._queue.get_nowait()
+        return self._image
+
+
+class QueueOutput:
+    ''' Output adapter putting every published image on an asyncio queue '''
+    def __init__(self, queue: asyncio.Queue):
+        self._queue = queue
+
+    async def write(self, image: int):
+        self._queue.put_nowait(image)
+
+
+class StreamInput:
+    ''' Input adapter reading images of `size` bytes from a stream. A
+        background task reads the stream, and read() returns the latest
+        image, so a scan never waits for the field.
+    '''
+    def __init__(self, reader: asyncio.StreamReader, size: int, initial: int = 0,
+                 byteorder: str = 'little'):
+        self._reader = reader
+        self._size = size
+        self._byteorder = byteorder
+        self._image = initial
+        self._task = None
+
+    async def _receive(self):
+        try:
+            while True:
+                data = await self._reader.readexactly(self._size)
+                self._image = int.from_bytes(data, self._byteorder)
+        except asyncio.IncompleteReadError:
+            pass    # end of stream: keep the last image
+
+    async def start(self):
+        self._task = asyncio.create_task(self._receive())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def read(self) -> int:
+        return self._image
+
+
+class StreamOutput:
+    ''' Output adapter writing images of `size` bytes to a stream, by default
+        only when the image changed.
+    '''
+    def __init__(self, writer: asyncio.StreamWriter, size: int, on_change: bool = True,
+                 byteorder: str = 'little'):
+        self._writer = writer
+        self._size = size
+        self._byteorder = byteorder
+        self._on_change = on_change
+        self._last = None
+
+    async def write(self, image: int):
+        if self._on_change and image == self._last:
+            return
+        self._last = image
+        self._writer.write(image.to_bytes(self._size, self._byteorder))
+        await self._writer.drain()
+
+
+def _percentiles(samples) -> dict[str, float]:
+    ''' The 50th, 90th and 99th percentile and the maximum, nearest rank '''
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+    return {'p50': ordered[last * 50 // 100], 'p90': ordered[last * 90 // 100],
+            'p99': ordered[last * 99 // 100], 'max': ordered[last]}
+
+
+class RuntimeStatistics(NamedTuple):
+    period: float
+    scans: int          # scans run
+    cycles: int         # clock cycles of the scans
+    batches: int        # input samples and output publications
+    overruns: int       # batches that ended after the end of their period
+    dropped: int        # periods without a scan, as the batch was full
+    latency: dict       # percentiles of the input to output time, in seconds
+    jitter: dict        # percentiles of the start delay, in seconds
+
+    def __str__(self):
+        def milliseconds(percentiles):
+            return ', '.join(f"{name} {value * 1e3:.3f}" for name, value in percentiles.items())
+        return (f"{self.scans} scans of {self.period * 1e3:g} ms in {self.batches} batches, "
+                f"{self.overruns} overruns, {self.dropped} dropped\n"
+                f"latency ms: {milliseconds(self.latency)}\n"
+                f"jitter ms: {milliseconds(self.jitter)}")
+
+
+class ScanRuntime:
+    def __init__(self, board, period: float, outputs=None, input_adapter=None,
+                 output_adapter=None, cycles_per_scan: int | None = None, max_batch: int = 10,
+                 samples: int = 10000):
+        ''' Run scans of `board` every `period` seconds. `outputs` returns the
+            output image to publish. Without cycles_per_scan, a scan is a
+            Board.scan(), which needs a program counter on the board.
+        '''
+        if period <= 0:
+            raise ValueError("The scan period must be positive")
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+        self._board = board
+        self._period = period
+        self._outputs = outputs
+        self._input_adapter = input_adapter
+        self._output_adapter = output_adapter
+        self._cycles_per_scan = cycles_per_scan
+        self._max_batch = max_batch
+        self._image = 0         # the input image sampled for the current batch
+        self._running = False
+        self._scans = 0
+        self._cycles = 0
+        self._batches = 0
+        self._overruns = 0
+        self._dropped = 0
+        self._latency = deque(maxlen=samples)
+        self._jitter = deque(maxlen=samples)
+
+    @property
+    def period(self) -> float:
+        return self._period
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def input_image(self) -> int:
+        ''' The sampled input image, a connection for the board inputs '''
+        return self._image
+
+    def _scan(self):
+        board = self._board
+        if self._cycles_per_scan is None:
+            self._cycles += board.scan().cycles
+        else:
+            board.run(self._cycles_per_scan)
+            self._cycles += self._cycles_per_scan
+        self._scans += 1
+
+    async def run(self, scans: int | None = None, duration: float | None = None) -> RuntimeStatistics:
+        ''' Run until `scans` scans are done, `duration` seconds passed, or
+            stop() is called. Returns the statistics.
+        '''
+        loop = asyncio.get_running_loop()
+        for adapter in (self._input_adapter, self._output_adapter):
+            if hasattr(adapter, 'start'):
+                await adapter.start()
+        self._running = True
+        period = self._period
+        start = next_start = loop.time()
+        try:
+            while self._running:
+                if scans is not None and self._scans >= scans:
+                    break
+                now = loop.time()
+                if duration is not None and now - start >= duration:
+                    break
+                self._jitter.append(now - next_start)
+                # the periods that started, including this one, are due
+                due = int((now - next_start) // period) + 1
+                batch = min(due, self._max_batch)
+                self._dropped += due - batch
+                if scans is not None:
+                    batch = min(batch, scans - self._scans)   # the rest isn't dropped, the run ends
+                sampled = time.perf_counter()
+                if self._input_adapter:
+                    self._image = await self._input_adapter.read()
+                for _ in range(batch):
+                    self._scan()
+                if self._output_adapter and self._outputs:
+                    await self._output_adapter.write(self._outputs())
+                self._latency.append(time.perf_counter() - sampled)
+                self._batches += 1
+                next_start += due * period
+                delay = next_start - loop.time()
+                if delay < 0:
+                    self._overruns += 1
+                await asyncio.sleep(max(delay, 0))
+        finally:
+            self._running = False
+            for adapter in (self._input_adapter, self._output_adapter):
+                if hasattr(adapter, 'stop'):
+                    await adapter.stop()
+        return self.statistics()
+
+    def stop(self):
+        ''' Stop the runtime after the current batch '''
+        self._running = False
+
+    def statistics(self) -> RuntimeStatistics:
+        return RuntimeStatistics(self._period, self._scans, self._cycles, self._batches,
+                                 self._overruns, self._dropped, _percentiles(self._latency),
+                                 _percentiles(self._jitter))
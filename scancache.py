@@ -0,0 +1,99 @@
+# Scan cache: memoization of complete program scans of a board.
+# A scan of a deterministic program is a function of the state of the board
+# at the start of the scan (the latches, the MC14500B registers, the program
+# counter) and of the inputs. Board.enable_scan_cache() gives the board a
+# ScanCache, mapping that state and the value of an `inputs` callable to the
+# state at the end of the scan and its number of cycles, so Board.scan()
+# restores the state of a scan that was seen before instead of running it.
+# As field inputs change much more slowly than the scan rate, most scans are
+# a dictionary lookup.
+#
+# The state of a device is its state_key() or snapshot(), like for
+# Board.fast_forward: the key includes the version of the ROM contents, so
+# loading new contents (Rom.load) makes new keys. Changing the wiring of the
+# board, by connecting a device input or adding a device, clears the cache.
+# A connection on any board changes net.generation; only then the cache
+# compares the wiring of its own board (net.wiring), so rewiring another
+# board leaves it alone. Inputs that may change must be returned by
+# `inputs`; a ROM read from a buffer that is changed in place needs a
+# clear() as well.
+#
+# The cache holds at most `size` scans, evicting the least recently used.
+
+from collections import OrderedDict
+from typing import NamedTuple
+
+import net
+
+
+class ScanCacheStatistics(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int  # clears by a wiring change
+    entries: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ScanCache:
+    def __init__(self, size: int = 1024, inputs=None, wiring=None):
+        ''' `wiring` returns the wiring of the board, see net.wiring; without
+            it, any connection clears the cache.
+        '''
+        if size < 1:
+            raise ValueError("The cache size must be at least 1")
+        self._size = size
+        self._inputs = inputs
+        self._entries = OrderedDict()   # (cycles, device snapshots) by (state, inputs)
+        self._generation = net.generation
+        self._get_wiring = wiring
+        self._wiring = wiring() if wiring else None     # the wiring of the entries
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def __len__(self):
+        return len(self._entries)
+
+    def key(self, state: tuple):
+        ''' The key of a scan from `state`, clearing the cache if the wiring changed '''
+        if self._generation != net.generation:
+            self._generation = net.generation
+            wiring = self._get_wiring() if self._get_wiring else None
+            if wiring is None or wiring != self._wiring:
+                self._wiring = wiring
+                if self._entries:
+                    self._entries.clear()
+                    self._invalidations += 1
+        return state, self._inputs() if self._inputs else None
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self._misses += 1
+        else:
+            self._hits += 1
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key, cycles: int, devices: tuple):
+        self._entries[key] = (cycles, devices)
+        if len(self._entries) > self._size:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def statistics(self) -> ScanCacheStatistics:
+        return ScanCacheStatistics(self._hits, self._misses, self._evictions,
+                                   self._invalidations, len(self._entries))
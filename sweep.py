@@ -0,0 +1,60 @@
+# Sweep runner: runs many independent board simulations in worker processes.
+# Each run is a SweepRun: a BoardSpec (see boardspec.py), the build
+# parameters and the number of clock cycles. After running, the `result`
+# expression is evaluated with the devices and parameters as names, like the
+# wiring expressions, and must give a value that can be pickled.
+#
+# The runs are sent to a ProcessPoolExecutor in shards of several runs, so
+# the cost of sending a spec to a worker and the result back is shared by the
+# runs of a shard. run_sweep yields (run index, result) as the shards finish,
+# so results come back out of order.
+#
+#     runs = [SweepRun(spec, 16, {'input_data': value}) for value in range(256)]
+#     for index, q in run_sweep(runs, 'latch.q'):
+#         ...
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import NamedTuple
+
+from boardspec import BoardSpec
+
+_SHARDS_PER_WORKER = 4  # shards per worker, to balance runs of different lengths
+
+
+class SweepRun(NamedTuple):
+    spec: BoardSpec
+    clocks: int
+    parameters: dict | None = None
+
+
+def run_one(run: SweepRun, result: str):
+    ''' Build and run the board of a run, and return its result '''
+    parameters = dict(run.parameters or {})
+    board, devices = run.spec.build(**parameters)
+    board.run(run.clocks)
+    return eval(result, {**parameters, **devices})
+
+
+def _run_shard(shard: list[tuple[int, SweepRun]], result: str) -> list[tuple[int, object]]:
+    return [(index, run_one(run, result)) for index, run in shard]
+
+
+def run_sweep(runs, result: str, workers: int | None = None, shard_size: int | None = None):
+    ''' Run all runs, yielding (index, result) as they finish. `workers` is
+        the number of processes, the number of CPUs by default; with 0
+        workers the runs are done in this process, in order.
+    '''
+    runs = list(enumerate(runs))
+    if workers == 0:
+        for index, run in runs:
+            yield index, run_one(run, result)
+        return
+    workers = workers or os.cpu_count() or 1
+    if shard_size is None:
+        shard_size = max(1, len(runs) // (workers * _SHARDS_PER_WORKER))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_run_shard, runs[start:start + shard_size], result)
+                   for start in range(0, len(runs), shard_size)]
+        for future in as_completed(futures):
+            yield from future.result()
@@ -0,0 +1,423 @@
+# Symbolic execution of MC14500B programs: one scan of a program as boolean
+# functions of the inputs and of the state at the start of the scan.
+#
+# The board is the board of the compiler (see compiler.py), with as many
+# inputs and latches as the i/o address of the WordLayout can address
+# (8 for the default layout): the program runs once from address 0 to the
+# end, the MC14500B reads input `address`, and a word with the write bit set
+# writes the MC14500B data output to latch `address`. JMP and RTN are
+# ignored, as the Counter does.
+#
+# The functions are reduced ordered binary decision diagrams (BDDs), built
+# in a BDD manager: a node is an int, 0 and 1 are the constants, and equal
+# functions are the same node, so comparing functions is comparing ints.
+# The variables are the MC14500B state bits (RR, IEN, OEN, OUT, SKZ), the
+# latches (Q0, Q1, ...) and the inputs (I0, I1, ...) at the start of the scan.
+#
+# symbolic_scan() executes a program on BDDs instead of bools, giving the
+# latch outputs and the MC14500B state after the scan. The result can be
+# evaluated for concrete values, or turned into a lookup table over the
+# inputs the program reads. equivalent() checks that two programs compute
+# the same latch outputs for all inputs and start states, without
+# enumerating them, and gives a counterexample if they don't.
+# sequentially_equivalent() checks this for all sequences of scans from a
+# start state, such as the reset state: the programs run side by side, and
+# only the pairs of MC14500B states they can reach together are compared.
+# This is the guarantee of the optimizer, which can remove instructions
+# whose effect is only seen from states a program never reaches. The latches
+# are not part of the state: a scan must write the same latches for any
+# latch values, as these programs never read their latches.
+
+from collections import deque
+from typing import NamedTuple
+
+from layout import WordLayout
+from logic_unit import IEN, OEN, SKZ, STATE_BITS, STOC, USES_DATA, logic_functions
+from mc14500b import RESET_STATE
+
+_STATE_NAMES = ('RR', 'IEN', 'OEN', 'OUT', 'SKZ')
+
+FALSE = 0
+TRUE = 1
+_TERMINAL = 1 << 30     # variable index of the constants, below all variables
+
+
+class BDD:
+    ''' A BDD manager: the nodes and the operations on them '''
+
+    def __init__(self):
+        self._nodes = [(_TERMINAL, 0, 0), (_TERMINAL, 1, 1)]   # (variable, low, high)
+        self._unique = {}   # node by (variable, low, high)
+        self._ite = {}      # ite results by (f, g, h)
+        self.names = []     # variable names by index
+        self._boards = {}   # _Variables by number of points
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def variable(self, name: str) -> int:
+        ''' A new variable, ordered after the existing ones '''
+        self.names.append(name)
+        return self._node(len(self.names) - 1, FALSE, TRUE)
+
+    def _node(self, variable: int, low: int, high: int) -> int:
+        if low == high:
+            return low
+        key = (variable, low, high)
+        node = self._unique.get(key)
+        if node is None:
+            node = self._unique[key] = len(self._nodes)
+            self._nodes.append(key)
+        return node
+
+    def top(self, node: int) -> int:
+        ''' The variable index of a node '''
+        return self._nodes[node][0]
+
+    def ite(self, f: int, g: int, h: int) -> int:
+        ''' if f then g else h '''
+        if f == TRUE:
+            return g
+        if f == FALSE:
+            return h
+        if g == h:
+            return g
+        if g == TRUE and h == FALSE:
+            return f
+        key = (f, g, h)
+        result = self._ite.get(key)
+        if result is not None:
+            return result
+        nodes = self._nodes
+        variable = min(nodes[f][0], nodes[g][0], nodes[h][0])
+        f0, f1 = (nodes[f][1], nodes[f][2]) if nodes[f][0] == variable else (f, f)
+        g0, g1 = (nodes[g][1], nodes[g][2]) if nodes[g][0] == variable else (g, g)
+        h0, h1 = (nodes[h][1], nodes[h][2]) if nodes[h][0] == variable else (h, h)
+        result = self._node(variable, self.ite(f0, g0, h0), self.ite(f1, g1, h1))
+        self._ite[key] = result
+        return result
+
+    def not_(self, f: int) -> int:
+        return self.ite(f, FALSE, TRUE)
+
+    def and_(self, f: int, g: int) -> int:
+        return self.ite(f, g, FALSE)
+
+    def or_(self, f: int, g: int) -> int:
+        return self.ite(f, TRUE, g)
+
+    def xnor(self, f: int, g: int) -> int:
+        return self.ite(f, g, self.not_(g))
+
+    def evaluate(self, f: int, values) -> bool:
+        ''' The value of f, with values[i] the value of variable i '''
+        nodes = self._nodes
+        while f > TRUE:
+            variable, low, high = nodes[f]
+            f = high if values[variable] else low
+        return bool(f)
+
+    def restrict(self, f: int, values: dict[int, bool]) -> int:
+        ''' f with the variables in `values` replaced by their value '''
+        nodes = self._nodes
+        cache = {}
+
+        def restrict(node):
+            if node <= TRUE:
+                return node
+            result = cache.get(node)
+            if result is None:
+                variable, low, high = nodes[node]
+                if variable in values:
+                    result = restrict(high if values[variable] else low)
+                else:
+                    result = self._node(variable, restrict(low), restrict(high))
+                cache[node] = result
+            return result
+        return restrict(f)
+
+    def support(self, f: int) -> set[int]:
+        ''' The variables that f depends on '''
+        variables = set()
+        seen = set()
+        stack = [f]
+        while stack:
+            node = stack.pop()
+            if node <= TRUE or node in seen:
+                continue
+            seen.add(node)
+            variable, low, high = self._nodes[node]
+            variables.add(variable)
+            stack.extend((low, high))
+        return variables
+
+    def size(self, f: int) -> int:
+        ''' The number of nodes of f, without the constants '''
+        seen = set()
+        stack = [f]
+        while stack:
+            node = stack.pop()
+            if node > TRUE and node not in seen:
+                seen.add(node)
+                stack.extend(self._nodes[node][1:])
+        return len(seen)
+
+    def satisfy(self, f: int) -> dict[int, bool] | None:
+        ''' Values of the variables on a path making f true, None if f is false '''
+        if f == FALSE:
+            return None
+        values = {}
+        while f > TRUE:
+            variable, low, high = self._nodes[f]
+            values[variable] = low == FALSE
+            f = high if low == FALSE else low
+        return values
+
+
+class _Variables:
+    ''' The variables of a board with `points` inputs and latches '''
+
+    def __init__(self, bdd: BDD, points: int):
+        self.points = points
+        self.state = [bdd.variable(name) for name in _STATE_NAMES]
+        self.latches = [bdd.variable(f'Q{i}') for i in range(points)]
+        self.inputs = [bdd.variable(f'I{i}') for i in range(points)]
+        self.first = bdd.top(self.state[0])
+
+    def values(self, inputs: int, latches: int, state: int) -> list[bool]:
+        ''' Variable values by variable index, from the first variable '''
+        bits = [bool(state & bit) for bit in STATE_BITS]
+        bits.extend(bool((latches >> i) & 1) for i in range(self.points))
+        bits.extend(bool((inputs >> i) & 1) for i in range(self.points))
+        return bits
+
+
+def _variables(bdd: BDD, points: int) -> _Variables:
+    ''' The variables of a board in a manager, made by the first scan '''
+    variables = bdd._boards.get(points)
+    if variables is None:
+        variables = bdd._boards[points] = _Variables(bdd, points)
+    return variables
+
+
+class LookupTable:
+    ''' The result of a scan from a fixed start state, by the values of the
+        inputs the program reads
+    '''
+    def __init__(self, inputs: list[int], table: list[tuple[int, int]]):
+        self.inputs = inputs    # the input numbers that index the table, low bit first
+        self._table = table
+
+    def __len__(self):
+        return len(self._table)
+
+    def __call__(self, inputs: int) -> tuple[int, int]:
+        ''' The latch outputs and MC14500B state after a scan with `inputs` '''
+        index = 0
+        for bit, number in enumerate(self.inputs):
+            index |= ((inputs >> number) & 1) << bit
+        return self._table[index]
+
+
+class SymbolicScan:
+    ''' The latch outputs and MC14500B state after one scan, as BDDs '''
+
+    def __init__(self, bdd: BDD, variables: _Variables, latches: list[int], state: list[int]):
+        self.bdd = bdd
+        self._variables = variables
+        self.latches = latches  # the function of each latch output
+        self.state = state      # the function of RR, IEN, OEN, OUT and SKZ
+
+    @property
+    def points(self) -> int:
+        return self._variables.points
+
+    def _values(self, inputs: int, latches: int, state: int) -> list[bool]:
+        return [False] * self._variables.first + self._variables.values(inputs, latches, state)
+
+    def evaluate(self, inputs: int, latches: int = 0, state: int = RESET_STATE) -> tuple[int, int]:
+        ''' The latch outputs and MC14500B state after a scan, like
+            CompiledProgram.scan(inputs, latches, state)
+        '''
+        values = self._values(inputs, latches, state)
+        evaluate = self.bdd.evaluate
+        q = 0
+        for i, function in enumerate(self.latches):
+            if evaluate(function, values):
+                q |= 1 << i
+        new_state = 0
+        for bit, function in zip(STATE_BITS, self.state):
+            if evaluate(function, values):
+                new_state |= bit
+        return q, new_state
+
+    def input_support(self) -> list[int]:
+        ''' The inputs that the results depend on '''
+        support = set()
+        for function in self.latches + self.state:
+            support |= self.bdd.support(function)
+        first_input = self.bdd.top(self._variables.inputs[0])
+        return sorted(variable - first_input for variable in support
+                      if first_input <= variable < first_input + self.points)
+
+    def lookup_table(self, latches: int = 0, state: int = RESET_STATE,
+                     max_inputs: int = 16) -> LookupTable:
+        ''' The results of a scan from a start state, as a table over the
+            inputs the program reads. Raises ValueError if it reads more than
+            max_inputs inputs.
+        '''
+        inputs = self.input_support()
+        if len(inputs) > max_inputs:
+            raise ValueError(f"The program reads {len(inputs)} inputs, the table is limited "
+                             f"to {max_inputs}")
+        table = []
+        for index in range(1 << len(inputs)):
+            value = 0
+            for bit, number in enumerate(inputs):
+                if (index >> bit) & 1:
+                    value |= 1 << number
+            table.append(self.evaluate(value, latches, state))
+        return LookupTable(inputs, table)
+
+    def _assignment(self, values: dict[int, bool]) -> tuple[int, int, int]:
+        ''' The inputs, latches and state of variable values '''
+        variables = self._variables
+        top = self.bdd.top
+        state = sum(bit for bit, node in zip(STATE_BITS, variables.state)
+                    if values.get(top(node)))
+        latches = sum(1 << i for i, node in enumerate(variables.latches) if values.get(top(node)))
+        inputs = sum(1 << i for i, node in enumerate(variables.inputs) if values.get(top(node)))
+        return inputs, latches, state
+
+
+def symbolic_scan(contents: list[int], layout: WordLayout | None = None,
+                  bdd: BDD | None = None) -> SymbolicScan:
+    ''' Execute one scan of a program on BDDs. Scans compared with each
+        other must be built in the same manager.
+    '''
+    if not contents:
+        raise ValueError("Can't execute an empty program")
+    layout = layout or WordLayout()
+    bdd = bdd or BDD()
+    variables = _variables(bdd, 1 << layout.address_bits)
+    rr, ien, oen, out, skz = variables.state
+    latches = list(variables.latches)
+    inputs = variables.inputs
+    functions = logic_functions(bdd.not_, bdd.and_, bdd.or_, bdd.xnor)
+    for word in contents:
+        opcode, write, address = layout.decode(word)
+        skip = bdd.and_(skz, bdd.not_(rr))
+        if opcode in USES_DATA:
+            data = bdd.and_(ien, inputs[address])
+            if opcode == IEN:
+                ien = bdd.ite(skip, ien, data)
+            elif opcode == OEN:
+                oen = bdd.ite(skip, oen, data)
+            else:
+                rr = bdd.ite(skip, rr, functions[opcode](rr, data))
+        out = bdd.ite(skip, out, bdd.not_(rr) if opcode == STOC else rr)
+        skz = bdd.not_(skip) if opcode == SKZ else FALSE
+        if write:
+            latches[address] = bdd.and_(out, oen)
+    return SymbolicScan(bdd, variables, latches, [rr, ien, oen, out, skz])
+
+
+class Equivalence(NamedTuple):
+    equivalent: bool
+    # inputs, latches and MC14500B state at the start of a scan for which the
+    # programs differ, None if they are equivalent
+    counterexample: tuple[int, int, int] | None
+    # the inputs of the scans before that scan, for sequentially_equivalent()
+    trace: tuple[int, ...] = ()
+
+    def __bool__(self):
+        return self.equivalent
+
+
+def equivalent(contents: list[int], other: list[int], layout: WordLayout | None = None,
+               compare_state: bool = False, state: int | None = None) -> Equivalence:
+    ''' Check that two programs write the same latch outputs for all inputs
+        and start states. With compare_state, the MC14500B state after the
+        scan must be the same as well, which makes the programs equivalent
+        over any number of scans. With `state`, only scans starting from that
+        MC14500B state are compared, e.g. RESET_STATE for programs that
+        don't depend on the state left by the previous scan.
+    '''
+    bdd = BDD()
+    scan = symbolic_scan(contents, layout, bdd)
+    other_scan = symbolic_scan(other, layout, bdd)
+    constraint = TRUE
+    if state is not None:
+        for bit, node in zip(STATE_BITS, scan._variables.state):
+            constraint = bdd.and_(constraint, node if state & bit else bdd.not_(node))
+    pairs = list(zip(scan.latches, other_scan.latches))
+    if compare_state:
+        pairs.extend(zip(scan.state, other_scan.state))
+    for function, other_function in pairs:
+        difference = bdd.and_(constraint, bdd.not_(bdd.xnor(function, other_function)))
+        if difference != FALSE:
+            return Equivalence(False, scan._assignment(bdd.satisfy(difference)))
+    return Equivalence(True, None)
+
+
+def _state_values(scan: SymbolicScan, state: int) -> dict[int, bool]:
+    top = scan.bdd.top
+    return {top(node): bool(state & bit) for bit, node in zip(STATE_BITS, scan._variables.state)}
+
+
+def _successors(bdd: BDD, functions: list[int]):
+    ''' The values the functions can have together, with a satisfying assignment '''
+    def successors(index, condition, bits):
+        if condition == FALSE:
+            return
+        if index == len(functions):
+            yield bits, bdd.satisfy(condition)
+            return
+        function = functions[index]
+        yield from successors(index + 1, bdd.and_(condition, bdd.not_(function)), bits)
+        yield from successors(index + 1, bdd.and_(condition, function), bits | (1 << index))
+    return successors(0, TRUE, 0)
+
+
+def _packed(bits: int) -> int:
+    ''' The packed MC14500B state of bits in the order of STATE_BITS '''
+    return sum(bit for index, bit in enumerate(STATE_BITS) if (bits >> index) & 1)
+
+
+def sequentially_equivalent(contents: list[int], other: list[int],
+                            layout: WordLayout | None = None,
+                            state: int = RESET_STATE) -> Equivalence:
+    ''' Check that two programs write the same latch outputs in every scan,
+        for all inputs, running from the MC14500B `state`. A counterexample
+        is the scan that differs, with the state of `contents` at its start,
+        and the trace of inputs of the scans leading to it.
+    '''
+    bdd = BDD()
+    scan = symbolic_scan(contents, layout, bdd)
+    other_scan = symbolic_scan(other, layout, bdd)
+    start = (state, state)
+    parents = {start: None}     # (previous pair of states, inputs) by pair of states
+    queue = deque([start])
+    while queue:
+        pair = queue.popleft()
+        values = _state_values(scan, pair[0])
+        other_values = _state_values(other_scan, pair[1])
+        for function, other_function in zip(scan.latches, other_scan.latches):
+            difference = bdd.not_(bdd.xnor(bdd.restrict(function, values),
+                                           bdd.restrict(other_function, other_values)))
+            if difference != FALSE:
+                inputs, latches, _ = scan._assignment(bdd.satisfy(difference))
+                trace = []
+                previous = parents[pair]
+                while previous is not None:
+                    trace.append(previous[1])
+                    previous = parents[previous[0]]
+                return Equivalence(False, (inputs, latches, pair[0]), tuple(reversed(trace)))
+        functions = [bdd.restrict(function, values) for function in scan.state]
+        functions += [bdd.restrict(function, other_values) for function in other_scan.state]
+        for bits, assignment in _successors(bdd, functions):
+            successor = (_packed(bits & 31), _packed(bits >> 5))
+            if successor not in parents:
+                parents[successor] = (pair, scan._assignment(assignment)[0])
+                queue.append(successor)
+    return Equivalence(True, None)
@@ -0,0 +1,105 @@
+# Board and program fixtures of the tests, also used by the benchmarks.
+# Each builder returns the Board together with a dict of its devices, so a
+# test can inspect the outputs after running.
+
+from board import Board
+from counter import Counter
+from layout import WordLayout
+from mc14500b import MC14500B, OPCODE
+from mc14512b import MC14512B
+from mc14599b import MC14599B
+from net import Bus
+from program_counter import ProgramCounter
+from rom import Rom
+
+
+# The layout of the boards of test_execute_14500_from_rom: 4 bits opcode,
+# 1 bit write enable for the output latch, 3 bits i/o address
+LAYOUT = WordLayout()
+
+# The program of test_execute_14500_from_rom: store the inverted input byte
+# in the output latch.
+INVERTER_PROGRAM = [
+    word
+    for bit in range(7, -1, -1)
+    for word in (LAYOUT.encode(OPCODE.LD, False, bit), LAYOUT.encode(OPCODE.STOC, True, bit))
+]
+
+
+def random_program(rng, length: int = 16, write_rate: float = 0.4) -> list[int]:
+    ''' A random program without JMP and RTN, with a fraction `write_rate`
+        of the words writing the latch
+    '''
+    opcodes = [opcode for opcode in OPCODE if opcode not in (OPCODE.JMP, OPCODE.RTN)]
+    return [LAYOUT.encode(rng.choice(opcodes), rng.random() < write_rate, rng.randrange(8))
+            for _ in range(length)]
+
+
+def _inverter_board(program_counter, contents: list[int], input_data, board_class, icu_class,
+                    address_bits: int, nets: bool):
+    rom = Rom(data_bits=8, address_bits=address_bits, contents=contents)
+    icu = icu_class()
+    output_latch = MC14599B()
+    input_selector = MC14512B()
+
+    rom.connect_address_input(lambda: program_counter.count)
+    if nets:
+        rom_bus = Bus(lambda: rom.data, 8)
+        instruction = rom_bus.field(4, 4)
+        write = rom_bus.field(3)
+        io_address = rom_bus.field(0, 3)
+    else:
+        instruction = lambda: (rom.data >> 4) & 0x0F
+        write = lambda: (rom.data >> 3) & 1
+        io_address = lambda: rom.data & 0x07
+    if isinstance(program_counter, ProgramCounter):
+        program_counter.connect_jump_input(lambda: icu.jmp_flag)
+        program_counter.connect_return_input(lambda: icu.rtn_flag)
+        program_counter.connect_jump_address(lambda: rom.data & 0x0F)
+    icu.connect_instruction_input(instruction)
+    icu.connect_data_input(lambda: input_selector.data)
+    output_latch.connect_data_input(lambda: icu.data)
+    output_latch.connect_address_input(io_address)
+    output_latch.connect_chip_enable(lambda: True)
+    output_latch.connect_write_input(write)
+    input_selector.connect_address_input(io_address)
+    input_selector.connect_data_inputs(input_data if callable(input_data) else lambda: input_data)
+
+    board = board_class()
+    if nets:
+        board.add_net(rom_bus)
+    board.add_device(icu)
+    board.add_device(rom)
+    board.add_device(program_counter)
+    board.add_device(output_latch)
+    board.add_device(input_selector)
+    devices = {
+        'counter': program_counter,
+        'rom': rom,
+        'icu': icu,
+        'latch': output_latch,
+        'selector': input_selector,
+    }
+    return board, devices
+
+
+def inverter_board(input_data=0b11110000, board_class=Board,
+                   contents: list[int] = INVERTER_PROGRAM, icu_class=MC14500B,
+                   address_bits: int = 4, nets: bool = False):
+    ''' The board of test_execute_14500_from_rom: a Counter as program
+        counter, ROM, MC14500B, MC14599B output latch and MC14512B input
+        selector. input_data is the input byte, or a callable returning it.
+        With nets, the ROM data output is a cached Bus that drives the
+        instruction, write and i/o address inputs.
+    '''
+    return _inverter_board(Counter(bits=address_bits), contents, input_data, board_class,
+                           icu_class, address_bits, nets)
+
+
+def scan_board(contents: list[int] = INVERTER_PROGRAM, input_data=0b11110000,
+               board_class=Board, icu_class=MC14500B):
+    ''' The inverter board with a ProgramCounter, following the JMP and RTN
+        flags, with the jump address in the low nibble of the program word.
+    '''
+    return _inverter_board(ProgramCounter(bits=4, length=len(contents)), contents, input_data,
+                           board_class, icu_class, 4, False)
@@ -0,0 +1,99 @@
+import os
+import tempfile
+import unittest
+
+from assembler import AssemblerError, assemble, disassemble, disassemble_word
+from layout import WordLayout
+from mc14500b import OPCODE
+from tests.boards import INVERTER_PROGRAM, LAYOUT, inverter_board
+
+
+INVERTER_SOURCE = '''
+; store the inverted input byte in the output latch
+start:  LD 7        ; load input 7
+        STOC 7      ; store the complement in latch 7
+        LD 6
+        STOC 6
+        LD 5
+        STOC 5
+        LD 4
+        STOC 4
+        LD 3
+        STOC 3
+        LD 2
+        STOC 2
+        LD 1
+        STOC 1
+        LD 0
+        STOC 0
+'''
+
+
+class TestAssembler(unittest.TestCase):
+
+    def test_inverter(self):
+        contents = assemble(INVERTER_SOURCE)
+        self.assertEqual(contents, INVERTER_PROGRAM)
+        board, devices = inverter_board(0b11110000, contents=contents)
+        board.run(16)
+        self.assertEqual(devices['latch'].q, 0b00001111)
+
+    def test_labels_and_modifiers(self):
+        contents = assemble('''
+            IEN 0x1 ; comment
+            JMP sub
+        back:
+            NOPO
+            STO 2 NW
+        sub: LD 3 W
+            RTN
+            jmp back
+        ''')
+        self.assertEqual(contents, [
+            LAYOUT.encode(OPCODE.IEN, False, 1),
+            (int(OPCODE.JMP) << 4) | 4,
+            LAYOUT.encode(OPCODE.NOP0, False, 0),
+            LAYOUT.encode(OPCODE.STO, False, 2),
+            LAYOUT.encode(OPCODE.LD, True, 3),
+            LAYOUT.encode(OPCODE.RTN, False, 0),
+            (int(OPCODE.JMP) << 4) | 2,
+        ])
+
+    def test_errors(self):
+        for source, line_number in (('LD 1\nFOO 2', 2), ('LD', 1), ('LD 8', 1), ('LD 1 2', 1),
+                                    ('JMP nowhere', 1), ('JMP 16', 1), ('a: NOPF\na: NOPF', 2),
+                                    ('1a: NOPF', 1)):
+            with self.subTest(source=source):
+                with self.assertRaises(AssemblerError) as context:
+                    assemble(source)
+                self.assertEqual(context.exception.line_number, line_number)
+
+    def test_round_trip(self):
+        # every program word disassembles to source assembling to the same word
+        for layout in (WordLayout(), WordLayout(opcode_shift=8, write_bit=7, address_bits=7)):
+            words = list(range(1 << (layout.opcode_shift + 4)))
+            self.assertEqual(assemble(disassemble(words, layout), layout), words)
+
+    def test_disassemble_word(self):
+        self.assertEqual(disassemble_word(LAYOUT.encode(OPCODE.STOC, True, 5)), 'STOC 5')
+        self.assertEqual(disassemble_word(LAYOUT.encode(OPCODE.LD, True, 0)), 'LD 0 W')
+        self.assertEqual(disassemble_word(LAYOUT.encode(OPCODE.RTN, False, 0)), 'RTN')
+        self.assertEqual(disassemble_word((int(OPCODE.JMP) << 4) | 13), 'JMP 13')
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            contents = assemble(INVERTER_SOURCE, cache_dir=cache_dir)
+            files = os.listdir(cache_dir)
+            self.assertEqual(len(files), 1)
+            # a cached image is read back, not assembled again
+            path = os.path.join(cache_dir, files[0])
+            with open(path, 'r+b') as file:
+                file.write(bytes([0xE0]))
+            cached = assemble(INVERTER_SOURCE, cache_dir=cache_dir)
+            self.assertEqual(cached, [0xE0] + contents[1:])
+            # another layout or source is another cache entry
+            wide = WordLayout(opcode_shift=8, write_bit=7, address_bits=7)
+            self.assertEqual(assemble(INVERTER_SOURCE, wide, cache_dir=cache_dir)[1],
+                             wide.encode(OPCODE.STOC, True, 7))
+            assemble(INVERTER_SOURCE + 'NOPF\n', cache_dir=cache_dir)
+            self.assertEqual(len(os.listdir(cache_dir)), 3)
@@ -0,0 +1,109 @@
+import random
+import unittest
+
+from banks import LatchBank, SelectorBank
+from board import Board
+from mc14512b import MC14512B
+from mc14599b import MC14599B
+
+
+class TestLatchBank(unittest.TestCase):
+
+    def test_same_as_chips(self):
+        # GIVEN: 4 MC14599B with an address decoder, and a bank of 4 chips
+        inputs = {'enable': False, 'address': 0, 'write': False, 'data': False}
+        chips = []
+        for chip in range(4):
+            latch = MC14599B()
+            latch.connect_chip_enable(
+                lambda chip=chip: inputs['enable'] and inputs['address'] >> 3 == chip)
+            latch.connect_address_input(lambda: inputs['address'] & 7)
+            latch.connect_write_input(lambda: inputs['write'])
+            latch.connect_data_input(lambda: inputs['data'])
+            chips.append(latch)
+        bank = LatchBank(4)
+        bank.connect_chip_enable(lambda: inputs['enable'])
+        bank.connect_address_input(lambda: inputs['address'])
+        bank.connect_write_input(lambda: inputs['write'])
+        bank.connect_data_input(lambda: inputs['data'])
+        board = Board()
+        for device in chips + [bank]:
+            board.add_device(device)
+        # WHEN: clocking them with random inputs, addresses beyond the chips included
+        rng = random.Random(18)
+        for _ in range(2000):
+            inputs.update(enable=rng.random() < 0.9, address=rng.randrange(40),
+                          write=rng.random() < 0.7, data=rng.random() < 0.5)
+            board.run(1)
+            # THEN: the outputs are the same
+            self.assertEqual(bank.output_bytes(), bytes(latch.q for latch in chips))
+            self.assertEqual([bank.chip_q(chip) for chip in range(4)], [latch.q for latch in chips])
+            if inputs['address'] < 32:
+                self.assertEqual(bank.data, chips[inputs['address'] >> 3].data)
+            else:
+                self.assertIsNone(bank.data)
+        self.assertNotEqual(bank.q, 0)
+
+    def test_accessors_and_snapshot(self):
+        bank = LatchBank(16)
+        bank.q = 1 << 127 | 1 << 9 | 1 << 200
+        self.assertEqual(bank.q, 1 << 127 | 1 << 9)
+        self.assertTrue(bank.point(9))
+        self.assertFalse(bank.point(10))
+        self.assertEqual(bank.chip_q(15), 0x80)
+        snapshot = bank.snapshot()
+        bank.q = 0
+        bank.restore(snapshot)
+        self.assertEqual(bank.q, 1 << 127 | 1 << 9)
+
+    def test_trace(self):
+        bank = LatchBank(2)
+        bank.connect_chip_enable(lambda: True)
+        bank.connect_address_input(lambda: 13)
+        bank.connect_write_input(lambda: True)
+        bank.connect_data_input(lambda: True)
+        records = []
+        bank.subscribe(records.append)
+        bank.execute()
+        self.assertEqual([(record.address, record.value) for record in records], [(13, True)])
+        self.assertEqual(bank.q, 1 << 13)
+
+
+class TestSelectorBank(unittest.TestCase):
+
+    def test_same_as_chips(self):
+        rng = random.Random(19)
+        ports = [rng.randrange(256) for _ in range(3)]
+        address = 0
+        chips = []
+        for chip in range(3):
+            selector = MC14512B()
+            selector.connect_address_input(lambda: address & 7)
+            selector.connect_data_inputs(lambda chip=chip: ports[chip])
+            chips.append(selector)
+        wide = SelectorBank(3)
+        wide.connect_address_input(lambda: address)
+        wide.connect_data_inputs(lambda: ports[0] | ports[1] << 8 | ports[2] << 16)
+        per_chip = SelectorBank(3)
+        per_chip.connect_address_input(lambda: address)
+        for chip in range(3):
+            per_chip.connect_chip_inputs(chip, lambda chip=chip: ports[chip])
+        for address in range(24):
+            expected = chips[address >> 3].data
+            self.assertEqual(wide.data, expected)
+            self.assertEqual(per_chip.data, expected)
+        address = 24
+        self.assertIsNone(wide.data)
+        self.assertEqual(wide.select(range(26)), per_chip.select(range(26)))
+        self.assertEqual(wide.select([3, 30]), [chips[0].select([3])[0], None])
+
+    def test_not_connected(self):
+        bank = SelectorBank(2)
+        with self.assertRaises(RuntimeError):
+            bank.data
+        bank.connect_address_input(lambda: 9)
+        bank.connect_chip_inputs(0, lambda: 0xFF)
+        with self.assertRaises(RuntimeError):
+            bank.data
+        with self.assertRaises(ValueError):
+            bank.connect_chip_inputs(2, lambda: 0)
@@ -0,0 +1,42 @@
+import random
+import unittest
+
+from batch import BatchBoard, pack_planes, unpack_planes
+from mc14500b import OPCODE
+from tests.boards import INVERTER_PROGRAM, inverter_board
+
+
+class TestBatchBoard(unittest.TestCase):
+
+    def test_planes(self):
+        values = [0x00, 0xFF, 0xA5, 0x3C]
+        self.assertEqual(unpack_planes(pack_planes(values, 8), len(values)), values)
+
+    def test_inverter_all_inputs(self):
+        batch = BatchBoard(INVERTER_PROGRAM, range(256))
+        batch.run(16)
+        self.assertEqual(batch.latches, [~i & 0xFF for i in range(256)])
+
+    def test_matches_board(self):
+        # GIVEN: random programs, each run on a batch of random inputs
+        rng = random.Random(5)
+        for _ in range(20):
+            contents = [rng.randrange(256) for _ in range(16)]
+            for i in rng.sample(range(16), 3):
+                contents[i] = (contents[i] & 0x0F) | (int(OPCODE.SKZ) << 4)
+            inputs = [rng.randrange(256) for _ in range(20)]
+            clocks = rng.randrange(1, 50)
+            batch = BatchBoard(contents, inputs)
+            # WHEN: running the batch in two steps
+            batch.run(clocks // 2)
+            batch.run(clocks - clocks // 2)
+            # THEN: every board of the batch matches a separate Board
+            for lane, input_data in enumerate(inputs):
+                board, devices = inverter_board(input_data, contents=contents)
+                icu, latch = devices['icu'], devices['latch']
+                board.run(clocks)
+                with self.subTest(contents=contents, input_data=input_data, clocks=clocks):
+                    self.assertEqual(batch.latches[lane], latch.q)
+                    self.assertEqual(batch.states[lane], icu.state)
+                    self.assertEqual(batch.flags, icu.flags)
+                    self.assertEqual(batch.pc, clocks % 16)
@@ -1,3 +1,5 @@
+import pickle
+import random
 import unittest
 from rom import Rom
 from counter import Counter
@@ -5,9 +7,43 @@ from board import Board
 from mc14500b import MC14500B, OPCODE
 from mc14599b import MC14599B  # Output latch
 from mc14512b import MC14512B  # Data selector / multiplexer
+from tests.boards import LAYOUT, inverter_board, scan_board
 
 class TestBoard(unittest.TestCase):
 
+    def test_partial_devices(self):
+        # GIVEN: devices implementing only some of the duck typed methods
+        class FallOnly:
+            def __init__(self):
+                self.falls = 0
+            def clock_fall(self):
+                self.falls += 1
+
+        class RiseAndReset:
+            def __init__(self):
+                self.rises = 0
+            def clock_rise(self):
+                self.rises += 1
+            def reset(self):
+                self.rises = 0
+
+        board = Board()
+        fall_only = FallOnly()
+        rise_and_reset = RiseAndReset()
+        board.add_device(fall_only)
+        board.add_device(rise_and_reset)
+        board.add_device(MC14512B())  # no clock or reset methods at all
+        # WHEN: running the board
+        board.run(3)
+        # THEN: each device got the edges it implements
+        self.assertEqual(fall_only.falls, 3)
+        self.assertEqual(rise_and_reset.rises, 3)
+        # WHEN: resetting the board
+        board.reset()
+        # THEN: only the device with a reset method was reset
+        self.assertEqual(fall_only.falls, 3)
+        self.assertEqual(rise_and_reset.rises, 0)
+
     def test_counter_as_memory_address(self):
         ROM = [ 10, 11, 12, 13 ]
 
@@ -108,3 +144,341 @@ class TestBoard(unittest.TestCase):
         # Expect the latch to hold the inverted input data
         self.assertEqual(output_latch.q, ~input_data & 0xFF)
         print(f'Output data = {output_latch.q:#010b}')
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def history(self, board, icu, latch, cycles: int):
+        result = []
+        for _ in range(cycles):
+            board.run(1)
+            result.append((icu.state, icu.flags, latch.q))
+        return result
+
+    def test_rewind(self):
+        # GIVEN: a board running a random program, with a snapshot at cycle 21
+        rng = random.Random(10)
+        contents = [rng.randrange(256) for _ in range(16)]
+        board, devices = inverter_board(0b10110010, contents=contents)
+        icu, latch = devices['icu'], devices['latch']
+        board.run(21)
+        snapshot = board.snapshot()
+        self.assertEqual(snapshot.cycle, 21)
+        expected = self.history(board, icu, latch, 40)
+        # WHEN: restoring the snapshot and running again
+        board.restore(snapshot)
+        # THEN: the board runs exactly as it did after the snapshot
+        self.assertEqual(board.cycle, 21)
+        self.assertEqual(self.history(board, icu, latch, 40), expected)
+
+    def test_fork(self):
+        # GIVEN: a pickled snapshot of a warmed up board
+        rng = random.Random(11)
+        contents = [rng.randrange(256) for _ in range(16)]
+        board, devices = inverter_board(0b01101100, contents=contents)
+        icu, latch = devices['icu'], devices['latch']
+        board.run(35)
+        snapshot = pickle.loads(pickle.dumps(board.snapshot()))
+        expected = self.history(board, icu, latch, 20)
+        # WHEN: restoring it on a new board with the same devices
+        fork, devices = inverter_board(0b01101100, contents=contents)
+        fork_icu, fork_latch = devices['icu'], devices['latch']
+        fork.restore(snapshot)
+        # THEN: the new board continues where the first one was
+        self.assertEqual(self.history(fork, fork_icu, fork_latch, 20), expected)
+
+    def test_wrong_board(self):
+        board = Board()
+        board.add_device(Counter(bits=4))
+        snapshot = board.snapshot()
+        board.add_device(Counter(bits=4))
+        with self.assertRaises(ValueError):
+            board.restore(snapshot)
+
+
+class TestProfiling(unittest.TestCase):
+
+    def build(self):
+        # The inverter program for 8 bits, with a SKZ skipping the last store
+        contents = []
+        for bit in range(7, 0, -1):
+            contents.append(LAYOUT.encode(OPCODE.LD, False, bit))
+            contents.append(LAYOUT.encode(OPCODE.STOC, True, bit))
+        contents.append(LAYOUT.encode(OPCODE.SKZ, False, 0))
+        contents.append(LAYOUT.encode(OPCODE.STOC, True, 0))
+        board, devices = inverter_board(0b10100100, contents=contents)
+        return board, devices['icu'], devices['latch']
+
+    def test_report(self):
+        # GIVEN: a profiling board
+        board, icu, latch = self.build()
+        board.start_profiling()
+        self.assertTrue(board.profiling)
+        # WHEN: running 10 scans of 16 instructions
+        board.run(160)
+        report = board.stop_profiling()
+        # THEN: each device edge is counted on every cycle
+        self.assertEqual(report.cycles, 160)
+        self.assertEqual({(profile.device, profile.name) for profile in report.edges},
+                         {('MC14500B#0', 'clock_fall'), ('MC14500B#0', 'clock_rise'),
+                          ('Counter#2', 'clock_rise'), ('MC14599B#3', 'clock_fall'),
+                          ('MC14599B#3', 'clock_rise')})
+        self.assertTrue(all(profile.calls == 160 for profile in report.edges))
+        # AND: the inputs read by the devices, once per cycle for the ICU instructions
+        inputs = {(profile.device, profile.name): profile.calls for profile in report.inputs}
+        self.assertEqual(inputs['MC14500B#0', 'instruction'], 160)
+        self.assertEqual(inputs['Rom#1', 'address_input'], 160 * 4)
+        # AND: the instructions, skips and writes
+        self.assertEqual(report.instructions, 160)
+        self.assertEqual(report.opcodes[OPCODE.LD], 70)
+        self.assertEqual(report.opcodes[OPCODE.SKZ], 10)
+        self.assertEqual(report.skipped, 10)    # input 1 is 0, so RR is 0 at the SKZ
+        self.assertAlmostEqual(report.skip_rate, 10 / 160)
+        self.assertEqual(report.write_flags, 80)
+        self.assertEqual(report.latch_writes, 80)
+        self.assertIn('MC14500B#0', str(report))
+
+    def test_same_results(self):
+        # GIVEN: a profiled and an unprofiled board
+        board, icu, latch = self.build()
+        profiled, profiled_icu, profiled_latch = self.build()
+        profiled.start_profiling()
+        # WHEN: running them
+        board.run(100)
+        profiled.run(100)
+        # THEN: they end in the same state
+        self.assertEqual(profiled.snapshot(), board.snapshot())
+
+    def test_stop(self):
+        # GIVEN: a board that was profiled
+        board, icu, latch = self.build()
+        fall = list(board._fall)
+        get_instruction = icu._get_instruction
+        board.start_profiling()
+        self.assertNotEqual(board._fall, fall)
+        board.stop_profiling()
+        # THEN: it runs its original methods and inputs again, untraced
+        self.assertFalse(board.profiling)
+        self.assertEqual(board._fall, fall)
+        self.assertIs(icu._get_instruction, get_instruction)
+        self.assertFalse(icu.traced)
+        with self.assertRaises(RuntimeError):
+            board.stop_profiling()
+
+
+class TestScan(unittest.TestCase):
+
+    def build(self, input_data: int):
+        ''' A program with a subroutine call:
+            0: LD 0, 1: JMP 4, 2: STO 1 W, 3: NOPO, 4: STOC 0 W, 5: RTN
+            A scan runs the addresses 0 1 4 5 2 3 4 5.
+        '''
+        contents = [LAYOUT.encode(OPCODE.LD, False, 0), LAYOUT.encode_jump(OPCODE.JMP, 4),
+                    LAYOUT.encode(OPCODE.STO, True, 1), LAYOUT.encode(OPCODE.NOP0, False, 0),
+                    LAYOUT.encode(OPCODE.STOC, True, 0), LAYOUT.encode(OPCODE.RTN, False, 0)]
+        board, devices = scan_board(contents, input_data)
+        return board, devices['counter'], devices['latch']
+
+    def test_scans(self):
+        board, program_counter, latch = self.build(0b1)
+        addresses = []
+        for _ in range(8):
+            addresses.append(program_counter.count)
+            board.run(1)
+        self.assertEqual(addresses, [0, 1, 4, 5, 2, 3, 4, 5])
+        self.assertEqual(program_counter.scans, 1)
+        self.assertEqual(latch.q, 0b10)
+        result = board.scan(3)
+        self.assertEqual(result.scans, 3)
+        self.assertEqual(result.cycles, 24)
+        self.assertEqual(result.cycles_per_scan, 8)
+        self.assertEqual(board.cycle, 32)
+        self.assertEqual(program_counter.scans, 4)
+
+    def test_traced_scans(self):
+        board, program_counter, latch = self.build(0b0)
+        records = []
+        board.subscribe(lambda cycle, record: records.append(record))
+        self.assertEqual(board.scan(2).cycles, 16)
+        self.assertEqual(latch.q, 0b01)
+        self.assertEqual(len(records), 16 + 6)  # 16 instructions, 6 latch writes
+
+    def test_max_cycles(self):
+        board, _, _ = self.build(0)
+        with self.assertRaises(RuntimeError):
+            board.scan(2, max_cycles=10)
+        self.assertEqual(board.cycle, 10)
+        with self.assertRaises(RuntimeError):
+            Board().scan()
+
+    def test_jump_to_start(self):
+        # GIVEN: a program looping with a JMP 0 before the end of the ROM
+        contents = [LAYOUT.encode(OPCODE.LD, False, 0), LAYOUT.encode(OPCODE.STOC, True, 0),
+                    LAYOUT.encode_jump(OPCODE.JMP, 0), LAYOUT.encode(OPCODE.STO, True, 0)]
+        board, devices = scan_board(contents, 0b1)
+        # WHEN: scanning, THEN: the jump completes the scan
+        self.assertEqual(board.scan(2).cycles_per_scan, 3)
+        self.assertEqual(devices['latch'].q, 0)
+
+    def test_default_max_cycles(self):
+        # GIVEN: a program stuck in a loop that never goes back to address 0
+        contents = [LAYOUT.encode(OPCODE.NOP0, False, 0), LAYOUT.encode_jump(OPCODE.JMP, 1)]
+        board, _ = scan_board(contents, 0)
+        # WHEN: scanning, THEN: it fails after 4 cycles per word
+        with self.assertRaises(RuntimeError):
+            board.scan()
+        self.assertEqual(board.cycle, 8)
+
+
+class TestFastForward(unittest.TestCase):
+
+    def test_same_state(self):
+        # GIVEN: boards running random programs
+        rng = random.Random(12)
+        for _ in range(20):
+            contents = [rng.randrange(256) for _ in range(16)]
+            input_data = rng.randrange(256)
+            board, devices = inverter_board(input_data, contents=contents)
+            icu, latch = devices['icu'], devices['latch']
+            fast, devices = inverter_board(input_data, contents=contents)
+            fast_icu, fast_latch = devices['icu'], devices['latch']
+            # WHEN: running and fast forwarding the same number of cycles
+            clocks = rng.randrange(1000, 5000)
+            board.run(clocks)
+            result = fast.fast_forward(clocks, stride=rng.choice((16, 48, 100)))
+            # THEN: the boards end in the same state
+            self.assertEqual(fast.snapshot(), board.snapshot())
+            self.assertEqual(result.simulated + result.skipped, clocks)
+            self.assertIsNotNone(result.period)
+
+    def test_long_run(self):
+        # GIVEN: a board with a period of one scan, WHEN: fast forwarding 10**12 cycles
+        board, devices = inverter_board(0b10, contents=[0x11, 0x99, 0x10, 0x98])
+        icu, latch = devices['icu'], devices['latch']
+        result = board.fast_forward(10**12, stride=16)
+        # THEN: a few cycles are simulated, and the rest is skipped
+        self.assertEqual(board.cycle, 10**12)
+        self.assertLess(result.simulated, 100)
+        self.assertEqual(result.period % 16, 0)
+        self.assertEqual(latch.q, 0b01)
+
+    def test_scans(self):
+        # GIVEN: a board with a ProgramCounter, of which the scan count keeps increasing
+        board, program_counter, latch = TestScan().build(0b1)
+        reference, reference_counter, _ = TestScan().build(0b1)
+        # WHEN: fast forwarding
+        result = board.fast_forward(10_003, stride=8)
+        reference.run(10_003)
+        # THEN: the skipped periods are counted as scans
+        self.assertGreater(result.skipped, 0)
+        self.assertEqual(program_counter.scans, reference_counter.scans)
+        self.assertEqual(board.snapshot(), reference.snapshot())
+
+    def test_changing_inputs(self):
+        # GIVEN: a board whose input is a state the board doesn't know about
+        inputs = [0]
+        contents = [0x11, 0x99, 0x10, 0x98]
+        board, devices = inverter_board(0, contents=contents)
+        icu, latch = devices['icu'], devices['latch']
+        board._devices[4].connect_data_inputs(lambda: inputs[0])
+        # WHEN: passing it as `inputs`
+        board.fast_forward(1000, stride=16, inputs=lambda: inputs[0])
+        self.assertEqual(latch.q, 0b11)
+        inputs[0] = 0b11
+        board.fast_forward(1000, stride=16, inputs=lambda: inputs[0])
+        # THEN: the board follows the input change
+        self.assertEqual(latch.q, 0b00)
+
+    def test_traced(self):
+        # GIVEN: a traced board, THEN: all cycles are simulated
+        board, devices = inverter_board(0b10, contents=[0x11, 0x99, 0x10, 0x98])
+        icu, latch = devices['icu'], devices['latch']
+        records = []
+        board.subscribe(lambda cycle, record: records.append(record))
+        self.assertEqual(board.fast_forward(100).skipped, 0)
+        self.assertEqual(len([record for record in records if record.device is icu]), 100)
+
+    def test_device_without_snapshot(self):
+        class Toggle:
+            def clock_rise(self):
+                pass
+        board = Board()
+        board.add_device(Toggle())
+        with self.assertRaises(ValueError):
+            board.fast_forward(10)
+
+
+class TestEventDriven(unittest.TestCase):
+
+    def build(self, event_driven: bool):
+        ''' A counter and ROM driving latch addresses and data, and two latches
+            with rarely changing inputs.
+        '''
+        self.status = 0
+        board = Board(event_driven=event_driven)
+        counter = Counter(bits=4)
+        rom = Rom(data_bits=8, address_bits=4, contents=[(i * 37) & 0xFF for i in range(16)])
+        rom.connect_address_input(lambda: counter.count)
+        busy = MC14599B()
+        busy.connect_chip_enable(lambda: True)
+        busy.connect_address_input(lambda: rom.data & 7)
+        busy.connect_data_input(lambda: (rom.data >> 3) & 1)
+        busy.connect_write_input(lambda: (rom.data >> 4) & 1)
+        board.add_device(counter)
+        board.add_device(rom)
+        board.add_device(busy, reads=[lambda: True, lambda: rom.data & 7,
+                                      lambda: (rom.data >> 3) & 1, lambda: (rom.data >> 4) & 1])
+        latches = [busy]
+        for i in range(2):
+            idle = MC14599B()
+            idle.connect_chip_enable(lambda i=i: (self.status >> (4 + i)) & 1)
+            idle.connect_address_input(lambda: self.status & 7)
+            idle.connect_data_input(lambda: (self.status >> 3) & 1)
+            idle.connect_write_input(lambda: True)
+            board.add_device(idle, reads=[lambda i=i: (self.status >> (4 + i)) & 1,
+                                          lambda: self.status & 7,
+                                          lambda: (self.status >> 3) & 1,
+                                          lambda: True])
+            latches.append(idle)
+        return board, latches
+
+    def test_same_as_full_sweep(self):
+        full, full_latches = self.build(event_driven=False)
+        events, event_latches = self.build(event_driven=True)
+        self.assertTrue(events.event_driven)
+        statuses = [0, 0, 0x19, 0x19, 0x19, 0x2E, 0x00, 0x3F, 0x3F, 0x12]
+        for cycle in range(100):
+            self.status = statuses[(cycle // 7) % len(statuses)]
+            full.run(1)
+            events.run(1)
+            for full_latch, event_latch in zip(full_latches, event_latches):
+                self.assertEqual(event_latch.q, full_latch.q)
+                self.assertEqual(event_latch.data, full_latch.data)
+        self.assertNotEqual(event_latches[1].q, 0)
+        # after a reset, all devices are clocked again
+        full.reset()
+        events.reset()
+        full.clock_fall()
+        full.clock_rise()
+        events.clock_fall()
+        events.clock_rise()
+        for full_latch, event_latch in zip(full_latches, event_latches):
+            self.assertEqual(event_latch.q, full_latch.q)
+
+    def test_unchanged_inputs_are_not_clocked(self):
+        clocks = []
+
+        class Device:
+            def clock_fall(self):
+                clocks.append('fall')
+            def clock_rise(self):
+                clocks.append('rise')
+
+        board = Board(event_driven=True)
+        value = 0
+        board.add_device(Device(), reads=[lambda: value])
+        board.run(3)
+        self.assertEqual(clocks, ['fall', 'rise'])
+        value = 1
+        board.run(3)
+        self.assertEqual(clocks, ['fall', 'rise'] * 2)
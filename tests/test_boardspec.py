@@ -0,0 +1,78 @@
+import pickle
+import unittest
+
+from boardspec import BoardSpec
+from mc14599b import MC14599B
+from tests.boards import INVERTER_PROGRAM
+
+
+def inverter_spec(event_driven: bool = False) -> BoardSpec:
+    ''' The inverter board as a BoardSpec, built with an input_data parameter '''
+    spec = BoardSpec(event_driven)
+    spec.add_device('icu', 'MC14500B')
+    spec.add_device('rom', 'Rom', data_bits=8, address_bits=4, contents=INVERTER_PROGRAM)
+    spec.add_device('counter', 'Counter', bits=4)
+    spec.add_device('latch', 'MC14599B')
+    spec.add_device('selector', 'MC14512B')
+    spec.connect('rom', 'address_input', 'counter.count')
+    spec.connect('icu', 'instruction_input', '(rom.data >> 4) & 0x0F')
+    spec.connect('icu', 'data_input', 'selector.data')
+    spec.connect('latch', 'data_input', 'icu.data')
+    spec.connect('latch', 'address_input', 'rom.data & 0x07')
+    spec.connect('latch', 'chip_enable', 'True')
+    spec.connect('latch', 'write_input', '(rom.data >> 3) & 1')
+    spec.connect('selector', 'address_input', 'rom.data & 0x07')
+    spec.connect('selector', 'data_inputs', 'input_data')
+    return spec
+
+
+class TestBoardSpec(unittest.TestCase):
+
+    def test_inverter(self):
+        # GIVEN: the inverter board spec, sent through pickle
+        spec = pickle.loads(pickle.dumps(inverter_spec()))
+        # WHEN: building and running it with an input parameter
+        board, devices = spec.build(input_data=0b11110000)
+        board.run(16)
+        # THEN: the latch holds the inverted input
+        self.assertEqual(devices['latch'].q, 0b00001111)
+
+    def test_configure(self):
+        spec = inverter_spec()
+        # store only the lower nibble
+        variant = spec.configure('rom', contents=INVERTER_PROGRAM[8:])
+        board, devices = variant.build(input_data=0b10100101)
+        board.run(16)
+        self.assertEqual(devices['latch'].q, 0b00001010)
+        # the original spec is unchanged
+        board, devices = spec.build(input_data=0b10100101)
+        board.run(16)
+        self.assertEqual(devices['latch'].q, 0b01011010)
+
+    def test_indexed_inputs_and_reads(self):
+        spec = BoardSpec(event_driven=True)
+        spec.add_device('selector', 'MC14512B')
+        spec.add_device('latch', 'mc14599b:MC14599B',
+                        reads=['True', 'address', 'selector.data', 'True'])
+        for i in range(8):
+            spec.connect('selector', 'data_input', f'(value >> {7 - i}) & 1', index=i)
+        spec.connect('selector', 'address_input', 'address')
+        spec.connect('latch', 'chip_enable', 'True')
+        spec.connect('latch', 'address_input', 'address')
+        spec.connect('latch', 'data_input', 'selector.data')
+        spec.connect('latch', 'write_input', 'True')
+        board, devices = spec.build(value=0b00000001, address=7)
+        self.assertIsInstance(devices['latch'], MC14599B)
+        board.run(1)
+        self.assertEqual(devices['latch'].q, 0b10000000)
+
+    def test_errors(self):
+        spec = BoardSpec()
+        spec.add_device('counter', 'Counter', bits=4)
+        with self.assertRaises(ValueError):
+            spec.add_device('counter', 'Counter', bits=4)
+        with self.assertRaises(ValueError):
+            spec.connect('rom', 'address_input', 'counter.count')
+        spec.add_device('thing', 'Thing')
+        with self.assertRaises(ValueError):
+            spec.build()
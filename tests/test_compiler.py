@@ -0,0 +1,40 @@
+import random
+import unittest
+
+from compiler import compile_program
+from mc14500b import OPCODE, RESET_STATE
+from tests.boards import INVERTER_PROGRAM, inverter_board
+
+
+class TestCompiler(unittest.TestCase):
+
+    def test_inverter(self):
+        program = compile_program(INVERTER_PROGRAM)
+        latches, state = program.run(0b11110000)
+        self.assertEqual(latches, 0b00001111)
+
+    def test_matches_board(self):
+        # GIVEN: random programs and random inputs
+        rng = random.Random(4)
+        for _ in range(200):
+            contents = [rng.randrange(256) for _ in range(16)]
+            # make skips and output disables likely
+            for i in rng.sample(range(16), 3):
+                contents[i] = (contents[i] & 0x0F) | (int(OPCODE.SKZ) << 4)
+            input_data = rng.randrange(256)
+            scans = rng.randrange(1, 4)
+            board, devices = inverter_board(input_data, contents=contents)
+            icu, latch = devices['icu'], devices['latch']
+            program = compile_program(contents)
+            # WHEN: running both for a number of passes
+            board.run(16 * scans)
+            latches, state = program.run(input_data, 0, RESET_STATE, scans)
+            # THEN: latches, MC14500B state and flags are equal
+            with self.subTest(contents=contents, input_data=input_data):
+                self.assertEqual(latches, latch.q)
+                self.assertEqual(state, icu.state)
+                self.assertEqual(program.flags, icu.flags)
+
+    def test_empty_program(self):
+        with self.assertRaises(ValueError):
+            compile_program([])
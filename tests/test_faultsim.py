@@ -0,0 +1,142 @@
+import random
+import unittest
+
+from faultsim import Fault, all_faults, simulate_faults
+from layout import WordLayout
+from mc14500b import FLAG_JMP, FLAG_WR, MC14500B, OPCODE, STATE_IEN, STATE_OEN, STATE_RR
+from tests.boards import INVERTER_PROGRAM, LAYOUT, inverter_board, random_program
+
+
+class StuckMC14500B(MC14500B):
+    ''' MC14500B with state bits stuck at 0 (mask0) or 1 (mask1) '''
+    __slots__ = ()
+    mask0 = 0
+    mask1 = 0
+
+    def __init__(self):
+        MC14500B.__init__(self)
+        self._state = (self._state & ~self.mask0) | self.mask1
+
+    def clock_fall(self):
+        MC14500B.clock_fall(self)
+        self._state = (self._state & ~self.mask0) | self.mask1
+
+
+def faulty_board(contents: list[int], fault: Fault | None, inputs: list[int]):
+    ''' The board of test_execute_14500_from_rom with a fault. Returns the
+        board and a function returning the (faulty) latch outputs.
+    '''
+    contents = list(contents)
+    force0 = force1 = 0
+    input0 = input1 = 0
+    icu_class = MC14500B
+    if fault is not None:
+        if fault.site == 'rom':
+            word = contents[fault.location]
+            contents[fault.location] = (word & ~(1 << fault.bit)) | (fault.value << fault.bit)
+        elif fault.site == 'input':
+            input0, input1 = (0, 1 << fault.location) if fault.value else (1 << fault.location, 0)
+        elif fault.site == 'latch':
+            force0, force1 = (0, 1 << fault.location) if fault.value else (1 << fault.location, 0)
+        elif fault.site == 'state':
+            masks = {'mask0': 0, 'mask1': fault.location} if fault.value else \
+                {'mask0': fault.location, 'mask1': 0}
+            icu_class = type('Stuck', (StuckMC14500B,), masks)
+    board, devices = inverter_board(lambda: (inputs[0] & ~input0) | input1, contents=contents,
+                                    icu_class=icu_class)
+    latch = devices['latch']
+    return board, lambda: (latch.q & ~force0) | force1
+
+
+def serial_campaign(contents, vectors, faults) -> dict:
+    ''' The vector first detecting each fault, running a Board per fault '''
+    good_inputs = [0]
+    good, good_q = faulty_board(contents, None, good_inputs)
+    expected = []
+    for vector in vectors:
+        good_inputs[0] = vector
+        good.run(16)
+        expected.append(good_q())
+    detected = {}
+    for fault in faults:
+        inputs = [0]
+        board, q = faulty_board(contents, fault, inputs)
+        for index, vector in enumerate(vectors):
+            inputs[0] = vector
+            board.run(16)
+            if q() != expected[index]:
+                detected[fault] = index
+                break
+    return detected
+
+
+class TestFaultSimulation(unittest.TestCase):
+
+    def test_all_faults(self):
+        contents = [0x1F, 0x98]
+        faults = all_faults(contents)
+        self.assertEqual(len(faults), 2 * 8 + 16 + 16 + 6)
+        self.assertIn(Fault('rom', 0, 5, 1), faults)   # bit 5 of 0x1F is 0
+        self.assertNotIn(Fault('rom', 0, 4, 1), faults)
+        self.assertEqual(len(all_faults(contents, flags=True)), len(faults) + 10)
+        self.assertEqual(str(Fault('state', STATE_OEN, 0, 1)), 'register OEN stuck-at-1')
+
+    def test_matches_serial(self):
+        # GIVEN: random programs with random test vectors
+        rng = random.Random(14)
+        for _ in range(6):
+            contents = random_program(rng)
+            vectors = [rng.randrange(256) for _ in range(6)]
+            faults = all_faults(contents)
+            # WHEN: simulating all faults at once, and one board per fault
+            report = simulate_faults(contents, vectors)
+            # THEN: the same faults are detected by the same vectors
+            self.assertEqual(report.detected, serial_campaign(contents, vectors, faults))
+            # AND: in passes of a few boards
+            self.assertEqual(simulate_faults(contents, vectors, lanes_per_pass=7).detected,
+                             report.detected)
+
+    def test_inverter(self):
+        # GIVEN: the inverter program, WHEN: testing with 0x00 and 0xFF
+        report = simulate_faults(INVERTER_PROGRAM, [0x00, 0xFF])
+        # THEN: the coverage grows with each vector
+        coverage = report.coverage_per_vector()
+        self.assertEqual(len(coverage), 2)
+        self.assertLess(coverage[0], coverage[1])
+        self.assertEqual(sum(report.detected_per_vector()), len(report.detected))
+        # AND: the stuck inputs and latches are all detected
+        for fault in report.faults:
+            if fault.site in ('input', 'latch'):
+                self.assertIn(fault, report.detected)
+        # AND: RR stuck-at-0 is found by the second vector, the first one writes 1s anyway
+        self.assertEqual(report.detected[Fault('state', STATE_RR, 0, 0)], 1)
+        self.assertIn(Fault('state', STATE_IEN, 0, 1), report.undetected)
+        self.assertEqual(report.coverage, len(report.detected) / len(report.faults))
+
+    def test_flags(self):
+        # GIVEN: a program without JMP, but with a store
+        contents = [LAYOUT.encode(OPCODE.LD, False, 0), LAYOUT.encode(OPCODE.STO, True, 0)]
+        faults = [Fault('flag', FLAG_JMP, 0, 1), Fault('flag', FLAG_WR, 0, 0)]
+        # WHEN: observing the flags, THEN: the stuck flags are detected
+        report = simulate_faults(contents, [0], faults=faults, observe_flags=True)
+        self.assertEqual(report.coverage, 1.0)
+        # AND: not without observing them
+        self.assertEqual(simulate_faults(contents, [0], faults=faults).coverage, 0.0)
+
+    def test_wide_layout(self):
+        # GIVEN: a program of the 128 point layout, storing input 9 in latch 9
+        layout = WordLayout(opcode_shift=8, write_bit=7, address_bits=7)
+        contents = [layout.encode(OPCODE.LD, False, 9), layout.encode(OPCODE.STO, True, 9)]
+        faults = all_faults(contents, layout)
+        self.assertEqual(len(faults), 2 * 12 + 4 * 128 + 6)
+        # WHEN: testing with input 9 low and high
+        report = simulate_faults(contents, [0, 1 << 9], layout=layout)
+        # THEN: the faults of input and latch 9 are detected, not those of input 1
+        for value in (0, 1):
+            self.assertIn(Fault('input', 9, 0, value), report.detected)
+            self.assertIn(Fault('latch', 9, 0, value), report.detected)
+            self.assertIn(Fault('input', 1, 0, value), report.undetected)
+
+
+if __name__ == '__main__':
+    unittest.main()
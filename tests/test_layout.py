@@ -0,0 +1,27 @@
+import unittest
+
+from layout import WordLayout
+from mc14500b import OPCODE
+
+
+class TestWordLayout(unittest.TestCase):
+
+    def test_default_layout(self):
+        layout = WordLayout()
+        word = layout.encode(OPCODE.STOC, True, 5)
+        self.assertEqual(word, 0x9D)
+        self.assertEqual(layout.decode(word), (int(OPCODE.STOC), True, 5))
+
+    def test_wide_address(self):
+        layout = WordLayout(opcode_shift=8, write_bit=7, address_bits=7)
+        word = layout.encode(OPCODE.JMP, False, 100)
+        self.assertEqual(layout.decode(word), (int(OPCODE.JMP), False, 100))
+        # the address is truncated to its field
+        self.assertEqual(layout.address(layout.encode(OPCODE.LD, False, 200)), 200 & 127)
+
+    def test_jump_address(self):
+        layout = WordLayout()
+        word = layout.encode_jump(OPCODE.JMP, 13)
+        self.assertEqual(word, 0xCD)
+        self.assertEqual(layout.opcode(word), int(OPCODE.JMP))
+        self.assertEqual(layout.jump_address(word), 13)
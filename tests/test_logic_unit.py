@@ -0,0 +1,43 @@
+import unittest
+
+from logic_unit import USES_DATA, logic_functions, plane_functions
+from mc14500b import MC14500B, OPCODE, STATE_RR
+
+
+class TestLogicUnit(unittest.TestCase):
+
+    def test_bits(self):
+        # GIVEN: each logic instruction, RR and input data
+        functions = plane_functions(1)
+        self.assertLessEqual(set(functions), USES_DATA)
+        for opcode, function in functions.items():
+            for rr in (0, 1):
+                for data in (0, 1):
+                    # WHEN: executing it on an MC14500B
+                    mc = MC14500B()
+                    mc.connect_data_input(lambda: rr)
+                    mc.connect_instruction_input(lambda: OPCODE.LD)
+                    mc.execute()
+                    mc.connect_data_input(lambda: data)
+                    mc.connect_instruction_input(lambda: opcode)
+                    mc.execute()
+                    # THEN: the function gives the same RR
+                    self.assertEqual(function(rr, data), mc.state & STATE_RR,
+                                     (OPCODE(opcode), rr, data))
+
+    def test_planes(self):
+        # GIVEN: the lanes of all combinations of RR and data, THEN: each
+        # lane of a plane function is the function of the lane's bits
+        rr, data, ones = 0b1100, 0b1010, 0b1111
+        bits = plane_functions(1)
+        for opcode, function in plane_functions(ones).items():
+            plane = function(rr, data)
+            self.assertEqual(plane & ~ones, 0)
+            for lane in range(4):
+                self.assertEqual((plane >> lane) & 1,
+                                 bits[opcode]((rr >> lane) & 1, (data >> lane) & 1))
+        # AND: any domain works, like bools
+        functions = logic_functions(lambda a: not a, lambda a, b: a and b,
+                                    lambda a, b: a or b, lambda a, b: a == b)
+        self.assertEqual([functions[int(OPCODE.ORC)](False, data) for data in (False, True)],
+                         [True, False])
@@ -1,3 +1,5 @@
+import random
+import mc14500b
 from mc14500b import MC14500B, OPCODE
 import unittest
 
@@ -119,3 +121,161 @@ class TestMC14500B(unittest.TestCase):
         self.opcode = OPCODE.STOC
         self.mc.execute()
         self.assertEqual(self.mc.data, True)
+
+    def test_packed(self):
+        # GIVEN: an STO with output enabled, WHEN: clocking it in
+        self.opcode = OPCODE.OEN
+        self.input_data = True
+        self.mc.execute()
+        self.opcode = OPCODE.STO
+        self.mc.clock_fall()
+        # THEN: the packed value holds the opcode, state and flags
+        self.assertEqual(self.mc.packed(),
+                         int(OPCODE.STO) | (self.mc.state << 4) | (self.mc.flags << 9))
+        self.assertTrue((self.mc.packed() >> 9) & mc14500b.FLAG_WR)
+
+
+    def test_flags_of(self):
+        # GIVEN: each instruction, WHEN: executed with output enabled
+        for opcode in OPCODE:
+            mc = MC14500B()
+            mc.connect_instruction_input(lambda: opcode)
+            mc.execute()
+            # THEN: the flags after the rising edge are those of the opcode
+            self.assertEqual(mc.flags, mc14500b.flags_of(opcode), opcode)
+        self.assertEqual(mc14500b.flags_of(int(OPCODE.JMP)), mc14500b.FLAG_JMP)
+
+class ReferenceMC14500B:
+    ''' The match based implementation of MC14500B.clock_fall, before it
+        was replaced by the execution table. Kept as a reference.
+    '''
+    def __init__(self):
+        self._rr = False
+        self._opcode = OPCODE.NOP0
+        self._input_enable = True
+        self._output_enable = True
+        self._input_data = False
+        self._output_data = False
+        self.jmp_flag = False
+        self.rtn_flag = False
+        self.skz_flag = False
+        self.o_flag = False
+        self.f_flag = False
+        self.wr_flag = False
+        self._get_instruction = None
+        self._get_data = None
+
+    def clock_fall(self):
+        if self._get_instruction:
+            self._opcode = OPCODE(self._get_instruction())
+        if self._get_data:
+            self._input_data = self._input_enable and bool(self._get_data())
+
+        self.jmp_flag = self._opcode == OPCODE.JMP
+        self.rtn_flag = self._opcode == OPCODE.RTN
+        self.o_flag = self._opcode == OPCODE.NOP0
+        self.f_flag = self._opcode == OPCODE.NOPF
+        self.wr_flag = self._output_enable and self._opcode in {OPCODE.STO, OPCODE.STOC}
+        if self.skz_flag and not self._rr:
+            self.skz_flag = False
+            return
+        self.skz_flag = self._opcode == OPCODE.SKZ
+
+        match self._opcode:
+            case OPCODE.LD:
+                self._rr = self._input_data
+            case OPCODE.LDC:
+                self._rr = not self._input_data
+            case OPCODE.AND:
+                self._rr = self._rr and self._input_data
+            case OPCODE.ANDC:
+                self._rr = self._rr and (not self._input_data)
+            case OPCODE.OR:
+                self._rr = self._rr or self._input_data
+            case OPCODE.ORC:
+                self._rr = self._rr or (not self._input_data)
+            case OPCODE.XNOR:
+                self._rr = self._rr == self._input_data
+            case OPCODE.IEN:
+                self._input_enable = self._input_data
+            case OPCODE.OEN:
+                self._output_enable = self._input_data
+            case _:
+                pass
+        if self._opcode == OPCODE.STOC:
+            self._output_data = not self._rr
+        else:
+            self._output_data = self._rr
+
+    def clock_rise(self):
+        self.wr_flag = False
+
+    @property
+    def data(self):
+        if self._output_enable:
+            return self._output_data
+        return None
+
+
+class TestExecutionTable(unittest.TestCase):
+
+    def assertSameBehavior(self, mc, reference):
+        self.assertEqual(mc.data, reference.data)
+        self.assertEqual(mc.jmp_flag, bool(reference.jmp_flag))
+        self.assertEqual(mc.rtn_flag, bool(reference.rtn_flag))
+        self.assertEqual(mc.o_flag, bool(reference.o_flag))
+        self.assertEqual(mc.f_flag, bool(reference.f_flag))
+        self.assertEqual(mc.wr_flag, bool(reference.wr_flag))
+        self.assertEqual(mc.skz_flag, bool(reference.skz_flag))
+        self.assertEqual(bool(mc._state & mc14500b.STATE_RR), bool(reference._rr))
+        self.assertEqual(bool(mc._state & mc14500b.STATE_IEN), bool(reference._input_enable))
+
+    def test_exhaustive(self):
+        # Every opcode, on every input and every state, must behave like the
+        # reference implementation.
+        for opcode in OPCODE:
+            for data in (False, True):
+                for state in range(32):
+                    with self.subTest(opcode=opcode, data=data, state=state):
+                        mc = MC14500B()
+                        mc._state = state
+                        reference = ReferenceMC14500B()
+                        reference._rr = bool(state & mc14500b.STATE_RR)
+                        reference._input_enable = bool(state & mc14500b.STATE_IEN)
+                        reference._output_enable = bool(state & mc14500b.STATE_OEN)
+                        reference._output_data = bool(state & mc14500b.STATE_OUT)
+                        reference.skz_flag = bool(state & mc14500b.STATE_SKZ)
+                        for device in (mc, reference):
+                            device._get_instruction = lambda: opcode
+                            device._get_data = lambda: data
+                        mc.clock_fall()
+                        reference.clock_fall()
+                        self.assertSameBehavior(mc, reference)
+                        self.assertEqual(mc._state, mc14500b._EXECUTE[
+                            (int(opcode) << 6) | (int(data) << 5) | state][0])
+                        mc.clock_rise()
+                        reference.clock_rise()
+                        self.assertSameBehavior(mc, reference)
+
+    def test_random_program(self):
+        # A long random instruction stream, given as plain integers, gives
+        # the same outputs on both implementations.
+        rng = random.Random(14500)
+        mc = MC14500B()
+        reference = ReferenceMC14500B()
+        for device in (mc, reference):
+            device._get_instruction = lambda: instruction
+            device._get_data = lambda: data
+        for _ in range(5000):
+            instruction = rng.randrange(16)
+            data = rng.random() < 0.5
+            mc.execute()
+            reference.clock_fall()
+            reference.clock_rise()
+            self.assertSameBehavior(mc, reference)
+
+    def test_invalid_instruction(self):
+        mc = MC14500B()
+        mc.connect_instruction_input(lambda: 16)
+        with self.assertRaises(ValueError):
+            mc.execute()
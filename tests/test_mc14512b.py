@@ -30,3 +30,41 @@ class TestMC14512B(unittest.TestCase):
             for i in range(8):
                 self.address = i
                 self.assertEqual(self.device.data, bool((self.data >> i) & 1))
+
+    def test_select(self):
+        self.data = 0b10010110
+        # addresses wrap around
+        self.assertEqual(self.device.select([0, 1, 2, 4, 7, 8]),
+                         [False, True, True, True, True, False])
+        # also with inputs connected one by one
+        self.device.connect_data_input(0, lambda: True)
+        self.assertEqual(self.device.select(range(8)),
+                         [True, True, True, False, True, False, False, True])
+
+    def test_port_reads_source_once(self):
+        reads = []
+        device = MC14512B()
+        device.connect_address_input(lambda: 3)
+        device.connect_data_inputs(lambda: reads.append(1) or 0b1000)
+        self.assertTrue(device.data)
+        self.assertEqual(device.select(range(8)), [i == 3 for i in range(8)])
+        self.assertEqual(len(reads), 2)
+
+    def test_not_connected(self):
+        device = MC14512B()
+        device.connect_data_inputs(lambda: 0xFF)
+        with self.assertRaises(RuntimeError):
+            device.data
+        device = MC14512B()
+        device.connect_address_input(lambda: 2)
+        device.connect_data_input(1, lambda: True)
+        with self.assertRaises(RuntimeError):
+            device.data
+
+    def test_port_error(self):
+        # GIVEN: a port source raising TypeError, THEN: the error is not hidden
+        device = MC14512B()
+        device.connect_address_input(lambda: 0)
+        device.connect_data_inputs(lambda: None + 1)
+        with self.assertRaises(TypeError):
+            device.data
@@ -67,3 +67,23 @@ class TestMC14599B(unittest.TestCase):
         self.address_input = 0
         self.mc.execute()
         self.assertEqual(self.mc.q, 1)
+
+    def test_individual_outputs(self):
+        self.data_input = True
+        self.write_input = True
+        for address in (1, 4, 6):
+            self.address_input = address
+            self.mc.execute()
+        outputs = [self.mc.q0, self.mc.q1, self.mc.q2, self.mc.q3,
+                   self.mc.q4, self.mc.q5, self.mc.q6, self.mc.q7]
+        self.assertEqual(outputs, [False, True, False, False, True, False, True, False])
+        # clearing a latch
+        self.data_input = False
+        self.address_input = 4
+        self.mc.execute()
+        self.assertEqual(self.mc.q, 0b01000010)
+        # reading the addressed latch
+        self.write_input = False
+        self.address_input = 6
+        self.mc.execute()
+        self.assertIs(self.mc.data, True)
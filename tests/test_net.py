@@ -0,0 +1,75 @@
+import unittest
+
+from board import Board
+from counter import Counter
+from net import Bus, Net
+from rom import Rom
+
+
+class TestNet(unittest.TestCase):
+
+    def setUp(self):
+        self.value = 0
+        self.reads = 0
+
+    def source(self):
+        self.reads += 1
+        return self.value
+
+    def test_not_on_board(self):
+        # GIVEN: a net that isn't added to a board
+        net = Net(self.source)
+        # THEN: every read evaluates the source
+        self.assertEqual(net(), 0)
+        self.value = 1
+        self.assertEqual(net(), 1)
+        self.assertEqual(self.reads, 2)
+
+    def test_cached_per_phase(self):
+        # GIVEN: a net added to a board
+        board = Board()
+        net = Net(self.source)
+        board.add_net(net)
+        # WHEN: reading it twice in the same phase
+        board.clock_fall()
+        self.assertEqual(net(), 0)
+        self.value = 1
+        # THEN: the source is evaluated once
+        self.assertEqual(net(), 0)
+        self.assertEqual(self.reads, 1)
+        # WHEN: the next edge is applied
+        board.clock_rise()
+        # THEN: the net is evaluated again
+        self.assertEqual(net(), 1)
+        self.assertEqual(self.reads, 2)
+
+    def test_bus_fields(self):
+        board = Board()
+        bus = Bus(self.source, 8)
+        opcode = bus.field(4, 4)
+        low = bus.field(0, 3)
+        board.add_net(bus)
+        self.value = 0x9D
+        board.run(1)
+        self.assertEqual(opcode(), 9)
+        self.assertEqual(low(), 5)
+        self.assertEqual(bus(), 0x9D)
+        # all fields are evaluated together with the bus
+        self.assertEqual(self.reads, 1)
+        with self.assertRaises(ValueError):
+            bus.field(6, 4)
+
+    def test_connected_to_device(self):
+        # GIVEN: a ROM whose address input is connected to a counter net
+        board = Board()
+        counter = Counter(bits=2)
+        rom = Rom(data_bits=4, address_bits=2, contents=[3, 2, 1, 0])
+        count = Net(lambda: counter.count)
+        rom.connect_address_input(count)
+        board.add_net(count)
+        board.add_device(counter)
+        board.add_device(rom)
+        # WHEN: running the board, THEN: the ROM follows the counter
+        for i in range(5):
+            self.assertEqual(rom.data, 3 - (i & 3))
+            board.run(1)
@@ -0,0 +1,102 @@
+import random
+import unittest
+
+from assembler import assemble
+from compiler import compile_program
+from mc14500b import RESET_STATE
+from optimizer import optimize
+from tracing import LatchRecord
+from tests.boards import random_program, scan_board
+
+REDUNDANT = '''
+    LD 0        ; overwritten by the next load
+    LD 1
+    STO 0
+    NOPO        ; filler
+    IEN 7       ; input 7 is tied high, and the input is already enabled
+    OEN 7       ; the output is already enabled
+    LD 2
+    STOC 1
+    NOPF
+    ANDC 7      ; RR is 0
+    SKZ
+    LD 4        ; never executed
+    LD 3
+    STO 2
+'''
+
+
+def trace(contents, input_data: int, scans: int) -> list:
+    ''' The flags and latch writes of a number of scans on a board '''
+    board, _ = scan_board(contents, input_data)
+    events = []
+
+    def observer(cycle, record):
+        if isinstance(record, LatchRecord):
+            events.append((record.address, record.value))
+        elif record.flags:
+            events.append(record.flags)
+
+    board.subscribe(observer)
+    board.scan(scans)
+    return events
+
+
+class TestOptimizer(unittest.TestCase):
+
+    def test_redundant_program(self):
+        contents, report = optimize(assemble(REDUNDANT), constant_inputs={7: True})
+        self.assertEqual(contents, assemble('LD 1\nSTO 0\nLD 2\nSTOC 1\nLD 3\nSTO 2'))
+        self.assertEqual((report.original, report.optimized), (14, 6))
+        self.assertEqual([address for address, _ in report.removed], [0, 3, 4, 5, 8, 9, 10, 11])
+        self.assertEqual(report.removed[1], (3, 'NOP0'))
+        self.assertAlmostEqual(report.reduction, 8 / 14)
+        self.assertEqual(str(report), '14 -> 6 instructions (57.1% fewer)')
+
+    def test_preserve_flags(self):
+        contents, report = optimize(assemble(REDUNDANT), preserve_flags=True,
+                                    constant_inputs={7: True})
+        self.assertEqual(contents, assemble('LD 1\nSTO 0\nNOPO\nLD 2\nSTOC 1\nNOPF\nLD 3\nSTO 2'))
+
+    def test_same_latch_outputs(self):
+        # GIVEN: random programs, with some constant inputs
+        rng = random.Random(14)
+        for _ in range(300):
+            contents = random_program(rng, rng.randrange(1, 24), write_rate=0.3)
+            constants = {address: rng.random() < 0.5 for address in rng.sample(range(8), 2)}
+            # WHEN: optimizing them
+            optimized, report = optimize(contents, constant_inputs=constants)
+            self.assertEqual(report.optimized, len(optimized))
+            # THEN: the latch outputs are the same after every scan
+            original, optimized = compile_program(contents), compile_program(optimized)
+            for _ in range(4):
+                inputs = rng.randrange(256)
+                for address, level in constants.items():
+                    inputs = (inputs & ~(1 << address)) | (int(level) << address)
+                latches = optimized_latches = 0
+                state = optimized_state = RESET_STATE
+                for _ in range(4):
+                    latches, state = original.scan(inputs, latches, state)
+                    optimized_latches, optimized_state = optimized.scan(
+                        inputs, optimized_latches, optimized_state)
+                    self.assertEqual(optimized_latches, latches, contents)
+
+    def test_same_flags(self):
+        # GIVEN: random programs, run on a board with a ProgramCounter
+        rng = random.Random(15)
+        for _ in range(200):
+            contents = random_program(rng, rng.randrange(1, 17), write_rate=0.3)
+            input_data = rng.randrange(256)
+            # WHEN: optimizing them, preserving the flags
+            optimized, _ = optimize(contents, preserve_flags=True)
+            # THEN: the flags and latch writes are the same, in the same order
+            self.assertEqual(trace(optimized, input_data, 3), trace(contents, input_data, 3), contents)
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            optimize([])
+        with self.assertRaises(ValueError):
+            optimize(assemble('LD 0\nJMP 0'))
+        # a program without effect keeps one instruction
+        contents, report = optimize(assemble('LD 0\nLD 1\nNOPO'))
+        self.assertEqual(len(contents), 1)
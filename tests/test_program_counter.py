@@ -0,0 +1,88 @@
+import unittest
+
+from program_counter import ProgramCounter
+
+
+class TestProgramCounter(unittest.TestCase):
+
+    def setUp(self):
+        self.jump = False
+        self.ret = False
+        self.target = 0
+        self.pc = ProgramCounter(bits=4, length=10)
+        self.pc.connect_jump_input(lambda: self.jump)
+        self.pc.connect_return_input(lambda: self.ret)
+        self.pc.connect_jump_address(lambda: self.target)
+
+    def test_wrap_at_end_of_program(self):
+        for i in range(10):
+            self.assertEqual(self.pc.count, i)
+            self.assertEqual(self.pc.scans, 0)
+            self.pc.clock_rise()
+        self.assertEqual(self.pc.count, 0)
+        self.assertEqual(self.pc.scans, 1)
+
+    def test_wrap_at_max_count(self):
+        pc = ProgramCounter(bits=2)
+        for _ in range(8):
+            pc.clock_rise()
+        self.assertEqual(pc.count, 0)
+        self.assertEqual(pc.scans, 2)
+
+    def test_jump_and_return(self):
+        self.pc.load(3)
+        # jump to 7, saving 4
+        self.jump = True
+        self.target = 7
+        self.pc.clock_rise()
+        self.jump = False
+        self.assertEqual(self.pc.count, 7)
+        self.assertEqual(self.pc.stack, 4)
+        self.pc.clock_rise()
+        self.assertEqual(self.pc.count, 8)
+        # return to 4
+        self.ret = True
+        self.pc.clock_rise()
+        self.assertEqual(self.pc.count, 4)
+        self.assertIsNone(self.pc.stack)
+        # a return with an empty stack continues with the next instruction
+        self.pc.clock_rise()
+        self.assertEqual(self.pc.count, 5)
+
+    def test_jump_from_end_saves_start(self):
+        self.pc.load(9)
+        self.jump = True
+        self.target = 2
+        self.pc.clock_rise()
+        self.assertEqual(self.pc.stack, 0)
+        self.assertEqual(self.pc.scans, 0)
+
+    def test_jump_to_start(self):
+        # GIVEN: a jump to address 0, WHEN: taking it, THEN: it completes a scan
+        self.pc.load(5)
+        self.jump = True
+        self.pc.clock_rise()
+        self.assertEqual((self.pc.count, self.pc.scans), (0, 1))
+        # AND: so does a return to address 0, saved by a jump at the end
+        self.pc.load(9)
+        self.target = 4
+        self.pc.clock_rise()
+        self.jump = False
+        self.ret = True
+        self.pc.clock_rise()
+        self.assertEqual((self.pc.count, self.pc.scans), (0, 2))
+
+    def test_reset_and_snapshot(self):
+        self.pc.load(9)
+        self.pc.clock_rise()
+        snapshot = self.pc.snapshot()
+        self.pc.reset()
+        self.assertEqual((self.pc.count, self.pc.scans, self.pc.stack), (0, 0, None))
+        self.pc.restore(snapshot)
+        self.assertEqual((self.pc.count, self.pc.scans), (0, 1))
+
+    def test_invalid_length(self):
+        with self.assertRaises(ValueError):
+            ProgramCounter(bits=3, length=9)
+        with self.assertRaises(ValueError):
+            ProgramCounter(bits=3, length=0)
@@ -0,0 +1,84 @@
+import pickle
+import unittest
+
+from board import Board
+from counter import Counter
+from ram import Ram
+
+
+class TestRam(unittest.TestCase):
+
+    def setUp(self):
+        self.address = 0
+        self.data_in = 0
+        self.write = False
+        self.ram = Ram(data_bits=8, address_bits=12, contents=[1, 2, 3], page_bits=4)
+        self.ram.connect_address_input(lambda: self.address)
+        self.ram.connect_data_input(lambda: self.data_in)
+        self.ram.connect_write_enable(lambda: self.write)
+
+    def write_word(self, address: int, value: int):
+        self.address, self.data_in, self.write = address, value, True
+        self.ram.clock_fall()
+        # the inputs are captured on the falling edge
+        self.address, self.data_in, self.write = 0, 0, False
+        self.ram.clock_rise()
+
+    def test_read_and_write(self):
+        self.assertEqual(self.ram.data, 1)
+        self.write_word(0x123, 0x1AB)
+        self.assertEqual(self.ram.read(0x123), 0xAB)
+        self.address = 0x1123   # wraps around
+        self.assertEqual(self.ram.data, 0xAB)
+        # no write without the write enable
+        self.address, self.data_in = 5, 9
+        self.ram.clock_fall()
+        self.ram.clock_rise()
+        self.assertEqual(self.ram.read(5), 0)
+        self.assertEqual(self.ram.written_pages, [0x12])
+
+    def test_snapshot_and_restore(self):
+        # GIVEN: a snapshot after writing two pages
+        self.write_word(0x010, 7)
+        self.write_word(0x2F0, 8)
+        snapshot = self.ram.snapshot()
+        self.assertEqual([page for page, _ in snapshot[3]], [0x01, 0x2F])
+        # WHEN: writing more, and restoring the snapshot
+        self.write_word(0x010, 70)
+        self.write_word(0x001, 9)
+        self.assertEqual(self.ram.diff(snapshot), [0x00, 0x01])
+        self.ram.restore(pickle.loads(pickle.dumps(snapshot)))
+        # THEN: the contents are those of the snapshot
+        self.assertEqual([self.ram.read(address) for address in (0x000, 0x001, 0x002, 0x010, 0x2F0)],
+                         [1, 2, 3, 7, 8])
+        self.assertEqual(self.ram.diff(snapshot), [])
+        self.assertEqual(self.ram.written_pages, [0x01, 0x2F])
+
+    def test_snapshot_shares_unwritten_pages(self):
+        self.write_word(0x010, 7)
+        first = self.ram.snapshot()
+        self.write_word(0x2F0, 8)
+        second = self.ram.snapshot()
+        # the page that wasn't written again is the same object
+        self.assertIs(dict(second[3])[0x01], dict(first[3])[0x01])
+        self.ram.restore(first)
+        self.assertEqual(self.ram.read(0x2F0), 0)
+        self.assertEqual(self.ram.diff(second), [0x2F])
+
+    def test_on_board(self):
+        # a counter writing its count to the RAM, as a board snapshot
+        counter = Counter(bits=4)
+        ram = Ram(data_bits=4, address_bits=4)
+        ram.connect_address_input(lambda: counter.count)
+        ram.connect_data_input(lambda: ~counter.count)
+        ram.connect_write_enable(lambda: True)
+        board = Board()
+        board.add_device(ram)
+        board.add_device(counter)
+        board.run(5)
+        snapshot = board.snapshot()
+        board.run(11)
+        self.assertEqual([ram.read(address) for address in range(16)],
+                         [~address & 15 for address in range(16)])
+        board.restore(snapshot)
+        self.assertEqual([ram.read(address) for address in range(7)], [15, 14, 13, 12, 11, 0, 0])
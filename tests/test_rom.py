@@ -1,4 +1,8 @@
+import os
+import sys
+import tempfile
 import unittest
+from array import array
 
 from rom import Rom
 
@@ -28,3 +32,164 @@ class TestRom(unittest.TestCase):
         self.assertEqual(rom.data, 0x02)
         address = 3
         self.assertEqual(rom.data, 0x03)
+
+    def test_wide_words(self):
+        # GIVEN: a ROM with 20 bit words, contents exceeding that width
+        rom = Rom(data_bits=20, address_bits=1, contents=[0xFFFFFF, 0x12345])
+        address = 0
+        rom.connect_address_input(lambda: address)
+        # THEN: the contents are truncated to 20 bits
+        self.assertEqual(rom.data, 0xFFFFF)
+        address = 1
+        self.assertEqual(rom.data, 0x12345)
+
+    def test_words_wider_than_an_array(self):
+        # GIVEN: a ROM with 72 bit words
+        rom = Rom(data_bits=72, address_bits=1, contents=[1 << 71 | 5, 1 << 72 | 3])
+        address = 0
+        rom.connect_address_input(lambda: address)
+        # THEN: it holds the words, truncated to 72 bits
+        self.assertEqual(rom.data, 1 << 71 | 5)
+        address = 1
+        self.assertEqual(rom.data, 3)
+        # AND: it loads, snapshots and restores them
+        rom.load([1 << 70])
+        loaded = rom.snapshot()
+        rom.restore(None)
+        address = 0
+        self.assertEqual(rom.data, 1 << 71 | 5)
+        rom.restore(loaded)
+        self.assertEqual(rom.data, 1 << 70)
+
+
+class TestRomImage(unittest.TestCase):
+
+    def read(self, rom, address: int) -> int:
+        rom.connect_address_input(lambda: address)
+        return rom.data
+
+    def test_native_words(self):
+        image = bytearray(array('H', [0x1234, 0xBEEF, 7, 0]).tobytes())
+        rom = Rom.from_buffer(image, data_bits=16, byteorder=sys.byteorder)
+        self.assertEqual([self.read(rom, address) for address in range(5)],
+                         [0x1234, 0xBEEF, 7, 0, 0x1234])
+        # the ROM reads the buffer itself, not a copy
+        image[0:2] = array('H', [0x4321]).tobytes()
+        self.assertEqual(self.read(rom, 0), 0x4321)
+
+    def test_byte_order_and_width(self):
+        image = bytes([0x12, 0x34, 0x56, 0xAB, 0xCD, 0xEF])
+        big = Rom.from_buffer(image, data_bits=24, byteorder='big')
+        little = Rom.from_buffer(image, data_bits=24, byteorder='little')
+        self.assertEqual((self.read(big, 0), self.read(big, 1)), (0x123456, 0xABCDEF))
+        self.assertEqual((self.read(little, 0), self.read(little, 1)), (0x563412, 0xEFCDAB))
+        # data bits less than the word width are masked
+        narrow = Rom.from_buffer(image, data_bits=12, word_bytes=3, byteorder='big')
+        self.assertEqual(self.read(narrow, 1), 0xDEF)
+        other = 'little' if sys.byteorder == 'big' else 'big'
+        swapped = Rom.from_buffer(image[:4], data_bits=16, byteorder=other)
+        self.assertEqual(self.read(swapped, 1), int.from_bytes(image[2:4], other))
+
+    def test_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'image.bin')
+            with open(path, 'wb') as file:
+                file.write(bytes(range(256)) * 16)
+            rom = Rom.from_file(path, data_bits=8)
+            self.assertEqual(self.read(rom, 0x2FF), 0xFF)
+            self.assertEqual(self.read(rom, 0x1000), 0)  # 12 address bits, wraps around
+            bank = Rom.from_file(path, data_bits=8, address_bits=8)
+            self.assertEqual(self.read(bank, 0x1FF), 0xFF)
+            del rom, bank
+
+    def test_load(self):
+        # GIVEN: ROMs with contents in an array, a native and a decoded image
+        rom = Rom(data_bits=8, address_bits=2, contents=[1, 2, 3, 4])
+        native = Rom.from_buffer(bytearray(8), data_bits=16, byteorder=sys.byteorder)
+        decoded = Rom.from_buffer(bytearray(8), data_bits=12, byteorder='big')
+        for memory in (rom, native, decoded):
+            # WHEN: loading new contents
+            memory.load([0x1FF, 0x17], address=2)
+            # THEN: the words are stored masked, and the version changes
+            self.assertEqual(self.read(memory, 3), 0x17)
+            self.assertEqual(self.read(memory, 2), 0x1FF & memory._max_data)
+            self.assertNotEqual(memory.state_key(), 0)
+            with self.assertRaises(ValueError):
+                memory.load([0, 0], address=3)
+        self.assertEqual(self.read(rom, 1), 2)
+        # AND: an image in a read-only buffer can't be loaded
+        for image in (Rom.from_buffer(bytes(4), data_bits=8), Rom.from_buffer(bytes(8), data_bits=12)):
+            with self.assertRaisesRegex(ValueError, 'read-only'):
+                image.load([1])
+
+    def test_snapshot(self):
+        # GIVEN: ROMs with contents in an array, a native and a decoded image
+        rom = Rom(data_bits=8, address_bits=2, contents=[1, 2, 3, 4])
+        native = Rom.from_buffer(bytearray(b'\x01\x00\x02\x00\x03\x00\x04\x00'), data_bits=16)
+        decoded = Rom.from_buffer(bytearray(b'\x00\x01\x00\x02\x00\x03\x00\x04'),
+                                  data_bits=12, byteorder='big')
+        for memory in (rom, native, decoded):
+            # WHEN: taking snapshots before and after loading new contents
+            initial = memory.snapshot()
+            self.assertIsNone(initial)
+            memory.load([5, 6])
+            loaded = memory.snapshot()
+            self.assertIs(memory.snapshot(), loaded)    # one copy per version
+            memory.load([7])
+            # THEN: restoring them restores the contents and the version
+            memory.restore(loaded)
+            self.assertEqual([self.read(memory, address) for address in range(4)], [5, 6, 3, 4])
+            self.assertEqual(memory.state_key(), loaded[0])
+            memory.restore(initial)
+            self.assertEqual([self.read(memory, address) for address in range(4)], [1, 2, 3, 4])
+            self.assertEqual(memory.state_key(), 0)
+            # AND: new loads get new versions
+            memory.load([7])
+            self.assertNotIn(memory.state_key(), (0, loaded[0]))
+
+    def test_restore_on_another_rom(self):
+        # GIVEN: a snapshot of a loaded ROM, and a ROM with the same contents that wasn't loaded
+        source = Rom(data_bits=8, address_bits=2, contents=[1, 2, 3, 4])
+        source.load([5])
+        loaded = source.snapshot()
+        rom = Rom(data_bits=8, address_bits=2, contents=[1, 2, 3, 4])
+        # WHEN: restoring the snapshot, and then the initial contents
+        rom.restore(loaded)
+        self.assertEqual(self.read(rom, 0), 5)
+        rom.restore(None)
+        # THEN: the ROM has its initial contents again
+        self.assertEqual([self.read(rom, address) for address in range(4)], [1, 2, 3, 4])
+        self.assertEqual(rom.state_key(), 0)
+        # AND: a read-only image can't restore loaded contents
+        image = Rom.from_buffer(bytes(4), data_bits=8)
+        with self.assertRaisesRegex(ValueError, 'read-only'):
+            image.restore(loaded)
+
+    def test_default_address_bits(self):
+        # GIVEN: images of 1, 2 and 8 words, THEN: the address bits fit the image
+        for words, address_bits in ((1, 0), (2, 1), (8, 3)):
+            rom = Rom.from_buffer(bytes(range(1, words + 1)), data_bits=8)
+            self.assertEqual(rom._size, 1 << address_bits)
+            self.assertEqual(self.read(rom, rom._size - 1), rom._size)
+        # AND: an image that isn't a power of two words needs the address bits
+        with self.assertRaisesRegex(ValueError, 'power of two'):
+            Rom.from_buffer(bytes(6), data_bits=8)
+        rom = Rom.from_buffer(bytes(range(1, 7)), data_bits=8, address_bits=2)
+        self.assertEqual(self.read(rom, 3), 4)
+        # AND: an empty image is rejected
+        with self.assertRaisesRegex(ValueError, 'no word'):
+            Rom.from_buffer(b'', data_bits=8)
+        with self.assertRaisesRegex(ValueError, 'no word'):
+            Rom.from_buffer(bytes(1), data_bits=16)
+
+    def test_wide_image_words(self):
+        # GIVEN: an image of 2 words of 9 bytes, THEN: the ROM decodes them
+        image = bytes(range(18))
+        rom = Rom.from_buffer(image, data_bits=72, byteorder='big')
+        self.assertEqual(self.read(rom, 1), int.from_bytes(image[9:], 'big'))
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            Rom.from_buffer(bytes(6), data_bits=16, address_bits=2)
+        with self.assertRaises(ValueError):
+            Rom.from_buffer(bytes(4), data_bits=17, word_bytes=2)
@@ -0,0 +1,124 @@
+import asyncio
+import socket
+import unittest
+
+from runtime import (QueueInput, QueueOutput, RuntimeStatistics, ScanRuntime, StreamInput,
+                     StreamOutput)
+from tests.boards import inverter_board
+
+
+def inverter_runtime(period: float, **arguments):
+    ''' The inverter board of test_execute_14500_from_rom, with its inputs
+        read from the input image of a runtime
+    '''
+    board, devices = inverter_board()
+    latch = devices['latch']
+    runtime = ScanRuntime(board, period, outputs=lambda: latch.q, cycles_per_scan=16, **arguments)
+    devices['selector'].connect_data_inputs(runtime.input_image)
+    return runtime
+
+
+class SlowOutput:
+    ''' Output adapter taking `delay` seconds to publish '''
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.images = []
+
+    async def write(self, image: int):
+        self.images.append(image)
+        await asyncio.sleep(self.delay)
+
+
+class TestScanRuntime(unittest.TestCase):
+
+    def test_queues(self):
+        # GIVEN: a runtime with queue adapters, and an input image on the queue
+        async def main():
+            inputs, outputs = asyncio.Queue(), asyncio.Queue()
+            runtime = inverter_runtime(0.001, input_adapter=QueueInput(inputs),
+                                       output_adapter=QueueOutput(outputs))
+            inputs.put_nowait(0b11000011)
+            # WHEN: running 5 scans
+            statistics = await runtime.run(scans=5)
+            return statistics, [outputs.get_nowait() for _ in range(outputs.qsize())]
+        statistics, images = asyncio.run(main())
+        # THEN: every scan published the inverted inputs
+        self.assertIsInstance(statistics, RuntimeStatistics)
+        self.assertEqual(statistics.scans, 5)
+        self.assertEqual(statistics.cycles, 80)
+        self.assertEqual(images[-1], 0b00111100)
+        self.assertEqual(len(images), statistics.batches)
+        self.assertEqual(set(statistics.latency), {'p50', 'p90', 'p99', 'max'})
+
+    def test_period(self):
+        # GIVEN: a runtime with a 5 ms period, WHEN: running 10 scans
+        runtime = inverter_runtime(0.005)
+        loop_time = asyncio.run(self.timed(runtime.run(scans=10)))
+        # THEN: it takes about 9 periods, sleeping in between
+        self.assertGreaterEqual(loop_time, 0.040)
+        self.assertEqual(runtime.statistics().scans, 10)
+
+    async def timed(self, coroutine):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await coroutine
+        return loop.time() - start
+
+    def test_batches(self):
+        # GIVEN: an output taking 3.5 periods
+        output = SlowOutput(0.007)
+        runtime = inverter_runtime(0.002, output_adapter=output, max_batch=2)
+        # WHEN: running
+        statistics = asyncio.run(runtime.run(scans=12))
+        # THEN: the runtime falls behind, and runs the due scans in batches
+        self.assertEqual(statistics.scans, 12)
+        self.assertLess(statistics.batches, 12)
+        self.assertGreater(statistics.overruns, 0)
+        # AND: drops the periods beyond the batch size
+        self.assertGreater(statistics.dropped, 0)
+        self.assertEqual(len(output.images), statistics.batches)
+
+    def test_last_batch(self):
+        # GIVEN: an output taking 3.5 periods, and batches of any size
+        runtime = inverter_runtime(0.002, output_adapter=SlowOutput(0.007), max_batch=100)
+        # WHEN: running 3 scans, the last batch cut short by the number of scans
+        statistics = asyncio.run(runtime.run(scans=3))
+        # THEN: no periods are dropped
+        self.assertEqual((statistics.scans, statistics.batches), (3, 2))
+        self.assertEqual(statistics.dropped, 0)
+
+    def test_stop(self):
+        async def main():
+            runtime = inverter_runtime(0.001)
+            asyncio.get_running_loop().call_later(0.02, runtime.stop)
+            return await runtime.run()
+        statistics = asyncio.run(main())
+        self.assertGreater(statistics.scans, 0)
+
+    def test_streams(self):
+        # GIVEN: a runtime doing its i/o through a socket, standing in for the field
+        async def main():
+            left, right = socket.socketpair()
+            reader, writer = await asyncio.open_connection(sock=left)
+            field_reader, field_writer = await asyncio.open_connection(sock=right)
+            runtime = inverter_runtime(0.001, input_adapter=StreamInput(reader, 1),
+                                       output_adapter=StreamOutput(writer, 1))
+            task = asyncio.create_task(runtime.run(duration=0.2))
+            # WHEN: the field writes two input images
+            field_writer.write(bytes([0x0F]))
+            first = await asyncio.wait_for(field_reader.readexactly(1), 1)
+            while first == bytes([0xFF]):     # the scans before the input arrived
+                first = await asyncio.wait_for(field_reader.readexactly(1), 1)
+            field_writer.write(bytes([0xAA]))
+            second = await asyncio.wait_for(field_reader.readexactly(1), 1)
+            runtime.stop()
+            await task
+            writer.close()
+            field_writer.close()
+            return first, second
+        # THEN: the outputs are written when they change
+        self.assertEqual(asyncio.run(main()), (bytes([0xF0]), bytes([0x55])))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import random
+import unittest
+
+from mc14500b import OPCODE
+from tests.boards import INVERTER_PROGRAM, LAYOUT, random_program, scan_board
+
+
+def build(contents, inputs):
+    ''' The inverter board with a ProgramCounter, reading inputs[0] '''
+    board, devices = scan_board(contents, lambda: inputs[0])
+    return board, devices['rom'], devices['counter'], devices['latch']
+
+
+class TestScanCache(unittest.TestCase):
+
+    def test_same_results(self):
+        # GIVEN: boards with and without scan cache, running random programs
+        rng = random.Random(13)
+        for _ in range(20):
+            contents = random_program(rng, write_rate=0.5)
+            inputs = [0]
+            board, _, program_counter, latch = build(contents, inputs)
+            cache = board.enable_scan_cache(inputs=lambda: inputs[0])
+            reference, _, reference_counter, reference_latch = build(contents, inputs)
+            # WHEN: scanning with inputs that change now and then
+            for _ in range(50):
+                if rng.random() < 0.2:
+                    inputs[0] = rng.randrange(4)
+                scans = rng.randrange(1, 4)
+                self.assertEqual(board.scan(scans).cycles, reference.scan(scans).cycles)
+                # THEN: the boards are in the same state
+                self.assertEqual(board.snapshot(), reference.snapshot())
+            self.assertEqual(program_counter.scans, reference_counter.scans)
+            self.assertGreater(cache.statistics().hits, 0)
+
+    def test_statistics(self):
+        # GIVEN: a cache of 2 scans
+        inputs = [0]
+        board, _, _, latch = build(INVERTER_PROGRAM, inputs)
+        cache = board.enable_scan_cache(size=2, inputs=lambda: inputs[0])
+        # WHEN: scanning 4 times with the same inputs
+        board.scan(4)
+        # THEN: the first scans miss, until the latches repeat, and the others are from the cache
+        statistics = cache.statistics()
+        self.assertEqual((statistics.hits, statistics.misses), (2, 2))
+        self.assertEqual(board.cycle, 64)
+        # WHEN: scanning 3 other inputs
+        for value in (1, 2, 3):
+            inputs[0] = value
+            board.scan(1)
+        # THEN: the least recently used scans are evicted
+        self.assertEqual(latch.q, 0xFC)
+        self.assertEqual(len(cache), 2)
+        self.assertGreater(cache.statistics().evictions, 0)
+        self.assertAlmostEqual(cache.statistics().hit_rate, cache.statistics().hits / 7)
+
+    def test_rom_load(self):
+        # GIVEN: a cached scan of the inverter program
+        inputs = [0b1010]
+        board, rom, _, latch = build(INVERTER_PROGRAM, inputs)
+        cache = board.enable_scan_cache()
+        board.scan(2)
+        self.assertEqual(latch.q, 0b11110101)
+        # WHEN: loading a program storing the inputs
+        rom.load([word for bit in range(7, -1, -1) for word in
+                  (LAYOUT.encode(OPCODE.LD, False, bit), LAYOUT.encode(OPCODE.STO, True, bit))])
+        board.scan(2)
+        # THEN: the scans aren't taken from the cache
+        self.assertEqual(latch.q, 0b1010)
+        self.assertEqual(cache.statistics().misses, 4)
+
+    def test_rom_load_restore(self):
+        # GIVEN: a snapshot of the inverter board
+        inputs = [0b11110000]
+        board, rom, _, latch = build(INVERTER_PROGRAM, inputs)
+        board.enable_scan_cache()
+        snapshot = board.snapshot()
+        # WHEN: loading a program of NOPs, scanning, and restoring the snapshot
+        rom.load([0] * 16)
+        board.scan(2)
+        self.assertEqual(latch.q, 0)
+        board.restore(snapshot)
+        board.scan(2)
+        # THEN: the inverter program runs again, not the cached scans of the NOPs
+        self.assertEqual(latch.q, 0x0F)
+
+    def test_wiring(self):
+        # GIVEN: a cached scan
+        inputs = [0b1]
+        board, _, _, latch = build(INVERTER_PROGRAM, inputs)
+        cache = board.enable_scan_cache()
+        board.scan(2)
+        # WHEN: connecting the selector to other inputs
+        board._devices[4].connect_data_inputs(lambda: 0b10)
+        board.scan(1)
+        # THEN: the cache was cleared
+        self.assertEqual(latch.q, 0b11111101)
+        self.assertEqual(cache.statistics().invalidations, 1)
+
+    def test_other_board_wiring(self):
+        # GIVEN: two boards, one with a cached scan
+        inputs = [0b1]
+        board, _, _, latch = build(INVERTER_PROGRAM, inputs)
+        other, _, _, _ = build(INVERTER_PROGRAM, inputs)
+        cache = board.enable_scan_cache()
+        board.scan(2)
+        # WHEN: connecting an input of the other board
+        other._devices[4].connect_data_inputs(lambda: 0b10)
+        board.scan(1)
+        # THEN: the cache of the first board is kept
+        self.assertEqual(cache.statistics().invalidations, 0)
+        self.assertEqual(cache.statistics().hits, 1)
+
+    def test_max_cycles(self):
+        board, _, _, _ = build(INVERTER_PROGRAM, [0])
+        board.enable_scan_cache()
+        board.scan(1)
+        with self.assertRaises(RuntimeError):
+            board.scan(3, max_cycles=40)
+        self.assertEqual(board.cycle, 56)
+
+    def test_traced(self):
+        # GIVEN: a traced board with a cache, THEN: every scan is run
+        board, _, _, _ = build(INVERTER_PROGRAM, [0])
+        cache = board.enable_scan_cache()
+        records = []
+        board.subscribe(lambda cycle, record: records.append(record))
+        board.scan(3)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(len(records), 3 * (16 + 8))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+
+from boardspec import BoardSpec
+from sweep import SweepRun, run_one, run_sweep
+from tests.boards import INVERTER_PROGRAM
+from tests.test_boardspec import inverter_spec
+
+
+class TestSweep(unittest.TestCase):
+
+    def setUp(self):
+        # the full inverter, and a variant that only inverts the lower nibble
+        spec = inverter_spec()
+        variant = spec.configure('rom', contents=INVERTER_PROGRAM[8:])
+        self.runs = []
+        self.expected = []
+        for run_spec, mask in ((spec, 0xFF), (variant, 0x0F)):
+            for value in range(0, 256, 5):
+                self.runs.append(SweepRun(run_spec, 16, {'input_data': value}))
+                self.expected.append(~value & mask)
+
+    def test_without_parameters(self):
+        spec = BoardSpec()
+        spec.add_device('counter', 'Counter', bits=4)
+        run = SweepRun(spec, 5)
+        self.assertIsNone(run.parameters)
+        self.assertEqual(run_one(run, 'counter.count'), 5)
+
+    def test_in_process(self):
+        results = list(run_sweep(self.runs, 'latch.q', workers=0))
+        self.assertEqual([index for index, _ in results], list(range(len(self.runs))))
+        self.assertEqual([q for _, q in results], self.expected)
+
+    def test_workers(self):
+        results = [None] * len(self.runs)
+        for index, q in run_sweep(self.runs, 'latch.q', workers=2, shard_size=7):
+            results[index] = q
+        self.assertEqual(results, self.expected)
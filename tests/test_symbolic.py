@@ -0,0 +1,137 @@
+import random
+import unittest
+
+from compiler import compile_program
+from layout import WordLayout
+from mc14500b import OPCODE, RESET_STATE, STATE_RR, STATE_SKZ
+from optimizer import optimize
+from symbolic import BDD, FALSE, TRUE, equivalent, sequentially_equivalent, symbolic_scan
+from tests.boards import random_program
+
+
+class TestBDD(unittest.TestCase):
+
+    def test_canonical(self):
+        # GIVEN: two variables
+        bdd = BDD()
+        a, b = bdd.variable('a'), bdd.variable('b')
+        # THEN: equal functions are the same node
+        self.assertEqual(bdd.not_(bdd.and_(a, b)), bdd.or_(bdd.not_(a), bdd.not_(b)))
+        self.assertEqual(bdd.xnor(a, a), TRUE)
+        self.assertEqual(bdd.and_(a, bdd.not_(a)), FALSE)
+        self.assertEqual(bdd.support(bdd.or_(a, b)), {0, 1})
+        self.assertEqual(bdd.size(bdd.xnor(a, b)), 3)
+        # AND: a satisfying assignment makes the function true
+        f = bdd.and_(bdd.not_(a), b)
+        values = bdd.satisfy(f)
+        self.assertEqual(values, {0: False, 1: True})
+        self.assertTrue(bdd.evaluate(f, [values[0], values[1]]))
+        self.assertIsNone(bdd.satisfy(FALSE))
+
+
+class TestSymbolicScan(unittest.TestCase):
+
+    def test_matches_compiler(self):
+        # GIVEN: random programs
+        rng = random.Random(25)
+        for _ in range(20):
+            contents = random_program(rng)
+            scan = symbolic_scan(contents)
+            program = compile_program(contents)
+            # WHEN: evaluating a scan from random states, THEN: it's the compiled scan
+            for _ in range(50):
+                inputs, latches, state = rng.randrange(256), rng.randrange(256), rng.randrange(32)
+                self.assertEqual(scan.evaluate(inputs, latches, state),
+                                 program.scan(inputs, latches, state))
+
+    def test_lookup_table(self):
+        # GIVEN: a program storing I1 AND NOT I6 to Q0
+        layout = WordLayout()
+        contents = [layout.encode(OPCODE.LD, False, 1), layout.encode(OPCODE.ANDC, False, 6),
+                    layout.encode(OPCODE.STO, True, 0)]
+        scan = symbolic_scan(contents)
+        # WHEN: making a lookup table, THEN: it is indexed by the inputs that are read
+        table = scan.lookup_table(latches=0xF0)
+        self.assertEqual(table.inputs, [1, 6])
+        self.assertEqual(len(table), 4)
+        program = compile_program(contents)
+        for inputs in range(256):
+            self.assertEqual(table(inputs), program.scan(inputs, 0xF0, RESET_STATE))
+        with self.assertRaises(ValueError):
+            scan.lookup_table(max_inputs=1)
+
+    def test_wide(self):
+        # GIVEN: a program reading input 100 and writing latch 90 of 128
+        layout = WordLayout(opcode_shift=8, write_bit=7, address_bits=7)
+        contents = [layout.encode(OPCODE.LDC, False, 100), layout.encode(OPCODE.STO, True, 90)]
+        scan = symbolic_scan(contents, layout)
+        # THEN: the latch is the inverted input
+        self.assertEqual(scan.points, 128)
+        self.assertEqual(scan.input_support(), [100])
+        self.assertEqual(scan.evaluate(0, 0)[0], 1 << 90)
+        self.assertEqual(scan.evaluate(1 << 100, 0)[0], 0)
+
+
+class TestEquivalence(unittest.TestCase):
+
+    def test_optimized(self):
+        # GIVEN: random programs and their optimized versions
+        rng = random.Random(26)
+        for _ in range(20):
+            contents = random_program(rng)
+            optimized, _ = optimize(contents)
+            # THEN: they write the same latches in every scan from reset
+            self.assertTrue(sequentially_equivalent(contents, optimized))
+
+    def test_sequential_counterexample(self):
+        # GIVEN: a program that stores RR before loading it, and one that doesn't
+        layout = WordLayout()
+        contents = [layout.encode(OPCODE.STO, True, 0), layout.encode(OPCODE.LD, False, 5)]
+        other = [layout.encode(OPCODE.STO, True, 0), layout.encode(OPCODE.LD, False, 6)]
+        # WHEN: checking them from reset
+        result = sequentially_equivalent(contents, other)
+        # THEN: the second scan differs, after a scan with a difference of I5 and I6
+        self.assertFalse(result)
+        self.assertEqual(len(result.trace), 1)
+        inputs, latches, state = result.counterexample
+        program, other_program = compile_program(contents), compile_program(other)
+        _, program_state = program.scan(result.trace[0], 0, RESET_STATE)
+        _, other_state = other_program.scan(result.trace[0], 0, RESET_STATE)
+        self.assertEqual(program_state, state)
+        self.assertNotEqual(program.scan(inputs, latches, program_state),
+                            other_program.scan(inputs, latches, other_state))
+        # AND: a single scan from reset is the same
+        self.assertTrue(equivalent(contents, other, state=RESET_STATE))
+
+    def test_counterexample(self):
+        # GIVEN: random pairs of programs
+        rng = random.Random(27)
+        differences = 0
+        for _ in range(20):
+            contents, other = random_program(rng, 6), random_program(rng, 6)
+            result = equivalent(contents, other, compare_state=True)
+            if result:
+                continue
+            differences += 1
+            # WHEN: they differ, THEN: they differ for the counterexample
+            inputs, latches, state = result.counterexample
+            self.assertNotEqual(compile_program(contents).scan(inputs, latches, state),
+                                compile_program(other).scan(inputs, latches, state))
+        self.assertGreater(differences, 0)
+
+    def test_start_state(self):
+        # GIVEN: a program with and without a leading ORC
+        layout = WordLayout()
+        body = [layout.encode(OPCODE.LD, False, 2), layout.encode(OPCODE.STO, True, 3)]
+        prefixed = [layout.encode(OPCODE.ORC, False, 0)] + body
+        # THEN: they differ if the scan starts by skipping an instruction
+        result = equivalent(body, prefixed)
+        self.assertFalse(result)
+        _, _, state = result.counterexample
+        self.assertEqual(state & (STATE_SKZ | STATE_RR), STATE_SKZ)
+        # AND: they are the same from the reset state
+        self.assertTrue(equivalent(body, prefixed, state=RESET_STATE))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import io
+import unittest
+
+from mc14500b import MC14500B, OPCODE, STATE_RR
+from mc14599b import MC14599B
+from tracing import (KIND_ICU, KIND_LATCH, BinaryTraceWriter, IcuRecord, LatchRecord,
+                     RingBuffer, read_binary_trace)
+from tests.boards import LAYOUT, inverter_board
+
+
+class StuckRR(MC14500B):
+    ''' MC14500B with RR stuck at 0 '''
+    __slots__ = ()
+
+    def clock_fall(self):
+        super().clock_fall()
+        self._state &= ~STATE_RR
+
+
+class TestTracing(unittest.TestCase):
+
+    def setUp(self):
+        self.build(MC14500B)
+
+    def build(self, icu_class):
+        # The inverter board of test_execute_14500_from_rom, for 2 bits
+        contents = [LAYOUT.encode(OPCODE.LD, False, 1), LAYOUT.encode(OPCODE.STOC, True, 1),
+                    LAYOUT.encode(OPCODE.LD, False, 0), LAYOUT.encode(OPCODE.STOC, True, 0)]
+        self.board, devices = inverter_board(0b01, contents=contents, icu_class=icu_class,
+                                             address_bits=2)
+        self.icu, self.latch = devices['icu'], devices['latch']
+
+    def test_untraced_class(self):
+        # GIVEN: a device without observers, THEN: it runs its untraced class
+        self.assertIs(type(self.icu), MC14500B)
+        self.assertFalse(self.icu.traced)
+        # WHEN: subscribing and unsubscribing
+        observer = lambda record: None
+        self.icu.subscribe(observer)
+        self.assertTrue(self.icu.traced)
+        self.assertIsNot(type(self.icu), MC14500B)
+        self.icu.unsubscribe(observer)
+        # THEN: it is back to the untraced class
+        self.assertIs(type(self.icu), MC14500B)
+
+    def test_subclass(self):
+        # GIVEN: a board with a subclass of the MC14500B, with RR stuck at 0
+        self.build(StuckRR)
+        # WHEN: tracing it, THEN: it keeps its clock method
+        observer = lambda record: None
+        self.icu.subscribe(observer)
+        self.assertIsInstance(self.icu, StuckRR)
+        self.assertIs(self.icu.device_class, StuckRR)
+        self.board.run(4)
+        self.assertEqual(self.latch.q, 0b11)
+        # AND: gets its class back after tracing and profiling
+        self.icu.unsubscribe(observer)
+        self.assertIs(type(self.icu), StuckRR)
+        self.board.start_profiling()
+        self.board.stop_profiling()
+        self.assertIs(type(self.icu), StuckRR)
+        self.board.run(4)
+        self.assertEqual(self.latch.q, 0b11)
+
+    def test_ring_buffer(self):
+        buffer = RingBuffer(capacity=100)
+        self.board.subscribe(buffer)
+        self.board.run(4)
+        icu_records = [(cycle, record) for cycle, record in buffer if isinstance(record, IcuRecord)]
+        latch_records = [(cycle, record) for cycle, record in buffer if isinstance(record, LatchRecord)]
+        self.assertEqual([record.opcode for _, record in icu_records],
+                         [OPCODE.LD, OPCODE.STOC, OPCODE.LD, OPCODE.STOC])
+        self.assertEqual([cycle for cycle, _ in icu_records], [0, 1, 2, 3])
+        self.assertEqual(icu_records[0][1].rr, False)
+        self.assertEqual(icu_records[1][1].data_out, True)
+        self.assertEqual([(cycle, record.address, record.value) for cycle, record in latch_records],
+                         [(1, 1, True), (3, 0, False)])
+        self.assertEqual(self.latch.q, 0b10)
+        # the ring buffer only keeps the last records
+        small = RingBuffer(capacity=3)
+        self.board.subscribe(small)
+        self.board.run(4)
+        self.assertEqual(len(small), 3)
+        # WHEN: unsubscribing all observers, THEN: the devices are untraced
+        self.board.unsubscribe(buffer)
+        self.board.unsubscribe(small)
+        self.assertIs(type(self.icu), MC14500B)
+        self.assertIs(type(self.latch), MC14599B)
+        self.board.run(4)
+        self.assertEqual(self.board.cycle, 12)
+
+    def test_reset_keeps_observers(self):
+        buffer = RingBuffer(capacity=100)
+        self.board.subscribe(buffer)
+        self.board.reset()
+        self.board.run(1)
+        self.assertEqual(len(buffer), 1)
+
+    def test_binary_trace(self):
+        file = io.BytesIO()
+        self.board.subscribe(BinaryTraceWriter(file))
+        self.board.run(2)
+        file.seek(0)
+        records = list(read_binary_trace(file))
+        self.assertEqual(records, [
+            (0, 0, KIND_ICU, int(OPCODE.LD), 0b01000, 0),
+            (1, 0, KIND_ICU, int(OPCODE.STOC), 0b01100, 16),
+            (1, 1, KIND_LATCH, 1, 1, 0),
+        ])
@@ -0,0 +1,86 @@
+import io
+import unittest
+
+from mc14500b import OPCODE
+from vcd import VcdWriter
+from tests.boards import LAYOUT, inverter_board
+
+
+def parse_vcd(text: str):
+    ''' Return {name: identifier} and a list of (time, identifier, value) '''
+    identifiers = {}
+    changes = []
+    time = None
+    for line in text.splitlines():
+        if line.startswith('$var'):
+            _, _, _, identifier, name, _ = line.split()
+            identifiers[name] = identifier
+        elif line.startswith('#'):
+            time = int(line[1:])
+        elif line.startswith('b'):
+            value, identifier = line[1:].split()
+            changes.append((time, identifier, value))
+        elif line and line[0] in '01z':
+            changes.append((time, line[1:], line[0]))
+    return identifiers, changes
+
+
+class TestVcdWriter(unittest.TestCase):
+
+    def setUp(self):
+        contents = [LAYOUT.encode(OPCODE.LD, False, 1), LAYOUT.encode(OPCODE.STOC, True, 1),
+                    LAYOUT.encode(OPCODE.OEN, False, 2), LAYOUT.encode(OPCODE.STO, True, 0)]
+        self.board, devices = inverter_board(0b001, contents=contents, address_bits=2)
+        self.icu, self.latch = devices['icu'], devices['latch']
+
+    def test_value_changes(self):
+        file = io.StringIO()
+        writer = VcdWriter(file, chunk_size=4)
+        writer.add_icu(self.icu)
+        writer.add_latch(self.latch)
+        writer.run(self.board, 4)
+        writer.close()
+        text = file.getvalue()
+        self.assertIn('$enddefinitions $end', text)
+        identifiers, changes = parse_vcd(text)
+        self.assertEqual(set(identifiers), {'I', 'DATA', 'WRITE', 'JMP', 'RTN', 'FLAG_O',
+                                            'FLAG_F', 'SKZ', 'RR', 'Q[7:0]'})
+
+        def history(name):
+            return [(time, value) for time, identifier, value in changes
+                    if identifier == identifiers[name]]
+
+        # instruction changes on each falling edge
+        self.assertEqual(history('I'), [(0, '0'), (1, '1'), (3, '1001'), (5, '1011'), (7, '1000')])
+        # WRITE is active between the falling and rising edges of STOC
+        self.assertEqual(history('WRITE'), [(0, '0'), (3, '1'), (4, '0')])
+        # DATA goes high impedance when OEN loads the 0 of input 2
+        self.assertEqual(history('DATA'), [(0, '0'), (3, '1'), (5, 'z')])
+        # the latch output changes on the rising edge
+        self.assertEqual(history('Q[7:0]'), [(0, '0'), (4, '10')])
+        self.assertTrue(text.rstrip().endswith('#8'))
+
+    def test_chunks(self):
+        # GIVEN: the same run recorded in chunks of 1, 3 and 4096 edges, in
+        # several calls of run()
+        texts = []
+        for chunk_size in (1, 3, 4096):
+            self.setUp()
+            file = io.StringIO()
+            writer = VcdWriter(file, chunk_size=chunk_size)
+            writer.add_icu(self.icu)
+            writer.add_latch(self.latch)
+            for clocks in (5, 1, 10):
+                writer.run(self.board, clocks)
+            writer.close()
+            texts.append(file.getvalue())
+        # THEN: the output doesn't depend on the chunks
+        self.assertEqual(texts[0], texts[1])
+        self.assertEqual(texts[0], texts[2])
+        self.assertTrue(texts[0].rstrip().endswith('#32'))
+
+    def test_no_signals_after_start(self):
+        writer = VcdWriter(io.StringIO())
+        writer.start()
+        with self.assertRaises(RuntimeError):
+            writer.add_latch(self.latch)
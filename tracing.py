@@ -0,0 +1,146 @@
+# Tracing of devices and boards.
+# Observers subscribe to a device (device.subscribe(observer)) and are called
+# with a record for every traced event: IcuRecord for each instruction of
+# the MC14500B, LatchRecord for each write committed to an MC14599B latch.
+# Observers subscribed to a Board are called with (cycle, record) for the
+# records of all its devices; RingBuffer, BinaryTraceWriter and print_record
+# are such board observers.
+#
+# Tracing costs nothing when no observer is subscribed: a traceable device
+# changes its class to a traced subclass on the first subscription, and back
+# on the last unsubscription, so the untraced clock methods don't check for
+# observers. The traced subclass of a device class combines the traced class
+# of its chip (e.g. _TracedMC14500B) with the class of the device, so the
+# methods of subclasses of a chip are kept; the class of the device is saved
+# and restored on the last unsubscription. As boards store the bound clock
+# methods of their devices, the change of class increments `generation`, for
+# boards to bind them again.
+
+import struct
+from collections import deque, namedtuple
+
+generation = 0  # incremented whenever a device changes between traced and untraced
+
+# One instruction of an MC14500B: opcode (OPCODE), rr (RR after the
+# instruction), data_in (enabled input data), data_out (data output, None if
+# output is disabled), flags (flag word), skipped (instruction skipped by SKZ)
+IcuRecord = namedtuple('IcuRecord', 'device opcode rr data_in data_out flags skipped')
+
+# A write committed to latch `address` of an MC14599B
+LatchRecord = namedtuple('LatchRecord', 'device address value')
+
+
+_traced_classes = {}    # traced subclass by device class
+
+
+def _traced_class(cls: type) -> type:
+    traced = _traced_classes.get(cls)
+    if traced is None:
+        traced = cls._traced_class
+        if not issubclass(traced, cls):
+            traced = type(f'_Traced{cls.__name__}', (traced, cls), {'__slots__': ()})
+        _traced_classes[cls] = traced
+    return traced
+
+
+class Traceable:
+    ''' Mixin for devices that can be traced. The device class defines the
+        `_observers` and `_untraced_class` slots, and sets `_traced_class` to
+        its traced subclass, which calls the clock methods with super().
+    '''
+    __slots__ = ()
+    _traced_class = None
+
+    def subscribe(self, observer):
+        ''' Call observer(record) for every traced event of the device '''
+        global generation
+        if not self._observers:
+            self._observers = []
+            self._untraced_class = type(self)
+            self.__class__ = _traced_class(type(self))
+            generation += 1
+        self._observers.append(observer)
+
+    def unsubscribe(self, observer):
+        global generation
+        self._observers.remove(observer)
+        if not self._observers:
+            self.__class__ = self._untraced_class
+            generation += 1
+
+    @property
+    def traced(self) -> bool:
+        return bool(self._observers)
+
+    @property
+    def device_class(self) -> type:
+        ''' The class of the device, without tracing '''
+        return self._untraced_class if self._observers else type(self)
+
+
+class RingBuffer:
+    ''' Board observer keeping the last `capacity` (cycle, record) pairs '''
+    def __init__(self, capacity: int):
+        self._records = deque(maxlen=capacity)
+
+    def __call__(self, cycle: int, record):
+        self._records.append((cycle, record))
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def clear(self):
+        self._records.clear()
+
+
+# Binary trace records: cycle, device number, kind, and three fields:
+# - KIND_ICU: opcode, bits (rr, data_in, data_out, output enable, skipped), flags
+# - KIND_LATCH: address, value, 0
+_RECORD = struct.Struct('<QBBBBB')
+KIND_ICU = 0
+KIND_LATCH = 1
+
+
+class BinaryTraceWriter:
+    ''' Board observer writing fixed size binary records to a file opened in
+        binary mode. Devices are numbered in the order of their first record.
+    '''
+    def __init__(self, file):
+        self._file = file
+        self._devices = {}
+
+    def _device_number(self, device) -> int:
+        number = self._devices.get(id(device))
+        if number is None:
+            number = self._devices[id(device)] = len(self._devices)
+        return number
+
+    def __call__(self, cycle: int, record):
+        device = self._device_number(record.device)
+        if isinstance(record, IcuRecord):
+            bits = (int(record.rr) | (int(record.data_in) << 1) | (int(bool(record.data_out)) << 2)
+                    | (int(record.data_out is not None) << 3) | (int(record.skipped) << 4))
+            data = _RECORD.pack(cycle, device, KIND_ICU, int(record.opcode), bits, record.flags)
+        else:
+            data = _RECORD.pack(cycle, device, KIND_LATCH, record.address, int(record.value), 0)
+        self._file.write(data)
+
+
+def read_binary_trace(file):
+    ''' Read the records written by BinaryTraceWriter, yielding tuples
+        (cycle, device number, kind, field, field, field).
+    '''
+    while data := file.read(_RECORD.size):
+        yield _RECORD.unpack(data)
+
+
+def print_record(cycle: int, record):
+    ''' Board observer printing the records '''
+    if isinstance(record, IcuRecord):
+        print(f"{cycle}: MC14500B: {record.opcode.name}, Input: {record.data_in},"
+              f" Output: {record.data_out}{' (skipped)' if record.skipped else ''}")
+    else:
+        print(f"{cycle}: MC14599B: Q{record.address} = {record.value}")
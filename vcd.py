@@ -0,0 +1,268 @@
+# VcdWriter records the signals of a board as a Value Change Dump (VCD),
+# the text waveform format read by viewers like GTKWave.
+# The writer drives the board itself (VcdWriter.run), sampling the signals
+# after each clock edge. Time 0 holds the values before the run, and a clock
+# cycle takes two time units: the falling edge at odd times and the rising
+# edge at even times.
+#
+# Signals are sampled in groups: a group has a probe that returns a single
+# int for all its signals, like MC14500B.packed. On each edge the writer
+# only calls the probes and buffers their values; the buffer is formatted
+# when it holds a chunk of edges, and written to the file, so the memory use
+# doesn't grow with the length of the run. Only when the probe value of a
+# group changes, the signals whose bits of the probe value changed are
+# extracted and compared, and only the signals that changed are written.
+# Signals that are a single bit of the probe value are looked up by the
+# changed bits directly. The value changes are kept by the probe values
+# they change from and to, so the changes of a program running in a loop
+# are formatted once.
+# On a board whose signals change on nearly every edge, recording takes
+# about 37% of the run time, see benchmarks/bench_vcd.py.
+
+from mc14500b import (FLAG_F, FLAG_JMP, FLAG_O, FLAG_RTN, FLAG_WR, STATE_OEN, STATE_OUT,
+                      STATE_RR, STATE_SKZ)
+
+_UNSET = object()   # last probe value of a group that wasn't sampled yet
+_MAX_TRANSITIONS = 4096  # value changes kept per group, and per writer
+_FIRST_ID = 33  # '!'
+_ID_CHARACTERS = 94  # '!' .. '~'
+
+# MC14500B pins: name, width, shift and mask in the value of MC14500B.packed
+# (opcode in bits 0..3, state in bits 4..8, flags in bits 9..13)
+_ICU_SIGNALS = (
+    ('I', 4, 0, 15),
+    ('WRITE', 1, 9, FLAG_WR),
+    ('JMP', 1, 9, FLAG_JMP),
+    ('RTN', 1, 9, FLAG_RTN),
+    ('FLAG_O', 1, 9, FLAG_O),
+    ('FLAG_F', 1, 9, FLAG_F),
+    ('SKZ', 1, 4, STATE_SKZ),
+    ('RR', 1, 4, STATE_RR),
+)
+
+
+def _identifier(number: int) -> str:
+    ''' The VCD identifier code of signal `number` '''
+    identifier = ''
+    while True:
+        identifier += chr(_FIRST_ID + number % _ID_CHARACTERS)
+        number //= _ID_CHARACTERS
+        if not number:
+            return identifier
+
+
+def _vcd_value(value, width: int) -> str:
+    ''' VCD notation of a value, without the identifier '''
+    if value is None:
+        return 'z' if width == 1 else 'bz '
+    if width == 1:
+        return '1' if value else '0'
+    return f'b{value:b} '
+
+
+class _Group:
+    __slots__ = ('probe', 'signals', 'bit_signals', 'bits', 'value', 'transitions')
+
+    def __init__(self, probe):
+        self.probe = probe
+        self.signals = []   # (identifier, width, extract, probe bits)
+        self.bit_signals = {}   # (value change for 0, for 1) by probe bit
+        self.bits = 0       # probe bits of the bit signals
+        self.value = _UNSET # last probe value
+        self.transitions = {}   # value changes by (last probe value, probe value)
+
+    def changes(self, last, value) -> str:
+        ''' The value changes written when the probe value changes from
+            `last` to `value`, one per line
+        '''
+        key = (last, value)
+        changes = self.transitions.get(key)
+        if changes is None:
+            changes = self._changes(last, value)
+            if len(self.transitions) < _MAX_TRANSITIONS:
+                self.transitions[key] = changes
+        return changes
+
+    def _changes(self, last, value) -> str:
+        first = last is _UNSET
+        changed = -1 if first or last is None or value is None else value ^ last
+        changes = []
+        bits = changed & self.bits
+        while bits:
+            bit = bits & -bits
+            bits ^= bit
+            changes.append(self.bit_signals[bit][1 if value & bit else 0])
+        for identifier, width, extract, bits in self.signals:
+            if changed & bits:
+                signal_value = extract(value)
+                if first or signal_value != extract(last):
+                    changes.append(_vcd_value(signal_value, width) + identifier)
+        return '\n'.join(changes)
+
+
+class VcdWriter:
+    def __init__(self, file, timescale: str = '1 us', chunk_size: int = 4096):
+        self._file = file
+        self._timescale = timescale
+        self._chunk_size = chunk_size   # number of clock edges per write
+        self._scopes = {}   # groups per scope name
+        self._groups = []
+        self._declarations = []
+        self._signal_count = 0
+        self._time = 0
+        self._samples = []  # probe values of the groups, per edge after _formatted
+        self._formatted = 0 # time of the last formatted sample
+        self._transitions = {}  # value changes by (last probe values, probe values)
+        self._lines = []
+        self._started = False
+
+    @property
+    def time(self) -> int:
+        return self._time
+
+    def add_group(self, scope: str, probe) -> _Group:
+        ''' Add a group of signals that are sampled by calling `probe` '''
+        if self._started:
+            raise RuntimeError("Can't add signals after the recording started")
+        group = _Group(probe)
+        self._groups.append(group)
+        self._scopes.setdefault(scope, []).append(group)
+        return group
+
+    def add_signal_to_group(self, group: _Group, name: str, width: int, extract, bits: int = -1):
+        ''' Add a signal to a group; extract(probe value) gives its value, an
+            int or None for high impedance. `bits` are the bits of the probe
+            value the signal depends on.
+        '''
+        identifier = _identifier(self._signal_count)
+        self._signal_count += 1
+        group.signals.append((identifier, width, extract, bits))
+        self._declarations.append((group, name, width, identifier))
+
+    def add_bit_signal(self, group: _Group, name: str, bit: int):
+        ''' Add a 1-bit signal to a group, that is bit `bit` of the probe value '''
+        identifier = _identifier(self._signal_count)
+        self._signal_count += 1
+        group.bit_signals[1 << bit] = ('0' + identifier, '1' + identifier)
+        group.bits |= 1 << bit
+        self._declarations.append((group, name, 1, identifier))
+
+    def add_signal(self, scope: str, name: str, width: int, probe):
+        ''' Add a signal sampled by calling probe(), on its own '''
+        group = self.add_group(scope, probe)
+        self.add_signal_to_group(group, name, width, lambda value: value)
+
+    def add_icu(self, icu, scope: str = 'icu'):
+        ''' Add the pins of an MC14500B: instruction, DATA (output, high
+            impedance when output is disabled), WRITE, JMP, RTN, FLAG O,
+            FLAG F, and the SKZ and RR internal signals.
+        '''
+        group = self.add_group(scope, icu.packed)
+        for name, width, shift, mask in _ICU_SIGNALS:
+            if width == 1:
+                self.add_bit_signal(group, name, (mask << shift).bit_length() - 1)
+            else:
+                self.add_signal_to_group(group, name, width,
+                                         lambda value, shift=shift, mask=mask: (value >> shift) & mask,
+                                         mask << shift)
+        self.add_signal_to_group(
+            group, 'DATA', 1,
+            lambda value: int(bool((value >> 4) & STATE_OUT)) if (value >> 4) & STATE_OEN else None,
+            (STATE_OUT | STATE_OEN) << 4)
+
+    def add_latch(self, latch, scope: str = 'latch'):
+        ''' Add the Q0..Q7 outputs of an MC14599B, as the vector Q[7:0] '''
+        self.add_signal(scope, 'Q[7:0]', 8, lambda: latch.q)
+
+    def _header(self):
+        lines = [
+            '$version mc14500b vcd.py $end',
+            f'$timescale {self._timescale} $end',
+        ]
+        for scope, groups in self._scopes.items():
+            lines.append(f'$scope module {scope} $end')
+            for group, name, width, identifier in self._declarations:
+                if group in groups:
+                    lines.append(f'$var wire {width} {identifier} {name} $end')
+            lines.append('$upscope $end')
+        lines.append('$enddefinitions $end')
+        return '\n'.join(lines) + '\n'
+
+    def _format(self):
+        ''' Format the value changes of the samples taken since the last call '''
+        samples = self._samples
+        groups = self._groups
+        count = len(groups)
+        transitions = self._transitions
+        append = self._lines.append
+        time = self._formatted
+        last = tuple(group.value for group in groups)
+        for values in zip(*[samples[index::count] for index in range(count)]):
+            time += 1
+            if values == last:
+                continue
+            key = (last, values)
+            changes = transitions.get(key)
+            if changes is None:
+                changes = '\n'.join(filter(None, (
+                    group.changes(old, value)
+                    for group, old, value in zip(groups, last, values) if value != old)))
+                if len(transitions) < _MAX_TRANSITIONS:
+                    transitions[key] = changes
+            if changes:
+                append(f'#{time}\n{changes}')
+            last = values
+        for group, value in zip(groups, last):
+            group.value = value
+        self._formatted = time
+        samples.clear()
+
+    def start(self):
+        ''' Write the header and the initial values '''
+        if self._started:
+            return
+        self._started = True
+        self._file.write(self._header())
+        changes = []
+        for group in self._groups:
+            group.value = group.probe()
+            changes.append(group.changes(_UNSET, group.value))
+        changes = '\n'.join(filter(None, changes))
+        if changes:
+            self._lines.append(f'#0\n{changes}')
+        self.flush()
+
+    def run(self, board, clocks: int = 1):
+        ''' Run the board, recording the signals after each clock edge '''
+        self.start()
+        clock_fall = board.clock_fall
+        clock_rise = board.clock_rise
+        probes = [group.probe for group in self._groups]
+        sample = self._samples.append
+        chunk = max(1, self._chunk_size // 2)
+        while clocks > 0:
+            cycles = min(chunk, clocks)
+            for _ in range(cycles):
+                clock_fall()
+                for probe in probes:
+                    sample(probe())
+                clock_rise()
+                for probe in probes:
+                    sample(probe())
+            clocks -= cycles
+            self._time += 2 * cycles
+            self.flush()
+
+    def flush(self):
+        self._format()
+        if self._lines:
+            self._lines.append('')
+            self._file.write('\n'.join(self._lines))
+            self._lines = []
+
+    def close(self):
+        ''' Write the remaining output, and the final time '''
+        self.start()
+        self._format()
+        self._lines.append(f'#{self._time}')
+        self.flush()